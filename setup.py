@@ -14,11 +14,13 @@ setup(
         'wtfmongoengine',
     ],
     install_requires=[
+        'mongoengine',
         'wtforms',
     ],
     tests_require=[
         'mock',
         'mongoengine',
+        'mongomock',
         'unittest2',
     ],
     test_suite='wtfmongoengine.tests.suite',
@@ -0,0 +1,297 @@
+import cPickle as pickle
+import hashlib
+import os
+import tempfile
+import threading
+import types
+from collections import OrderedDict
+
+from mongoengine.base import BaseField
+
+
+class ConversionCache(object):
+    """
+    Process-wide, size bounded LRU cache for converted WTForms fields.
+
+    The cache is keyed by ``(converter_class, document_class, subset)`` where
+    ``subset`` describes the ``fields`` / ``exclude`` arguments given to the
+    converter (see :py:meth:`.DocumentFieldConverter.cache_key`).
+
+    :param maxsize:
+        The maximum number of entries to keep. When the cache is full, the
+        least recently used entry will be evicted.
+
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key):
+        """
+        Return the cached value for ``key``.
+
+        :param key:
+            The cache key.
+
+        :return:
+            The cached value or ``None`` when ``key`` is not in the cache.
+
+        """
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+
+            # re-insert to mark the entry as most recently used
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Store ``value`` under ``key``, evicting the oldest entry when needed.
+
+        :param key:
+            The cache key.
+
+        :param value:
+            The value to store.
+
+        """
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, document_class=None):
+        """
+        Remove entries from the cache.
+
+        :param document_class:
+            When given, only the entries of this document class are removed,
+            else the whole cache is cleared.
+
+        """
+        with self._lock:
+            if document_class is None:
+                self._data.clear()
+                return
+
+            for key in list(self._data.keys()):
+                if key[1] is document_class:
+                    del self._data[key]
+
+    def clear(self):
+        """
+        Clear the cache and reset the hit / miss counters.
+        """
+        self.invalidate()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def info(self):
+        """
+        Return a ``dict`` with the cache statistics.
+
+        :return:
+            A ``dict`` containing ``hits``, ``misses``, ``maxsize`` and
+            ``currsize``.
+
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'maxsize': self.maxsize,
+            'currsize': len(self._data),
+        }
+
+
+# field attributes which depend on the import order, not on the definition
+_FINGERPRINT_EXCLUDE = frozenset((
+    'creation_counter', 'owner_document', '_owner_document'))
+
+
+def _fingerprint_value(value):
+    """
+    Return a representation of ``value`` which is stable across processes.
+    """
+    if isinstance(value, BaseField):
+        attrs = dict(
+            (name, attr) for name, attr in vars(value).items()
+            if name not in _FINGERPRINT_EXCLUDE
+        )
+
+        # a document referenced by name is replaced by the class once used
+        document_type = attrs.get('document_type_obj')
+        if isinstance(document_type, type):
+            attrs['document_type_obj'] = getattr(
+                document_type, '_class_name', document_type.__name__)
+
+        return (_class_path(type(value)), _fingerprint_value(attrs))
+    elif isinstance(value, type):
+        return _class_path(value)
+    elif isinstance(value, (list, tuple)):
+        return tuple(_fingerprint_value(v) for v in value)
+    elif isinstance(value, dict):
+        return tuple(
+            (k, _fingerprint_value(v)) for k, v in sorted(value.items()))
+    elif isinstance(value, types.FunctionType):
+        return (value.__module__, value.__name__, value.func_code.co_code)
+    elif isinstance(value, types.BuiltinMethodType):
+        return (_fingerprint_value(value.__self__), value.__name__)
+    elif hasattr(value, 'pattern') and hasattr(value, 'flags'):
+        return ('re', value.pattern, value.flags)
+    return repr(value)
+
+
+def _class_path(klass):
+    return '{0}.{1}'.format(klass.__module__, klass.__name__)
+
+
+def schema_fingerprint(document_class, *extra):
+    """
+    Return the fingerprint of the field definitions of ``document_class``.
+
+    The fingerprint changes when a field is added, removed or changed, but
+    not between processes.
+
+    :param document_class:
+        The Mongoengine document class.
+
+    :param extra:
+        Additional (``repr``-able) values to include in the fingerprint.
+
+    :return:
+        A hexadecimal ``str``.
+
+    """
+    value = (
+        _class_path(document_class),
+        _fingerprint_value(document_class._fields),
+        _fingerprint_value(extra),
+    )
+    return hashlib.sha1(repr(value)).hexdigest()
+
+
+class SchemaCache(object):
+    """
+    On-disk cache for serialized form schemas, shared between processes.
+
+    Each entry is stored in its own pickle file within ``directory``,
+    together with the fingerprint it was created for (see
+    :py:func:`schema_fingerprint`). An entry with another fingerprint is
+    ignored, and overwritten once the schema is regenerated.
+
+    :param directory:
+        The directory to store the entries in. It is created when it does
+        not exist.
+
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, key):
+        """
+        Return the path of the file for ``key``.
+        """
+        return os.path.join(
+            self.directory,
+            '{0}.pickle'.format(hashlib.sha1(key).hexdigest())
+        )
+
+    def get(self, key, fingerprint):
+        """
+        Return the schema stored for ``key``.
+
+        :param key:
+            The cache key (a ``str``).
+
+        :param fingerprint:
+            The current fingerprint of the schema.
+
+        :return:
+            The schema or ``None`` when there is no entry, the entry is
+            stale or it could not be read.
+
+        """
+        try:
+            with open(self.path(key), 'rb') as f:
+                entry = pickle.load(f)
+        except Exception:
+            # no entry, a truncated file, a class which was removed, ...
+            return None
+
+        if entry.get('fingerprint') != fingerprint:
+            return None
+
+        return entry.get('schema')
+
+    def set(self, key, fingerprint, schema):
+        """
+        Store ``schema`` under ``key``.
+
+        The file is written to a temporary file first and then renamed, so
+        concurrent readers never see a partial entry.
+
+        :return:
+            ``True`` when stored, ``False`` when ``schema`` could not be
+            pickled (e.g. because it references a class which can't be
+            imported).
+
+        """
+        try:
+            data = pickle.dumps(
+                {'fingerprint': fingerprint, 'schema': schema},
+                pickle.HIGHEST_PROTOCOL
+            )
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return False
+
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:
+                # created by another process in the meantime
+                if not os.path.isdir(self.directory):
+                    raise
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.rename(temp_path, self.path(key))
+        except OSError:
+            os.unlink(temp_path)
+            raise
+
+        return True
+
+    def clear(self):
+        """
+        Remove all the entries.
+        """
+        if not os.path.isdir(self.directory):
+            return
+
+        for name in os.listdir(self.directory):
+            if name.endswith('.pickle'):
+                os.unlink(os.path.join(self.directory, name))
+
+
+conversion_cache = ConversionCache()
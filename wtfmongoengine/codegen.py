@@ -0,0 +1,238 @@
+from wtforms.compat import string_types
+from wtforms.fields import Field
+from wtforms.validators import (
+    DataRequired, Length, NumberRange, Regexp, Required, StopValidation)
+
+
+def _same_method(field_class, name):
+    """
+    Return ``True`` when ``field_class`` does not override ``Field.<name>``.
+    """
+    return getattr(field_class, name).__func__ is \
+        getattr(Field, name).__func__
+
+
+def _inlinable(field):
+    """
+    Return ``True`` when the validation of ``field`` can be generated.
+    """
+    field_class = type(field)
+    return (
+        _same_method(field_class, 'validate') and
+        _same_method(field_class, 'pre_validate') and
+        _same_method(field_class, 'post_validate')
+    )
+
+
+class _Generator(object):
+    """
+    Generate the source of the validation function of a form.
+    """
+    def __init__(self):
+        self.lines = []
+        self.namespace = {
+            'StopValidation': StopValidation,
+            'string_types': string_types,
+        }
+
+    def constant(self, value):
+        """
+        Add ``value`` to the namespace and return its name.
+        """
+        name = '_c{0}'.format(len(self.namespace))
+        self.namespace[name] = value
+        return name
+
+    def emit(self, indent, line):
+        self.lines.append('    ' * indent + line)
+
+    def field(self, name, field, extra):
+        """
+        Emit the validation of the bound ``field``.
+        """
+        key = self.constant(name)
+
+        if extra or not _inlinable(field):
+            self.emit(1, 'if not fields[{0}].validate(form, {1}):'.format(
+                key, self.constant(extra)))
+            self.emit(2, 'success = False')
+            return
+
+        self.emit(1, 'field = fields[{0}]'.format(key))
+
+        # the bound field shares the validator list of the unbound field,
+        # when it is replaced (e.g. by the instrumentation) the field is
+        # validated the generic way
+        if field.validators:
+            check = 'field.validators is {0}'.format(
+                self.constant(field.validators))
+        else:
+            check = 'not field.validators'
+
+        self.emit(1, 'if {0}:'.format(check))
+        self.emit(2, 'errors = field.errors = list(field.process_errors)')
+        self.emit(2, 'data = field.data')
+
+        indent = 2
+        for validator in field.validators:
+            indent = self.validator(indent, validator)
+
+        if self.lines[-1].endswith(':'):
+            # the last validator opened a block for the next one
+            self.emit(indent, 'pass')
+
+        self.emit(2, 'if errors:')
+        self.emit(3, 'success = False')
+        self.emit(1, 'elif not field.validate(form):')
+        self.emit(2, 'success = False')
+
+    def validator(self, indent, validator):
+        """
+        Emit ``validator`` and return the indent for the next validator.
+        """
+        validator_class = type(validator)
+
+        if validator_class in (Required, DataRequired):
+            self.emit(indent, (
+                'if not data or isinstance(data, string_types) '
+                'and not data.strip():'))
+            if validator.message is None:
+                message = "field.gettext('This field is required.')"
+            else:
+                message = self.constant(validator.message)
+            self.emit(indent + 1, 'message = {0}'.format(message))
+            self.emit(indent + 1, 'del errors[:]')
+            self.emit(indent + 1, 'if message:')
+            self.emit(indent + 2, 'errors.append(message)')
+            self.emit(indent, 'else:')
+            return indent + 1
+
+        elif validator_class is Length:
+            self.emit(indent, 'length = data and len(data) or 0')
+            condition = 'length < {0}'.format(self.constant(validator.min))
+            if validator.max != -1:
+                condition += ' or length > {0}'.format(
+                    self.constant(validator.max))
+            self.emit(indent, 'if {0}:'.format(condition))
+            self.emit(indent + 1, 'errors.append({0} % {1})'.format(
+                self.length_message(validator),
+                self.constant(dict(min=validator.min, max=validator.max)),
+            ))
+            return indent
+
+        elif validator_class is NumberRange:
+            conditions = ['data is None']
+            if validator.min is not None:
+                conditions.append('data < {0}'.format(
+                    self.constant(validator.min)))
+            if validator.max is not None:
+                conditions.append('data > {0}'.format(
+                    self.constant(validator.max)))
+            self.emit(indent, 'if {0}:'.format(' or '.join(conditions)))
+            self.emit(indent + 1, 'errors.append({0} % {1})'.format(
+                self.number_range_message(validator),
+                self.constant(dict(min=validator.min, max=validator.max)),
+            ))
+            return indent
+
+        elif validator_class is Regexp:
+            self.emit(indent, "if not {0}(data or ''):".format(
+                self.constant(validator.regex.match)))
+            if validator.message is None:
+                message = "field.gettext('Invalid input.')"
+            else:
+                message = self.constant(validator.message)
+            self.emit(indent + 1, 'errors.append({0})'.format(message))
+            return indent
+
+        # any other validator is called
+        self.emit(indent, 'stop = False')
+        self.emit(indent, 'try:')
+        self.emit(indent + 1, '{0}(form, field)'.format(
+            self.constant(validator)))
+        self.emit(indent, 'except StopValidation as e:')
+        self.emit(indent + 1, 'if e.args and e.args[0]:')
+        self.emit(indent + 2, 'errors.append(e.args[0])')
+        self.emit(indent + 1, 'stop = True')
+        self.emit(indent, 'except ValueError as e:')
+        self.emit(indent + 1, 'errors.append(e.args[0])')
+        self.emit(indent, 'if not stop:')
+        return indent + 1
+
+    def length_message(self, validator):
+        if validator.message is not None:
+            return self.constant(validator.message)
+        elif validator.max == -1:
+            return (
+                "field.ngettext('Field must be at least %(min)d character "
+                "long.', 'Field must be at least %(min)d characters long.', "
+                "{0})".format(self.constant(validator.min))
+            )
+        elif validator.min == -1:
+            return (
+                "field.ngettext('Field cannot be longer than %(max)d "
+                "character.', 'Field cannot be longer than %(max)d "
+                "characters.', {0})".format(self.constant(validator.max))
+            )
+        return (
+            "field.gettext('Field must be between %(min)d and %(max)d "
+            "characters long.')"
+        )
+
+    def number_range_message(self, validator):
+        if validator.message is not None:
+            return self.constant(validator.message)
+        elif validator.max is None:
+            return "field.gettext('Number must be at least %(min)s.')"
+        elif validator.min is None:
+            return "field.gettext('Number must be at most %(max)s.')"
+        return "field.gettext('Number must be between %(min)s and %(max)s.')"
+
+    def source(self):
+        return '\n'.join(
+            ['def validate(form):',
+             '    form._errors = None',
+             '    success = True',
+             '    fields = form._fields'] +
+            self.lines +
+            ['    return success', '']
+        )
+
+
+def generate_validate(form):
+    """
+    Generate a validation function for the class of ``form``.
+
+    The function validates a form like :py:meth:`!wtforms.form.Form.validate`,
+    with the same errors and result. The ``Required``, ``Length``,
+    ``NumberRange`` and ``Regexp`` validators are inlined, other validators
+    are called directly. Fields which override the validation (e.g. a
+    ``FieldList``) or have inline ``validate_<name>`` validators are
+    validated by calling their ``validate`` method.
+
+    :param form:
+        The form instance to generate the function from. The function can be
+        used for every instance of the same class.
+
+    :return:
+        A function, taking the form as only argument and returning ``True``
+        when there were no errors. Its ``field_names`` attribute holds the
+        names of the fields it validates, in order.
+
+    """
+    generator = _Generator()
+
+    for name, field in form._fields.items():
+        inline = getattr(type(form), 'validate_%s' % name, None)
+        extra = [inline] if inline is not None else []
+        generator.field(name, field, extra)
+
+    source = generator.source()
+    code = compile(
+        source, '<validate {0}>'.format(type(form).__name__), 'exec')
+    exec code in generator.namespace
+
+    validate = generator.namespace['validate']
+    validate.source = source
+    validate.field_names = tuple(form._fields)
+    return validate
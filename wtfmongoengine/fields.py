@@ -0,0 +1,875 @@
+import hashlib
+import itertools
+from bisect import bisect_right
+from operator import itemgetter
+
+from bson import DBRef
+from mongoengine.connection import DEFAULT_CONNECTION_NAME
+from mongoengine.errors import ValidationError as MongoValidationError
+from mongoengine.fields import GridFSProxy
+from wtforms import widgets
+from wtforms.compat import text_type
+from wtforms.fields import (
+    Field, FieldList, FileField, FormField, SelectField, SelectFieldBase)
+from wtforms.fields.core import _unset_value
+from wtforms.validators import ValidationError
+
+from wtfmongoengine import geo
+
+
+def reference_pk(value):
+    """
+    Return the primary key of the referenced ``value``.
+
+    :param value:
+        A document, a ``DBRef``, a primary key or ``None``.
+
+    :return:
+        The primary key or ``None``.
+
+    """
+    if value is None:
+        return None
+    elif hasattr(value, 'pk'):
+        return value.pk
+    elif isinstance(value, DBRef):
+        return value.id
+    return value
+
+
+class ReferenceSelectField(SelectFieldBase):
+    """
+    Select field for choosing a document of ``document_class``.
+
+    The choices are loaded lazily, the first time they are iterated. Only
+    ``_id`` and ``label_field`` are fetched from the collection, in batches of
+    ``batch_size`` documents and capped at ``max_choices``.
+
+    The ``data`` property holds the selected document. A submitted value is
+    resolved with a single ``_id`` lookup, not by scanning the choices.
+
+    :param document_class:
+        The referenced Mongoengine document class.
+
+    :param label_field:
+        The name of the document field used as choice label (optional). When
+        not given, the primary key is used as label.
+
+    :param batch_size:
+        The number of documents to fetch per round-trip.
+
+    :param max_choices:
+        The maximum number of choices to load.
+
+    :param allow_blank:
+        Add a blank choice, which will set ``data`` to ``None``.
+
+    :param blank_text:
+        The label of the blank choice.
+
+    """
+    widget = widgets.Select()
+
+    def __init__(self, label=None, validators=None, document_class=None,
+                 label_field=None, batch_size=100, max_choices=1000,
+                 allow_blank=False, blank_text='', **kwargs):
+        super(ReferenceSelectField, self).__init__(label, validators, **kwargs)
+        self.document_class = document_class
+        self.label_field = label_field
+        self.batch_size = batch_size
+        self.max_choices = max_choices
+        self.allow_blank = allow_blank
+        self.blank_text = blank_text
+        self._choices = None
+        self._formdata = None
+        self._submitted = False
+
+    def _get_data(self):
+        if self._formdata is not None:
+            self._set_data(self.lookup(self._formdata))
+        return self._data
+
+    def _set_data(self, data):
+        self._data = data
+        self._formdata = None
+
+    data = property(_get_data, _set_data)
+
+    @property
+    def choices(self):
+        """
+        Return the list of ``(pk, label)`` choices.
+
+        :return:
+            A ``list`` of ``(pk, label)`` tuples, ``pk`` being text.
+
+        """
+        if self._choices is None:
+            self._choices = list(self.iter_query())
+        return self._choices
+
+    def iter_query(self):
+        """
+        Query the referenced collection for the choices.
+
+        :return:
+            An iterator of ``(pk, label)`` tuples.
+
+        """
+        projection = {'_id': True}
+        label_key = None
+
+        if self.label_field:
+            label_key = self.document_class._fields[self.label_field].db_field
+            projection[label_key] = True
+
+        cursor = self.document_class._get_collection().find(
+            {}, projection).batch_size(self.batch_size).limit(self.max_choices)
+
+        for son in cursor:
+            pk = unicode(son['_id'])
+            if label_key is None:
+                yield pk, pk
+            else:
+                yield pk, unicode(son.get(label_key, pk))
+
+    def lookup(self, pk):
+        """
+        Return the document for ``pk``.
+
+        :param pk:
+            The submitted primary key.
+
+        :return:
+            The document (with only the primary key loaded) or ``None`` when
+            ``pk`` is invalid or does not exist.
+
+        """
+        try:
+            return self.document_class.objects(pk=pk).only('pk').first()
+        except MongoValidationError:
+            return None
+
+    def iter_choices(self):
+        data = self.data
+
+        if self.allow_blank:
+            yield ('__None', self.blank_text, data is None)
+
+        selected = None
+        if data is not None:
+            selected = unicode(reference_pk(data))
+
+        for pk, label in self.choices:
+            yield (pk, label, pk == selected)
+
+    def process_data(self, value):
+        self._submitted = False
+        self.data = value
+
+    def process_formdata(self, valuelist):
+        if valuelist:
+            if self.allow_blank and valuelist[0] in ('', '__None'):
+                self.data = None
+            else:
+                self._data = None
+                self._formdata = valuelist[0]
+                self._submitted = True
+
+    def pre_validate(self, form):
+        # a submitted primary key which was not found is not a blank value
+        if self.data is None and (self._submitted or not self.allow_blank):
+            raise ValidationError(self.gettext('Not a valid choice'))
+
+
+class ChoiceIndex(object):
+    """
+    Index of the valid values of a choice field.
+
+    The index is built once, when the field is converted, and shared by all
+    the bound instances of the field.
+
+    :param choices:
+        An iterable of ``(value, label)`` pairs or of values. For plain
+        values, the value is also used as label.
+
+    """
+    def __init__(self, choices):
+        pairs = []
+        for choice in choices:
+            if isinstance(choice, (list, tuple)) and len(choice) == 2:
+                pairs.append(tuple(choice))
+            else:
+                pairs.append((choice, choice))
+
+        self.choices = tuple(pairs)
+
+        # the submitted text of each value, the first value wins
+        self.keys = {}
+        for value, label in reversed(self.choices):
+            self.keys[text_type(value)] = value
+
+        try:
+            self.values = frozenset(value for value, label in self.choices)
+        except TypeError:
+            # unhashable values, fall back to scanning the choices
+            self.values = None
+
+    def __contains__(self, value):
+        if self.values is not None:
+            try:
+                return value in self.values
+            except TypeError:
+                return False
+
+        return any(value == v for v, label in self.choices)
+
+    def lookup(self, key):
+        """
+        Return the value for the submitted ``key``.
+
+        :param key:
+            The submitted text.
+
+        :return:
+            The value or ``key`` itself when it is not a valid choice.
+
+        """
+        return self.keys.get(key, key)
+
+
+class IndexedSelectField(SelectField):
+    """
+    ``SelectField`` validating against a :py:class:`.ChoiceIndex`.
+
+    Unlike :py:class:`!wtforms.fields.SelectField`, a submitted value is
+    checked with a single lookup instead of scanning the choices, and is
+    coerced to the (typed) value of the choice.
+
+    :param index:
+        The :py:class:`.ChoiceIndex` of the choices.
+
+    """
+    def __init__(self, label=None, validators=None, index=None, **kwargs):
+        kwargs['choices'] = index.choices
+        super(IndexedSelectField, self).__init__(label, validators, **kwargs)
+        self.index = index
+
+    def iter_choices(self):
+        for value, label in self.choices:
+            yield (value, label, value == self.data)
+
+    def process_data(self, value):
+        self.data = value
+
+    def process_formdata(self, valuelist):
+        if valuelist:
+            self.data = self.index.lookup(valuelist[0])
+
+    def pre_validate(self, form):
+        if self.data not in self.index:
+            raise ValueError(self.gettext('Not a valid choice'))
+
+
+class BytesField(Field):
+    """
+    Field for binary data, given as bytes or as a file-like object.
+
+    The size is checked while processing the form data: a file-like object
+    is read at most ``max_bytes + 1`` bytes at once, so oversized input is
+    rejected without reading it as a whole. Bytes are passed on as they
+    are, without copying. A ``bytearray`` or ``memoryview`` is copied once
+    into bytes, as Mongoengine only stores bytes. An empty value (e.g. of
+    an empty file input) sets ``data`` to ``None``.
+
+    :param max_bytes:
+        The maximum number of bytes (optional).
+
+    """
+    widget = widgets.FileInput()
+
+    def __init__(self, label=None, validators=None, max_bytes=None,
+                 **kwargs):
+        super(BytesField, self).__init__(label, validators, **kwargs)
+        self.max_bytes = max_bytes
+
+    def _value(self):
+        # never render the data back into the page
+        return u''
+
+    def process_formdata(self, valuelist):
+        if valuelist:
+            self.data = None
+            if valuelist[0]:
+                self.data = self.read(valuelist[0])
+
+    def read(self, value):
+        """
+        Return ``value`` as bytes.
+
+        :param value:
+            Bytes, a ``bytearray`` / ``memoryview`` or a file-like object.
+
+        :return:
+            A ``bytes`` object, ``value`` itself when it is bytes.
+
+        :raises ValueError:
+            When ``value`` is larger than :py:attr:`max_bytes` or is not
+            binary.
+
+        """
+        if isinstance(value, bytes):
+            self.check_size(len(value))
+            return value
+        elif isinstance(value, memoryview):
+            self.check_size(len(value) * value.itemsize)
+            return value.tobytes()
+        elif isinstance(value, bytearray):
+            self.check_size(len(value))
+            return bytes(value)
+        elif not hasattr(value, 'read'):
+            raise ValueError(self.gettext('Not valid binary data.'))
+
+        chunks = []
+        size = 0
+
+        while True:
+            if self.max_bytes is None:
+                chunk = value.read()
+            else:
+                chunk = value.read(self.max_bytes - size + 1)
+
+            if not chunk:
+                break
+
+            size += len(chunk)
+            self.check_size(size)
+            chunks.append(chunk)
+
+        # a single read is passed on as is
+        if len(chunks) == 1:
+            return chunks[0]
+        return b''.join(chunks)
+
+    def check_size(self, size):
+        if self.max_bytes is not None and size > self.max_bytes:
+            raise ValueError(self.gettext(
+                'Data is too large, at most %(max)d bytes are allowed.'
+            ) % {'max': self.max_bytes})
+
+
+class MappingField(Field):
+    """
+    Field for a mapping of (text) keys to values.
+
+    The entries are submitted as ``<name>-<key>`` (e.g. ``attrs-color``).
+    Each value is processed and validated by the same bound instance of
+    ``unbound_field``, which is reused for every key, so the number of
+    field objects does not grow with the number of keys.
+
+    The keys are checked before any value is processed: form data with more
+    than ``max_entries`` keys, a key longer than ``max_key_length`` or a key
+    which can't be stored in MongoDB is rejected as a whole.
+
+    ``errors`` is a ``list`` of errors of the mapping itself, or a ``dict``
+    mapping the keys to the errors of their values.
+
+    :param unbound_field:
+        The unbound field for the values (optional). When not given, the
+        submitted values are used as they are.
+
+    :param max_entries:
+        The maximum number of keys.
+
+    :param max_key_length:
+        The maximum length of a key.
+
+    """
+    def __init__(self, unbound_field=None, label=None, validators=None,
+                 max_entries=100, max_key_length=100, default=dict,
+                 **kwargs):
+        super(MappingField, self).__init__(
+            label, validators, default=default, **kwargs)
+        self.unbound_field = unbound_field
+        self.max_entries = max_entries
+        self.max_key_length = max_key_length
+        self._prefix = kwargs.get('_prefix', '')
+        self._value_field = None
+        self._raw_entries = {}
+
+    @property
+    def value_field(self):
+        """
+        Return the bound field used for all the values (or ``None``).
+        """
+        if self._value_field is None and self.unbound_field is not None:
+            self._value_field = self.unbound_field.bind(
+                form=None,
+                name='{0}-value'.format(self.short_name),
+                prefix=self._prefix,
+            )
+        return self._value_field
+
+    def process(self, formdata, data=_unset_value):
+        self.process_errors = []
+        self._raw_entries = {}
+
+        if data is _unset_value:
+            try:
+                data = self.default()
+            except TypeError:
+                data = self.default
+
+        self.object_data = data
+        self.data = dict(data or {})
+
+        if not formdata:
+            return
+
+        prefix = self.name + '-'
+        raw_entries = {}
+
+        for name in formdata:
+            if not name.startswith(prefix):
+                continue
+
+            key = name[len(prefix):]
+            error = self.check_key(key, len(raw_entries))
+            if error is not None:
+                self.process_errors.append(error)
+                self.data = {}
+                return
+
+            raw_entries[key] = formdata.getlist(name)
+
+        self._raw_entries = raw_entries
+        self.data = {}
+
+        for key, valuelist in raw_entries.items():
+            self.data[key] = self.process_entry(valuelist)
+
+    def check_key(self, key, count):
+        """
+        Return the error for ``key``, given ``count`` keys were accepted.
+
+        :return:
+            The error message or ``None`` when the key is accepted.
+
+        """
+        if count >= self.max_entries:
+            return self.gettext(
+                'Too many keys, at most %(max)d are allowed.'
+            ) % {'max': self.max_entries}
+        elif len(key) > self.max_key_length:
+            return self.gettext(
+                'Key is too long, at most %(max)d characters are allowed.'
+            ) % {'max': self.max_key_length}
+        elif not key or '.' in key or key.startswith('$'):
+            return self.gettext(
+                'Keys can not be empty, contain "." or start with "$".')
+        return None
+
+    def process_entry(self, valuelist):
+        """
+        Process the submitted ``valuelist`` of one key.
+
+        :return:
+            The processed value.
+
+        """
+        field = self.value_field
+
+        if field is None:
+            return valuelist[0] if valuelist else None
+
+        field.process(_EntryData(field.name, valuelist))
+        return field.data
+
+    def validate(self, form, extra_validators=tuple()):
+        self.errors = list(self.process_errors)
+        if self.errors:
+            return False
+
+        chain = itertools.chain(self.validators, extra_validators)
+        self._run_validation_chain(form, chain)
+        if self.errors:
+            return False
+
+        field = self.value_field
+        if field is None:
+            return True
+
+        entry_errors = {}
+        for key, valuelist in self._raw_entries.items():
+            field.process(_EntryData(field.name, valuelist))
+            if not field.validate(form):
+                entry_errors[key] = list(field.errors)
+
+        if entry_errors:
+            self.errors = entry_errors
+            return False
+
+        return True
+
+
+class _EntryData(dict):
+    """
+    Form data holding the values of a single entry.
+    """
+    def __init__(self, name, valuelist):
+        super(_EntryData, self).__init__({name: valuelist})
+
+    def getlist(self, key):
+        return self[key]
+
+
+class GeoPointFormField(Field):
+    """
+    Field for a ``latitude, longitude`` coordinate pair.
+
+    The submitted text (e.g. ``52.37, 4.89``) is parsed into a ``[latitude,
+    longitude]`` list of floats and range-checked. For validating many
+    points at once, see :py:func:`wtfmongoengine.geo.validate_points`.
+
+    """
+    widget = widgets.TextInput()
+
+    def _value(self):
+        if self.raw_data:
+            return self.raw_data[0]
+        elif self.data:
+            return u'{0}, {1}'.format(*self.data)
+        return u''
+
+    def process_formdata(self, valuelist):
+        if not valuelist:
+            return
+
+        self.data = None
+        if not valuelist[0].strip():
+            return
+
+        try:
+            latitude, longitude = [float(v) for v in valuelist[0].split(',')]
+        except ValueError:
+            raise ValueError(self.gettext('Not a valid coordinate pair.'))
+
+        self.data = self.point(latitude, longitude)
+
+    def point(self, latitude, longitude):
+        """
+        Return the range-checked ``[latitude, longitude]`` list.
+
+        :raises ValueError:
+            When a coordinate is out of range.
+
+        """
+        if not geo.MIN_LATITUDE <= latitude <= geo.MAX_LATITUDE:
+            raise ValueError(self.gettext(
+                'Latitude must be between -90 and 90.'))
+        elif not geo.MIN_LONGITUDE <= longitude <= geo.MAX_LONGITUDE:
+            raise ValueError(self.gettext(
+                'Longitude must be between -180 and 180.'))
+
+        return [latitude, longitude]
+
+
+class BoundedFieldList(FieldList):
+    """
+    ``FieldList`` which rejects form data with too many entries.
+
+    Unlike :py:class:`!wtforms.fields.FieldList`, which silently drops the
+    entries beyond ``max_entries``, submitting more than ``max_entries``
+    entries results in a validation error. The entries are counted before any
+    entry field is created, so oversized input is rejected without building
+    one field per entry.
+
+    """
+    def process(self, formdata, data=_unset_value):
+        self.process_errors = []
+
+        if formdata and self.max_entries:
+            indices = set()
+
+            for index in self._extract_indices(self.name, formdata):
+                indices.add(index)
+                if len(indices) > self.max_entries:
+                    self.entries = []
+                    self.object_data = data
+                    self.process_errors.append(self.gettext(
+                        'Too many entries, at most %(max)d are allowed.'
+                    ) % {'max': self.max_entries})
+                    return
+
+        super(BoundedFieldList, self).process(formdata, data)
+
+    def validate(self, form, extra_validators=tuple()):
+        if self.process_errors:
+            self.errors = list(self.process_errors)
+            return False
+
+        return super(BoundedFieldList, self).validate(form, extra_validators)
+
+
+class SortedFieldList(BoundedFieldList):
+    """
+    ``BoundedFieldList`` of which ``data`` is kept sorted.
+
+    Each entry is inserted at its sorted position (using :py:mod:`bisect`)
+    when it is added, so the list never has to be re-sorted. An object is
+    populated in the sorted order as well.
+
+    :param ordering:
+        The key to sort on, in case the entries are mappings (optional).
+
+    :param reverse:
+        Sort in descending order.
+
+    """
+    def __init__(self, unbound_field, label=None, validators=None,
+                 ordering=None, reverse=False, **kwargs):
+        super(SortedFieldList, self).__init__(
+            unbound_field, label, validators, **kwargs)
+        self.ordering = ordering
+        self.reverse = reverse
+        self._sort_keys = []
+        self._sorted_entries = []
+
+    def process(self, formdata, data=_unset_value):
+        self._sort_keys = []
+        self._sorted_entries = []
+        super(SortedFieldList, self).process(formdata, data)
+
+    def _sort_key(self, value):
+        if self.ordering is None:
+            return value
+        return itemgetter(self.ordering)(value)
+
+    def _add_entry(self, *args, **kwargs):
+        field = super(SortedFieldList, self)._add_entry(*args, **kwargs)
+        key = self._sort_key(field.data)
+        index = bisect_right(self._sort_keys, key)
+        self._sort_keys.insert(index, key)
+        self._sorted_entries.insert(index, field)
+        return field
+
+    def pop_entry(self):
+        entry = super(SortedFieldList, self).pop_entry()
+        index = next(
+            i for i, e in enumerate(self._sorted_entries) if e is entry)
+        del self._sort_keys[index]
+        del self._sorted_entries[index]
+        return entry
+
+    def sorted_entries(self):
+        """
+        Return the entries in sorted order.
+        """
+        if self.reverse:
+            return self._sorted_entries[::-1]
+        return list(self._sorted_entries)
+
+    @property
+    def data(self):
+        return [entry.data for entry in self.sorted_entries()]
+
+    def populate_obj(self, obj, name):
+        # ``FieldList.populate_obj`` populates the entries in the order
+        # they were submitted
+        entries = self.entries
+        self.entries = self.sorted_entries()
+
+        try:
+            super(SortedFieldList, self).populate_obj(obj, name)
+        finally:
+            self.entries = entries
+
+
+class EmbeddedFormField(FormField):
+    """
+    ``FormField`` for an embedded document.
+
+    When populating an object which has no embedded document yet, a new
+    instance of ``document_class`` is created to populate.
+
+    Unlike a ``FormField``, the field accepts ``validators`` (e.g. a
+    :py:class:`.Unique` validator), which run when the enclosed form is
+    valid. ``errors`` is the ``dict`` of errors of the enclosed form, or
+    else the ``list`` of errors of these validators.
+
+    :param document_class:
+        The Mongoengine embedded document class.
+
+    """
+    def __init__(self, form_class, label=None, validators=None,
+                 document_class=None, **kwargs):
+        super(EmbeddedFormField, self).__init__(
+            form_class, label, None, **kwargs)
+        self.validators = validators or []
+        self.document_class = document_class
+        self._errors = []
+
+    @property
+    def errors(self):
+        return self.form.errors or self._errors
+
+    def validate(self, form, extra_validators=tuple()):
+        self._errors = []
+        if not super(EmbeddedFormField, self).validate(
+                form, extra_validators):
+            return False
+
+        self._run_validation_chain(form, self.validators)
+        return not self._errors
+
+    def to_document(self):
+        """
+        Return a new embedded document populated from the enclosed form.
+
+        :return:
+            Instance of ``document_class``, or ``None`` when the enclosed
+            form has no data.
+
+        """
+        if all(v is None or v == '' for v in self.form.data.values()):
+            return None
+
+        document = self.document_class()
+        self.form.populate_obj(document)
+        return document
+
+    def populate_obj(self, obj, name):
+        if getattr(obj, name, None) is None and self._obj is None:
+            setattr(obj, name, self.document_class())
+
+        super(EmbeddedFormField, self).populate_obj(obj, name)
+
+
+class GridFSFileField(FileField):
+    """
+    File upload field which streams the upload into GridFS.
+
+    The upload is stored while the form is validated, in chunks of
+    ``chunk_size`` bytes, so the file is never held in memory as a whole.
+    An upload larger than ``max_size`` is aborted as soon as the limit is
+    exceeded, and the part which was already written is deleted.
+
+    After validation, ``data`` holds the proxy of the stored file. When the
+    form turns out to be invalid, :py:meth:`discard` deletes the file again
+    (which :py:meth:`.DocumentForm.validate` does).
+
+    :param proxy_class:
+        The GridFS proxy class of the Mongoengine field.
+
+    :param db_alias:
+        The alias of the database to store the file in.
+
+    :param collection_name:
+        The name of the GridFS collection.
+
+    :param chunk_size:
+        The number of bytes to read (and write) at a time.
+
+    :param max_size:
+        The maximum size of the file in bytes (optional).
+
+    :param checksum:
+        The name of a :py:mod:`hashlib` algorithm (e.g. ``'sha256'``). When
+        given, the hex digest of the file is computed while streaming and
+        set as :py:attr:`digest` (optional).
+
+    """
+    def __init__(self, label=None, validators=None, proxy_class=GridFSProxy,
+                 db_alias=DEFAULT_CONNECTION_NAME, collection_name='fs',
+                 chunk_size=256 * 1024, max_size=None, checksum=None,
+                 **kwargs):
+        super(GridFSFileField, self).__init__(label, validators, **kwargs)
+        self.proxy_class = proxy_class
+        self.db_alias = db_alias
+        self.collection_name = collection_name
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.checksum = checksum
+        self.size = None
+        self.digest = None
+        self._upload = None
+
+    def process_formdata(self, valuelist):
+        # an empty value means no file was uploaded, keep the current file
+        if valuelist and hasattr(valuelist[0], 'read'):
+            self._upload = valuelist[0]
+
+    def pre_validate(self, form):
+        if self._upload is None:
+            return
+
+        upload, self._upload = self._upload, None
+        self.data = self.store(upload)
+
+    def store(self, upload):
+        """
+        Stream ``upload`` into GridFS.
+
+        :param upload:
+            A file-like object, optionally with ``filename`` and
+            ``content_type`` attributes.
+
+        :return:
+            Instance of :py:attr:`proxy_class` for the stored file.
+
+        :raises ValidationError:
+            When the file is larger than :py:attr:`max_size`.
+
+        """
+        proxy = self.proxy_class(
+            db_alias=self.db_alias, collection_name=self.collection_name)
+        hasher = hashlib.new(self.checksum) if self.checksum else None
+        size = 0
+
+        kwargs = {}
+        for name in ('filename', 'content_type'):
+            if getattr(upload, name, None):
+                kwargs[name] = getattr(upload, name)
+
+        proxy.new_file(**kwargs)
+
+        try:
+            while True:
+                read_size = self.chunk_size
+                if self.max_size is not None:
+                    # never read more than one byte beyond the limit
+                    read_size = min(read_size, self.max_size - size + 1)
+
+                chunk = upload.read(read_size)
+                if not chunk:
+                    break
+
+                size += len(chunk)
+                if self.max_size is not None and size > self.max_size:
+                    raise ValidationError(self.gettext(
+                        'File is too large, at most %(max)d bytes are allowed.'
+                    ) % {'max': self.max_size})
+
+                if hasher is not None:
+                    hasher.update(chunk)
+                proxy.write(chunk)
+        except Exception:
+            proxy.close()
+            proxy.delete()
+            raise
+
+        proxy.close()
+        self.size = size
+        if hasher is not None:
+            self.digest = hasher.hexdigest()
+        return proxy
+
+    def discard(self):
+        """
+        Delete the file stored by this field (if any).
+        """
+        if self.size is not None and self.data:
+            self.data.delete()
+            self.data = self.object_data
+            self.size = None
+            self.digest = None
@@ -1,6 +1,37 @@
+import copy_reg
+import datetime
+import decimal
+import multiprocessing
+import pickle
+import sys
+import threading
+from multiprocessing.pool import ThreadPool
+from timeit import default_timer
+
+import wtforms
+from mongoengine.document import Document
 from wtforms import validators, fields
+from wtforms.fields.core import UnboundField, _unset_value
 from wtforms.form import Form, FormMeta
 
+from wtfmongoengine.cache import conversion_cache, schema_fingerprint
+from wtfmongoengine.codegen import generate_validate
+from wtfmongoengine.fields import (
+    BoundedFieldList, BytesField, ChoiceIndex, EmbeddedFormField,
+    GeoPointFormField, GridFSFileField, IndexedSelectField, MappingField,
+    ReferenceSelectField, SortedFieldList, reference_pk)
+from wtfmongoengine.instrumentation import instrumentation
+from wtfmongoengine.validators import (
+    Unique, compile_regex, shared_validator, validator_from_spec,
+    validator_spec)
+
+
+_materialize_lock = threading.RLock()
+_lazy_metaclasses = {}
+
+_form_classes = {}
+_form_classes_lock = threading.Lock()
+
 
 class DocumentFieldConverter(object):
     """
@@ -18,18 +49,161 @@ class DocumentFieldConverter(object):
     .. note::
         When both using ``fields`` and ``exclude``, ``fields`` will be used.
 
+    .. note::
+        Converted fields are stored in :py:attr:`cache`, shared by all
+        converters within the process. Set it to ``None`` (on the class or
+        on a subclass) to disable caching.
+
+    .. note::
+        Set :py:attr:`schema_cache` to a
+        :py:class:`~wtfmongoengine.cache.SchemaCache` to share the converted
+        fields between processes, e.g. to speed up the start of workers::
+
+            DocumentFieldConverter.schema_cache = SchemaCache('/var/cache/app')
+
+    Each Mongoengine field class is converted by a handler. Handlers are
+    either registered with :py:meth:`register` or found by name, as a
+    ``from_<lowercase field class name>`` method on the converter. The
+    handler is resolved through the MRO of the field class, so subclasses
+    of e.g. ``StringField`` are converted like a ``StringField``.
+
     """
+    cache = conversion_cache
+
+    # on-disk cache of the serialized fields, shared between processes
+    schema_cache = None
+
+    # the maximum number of entries accepted for a ``ListField``
+    max_list_entries = 1000
+
+    # the maximum number of keys and the maximum key length accepted for a
+    # ``DictField`` or ``MapField``
+    max_dict_entries = 100
+    max_dict_key_length = 100
+
+    # the maximum size of an uploaded file in bytes, and the hashlib
+    # algorithm of the checksum computed while storing it (if any)
+    max_file_size = 16 * 1024 * 1024
+    file_checksum = None
+
+    # the maximum number of times an embedded document is nested within
+    # itself (for self-referencing or mutually recursive documents)
+    max_embedded_depth = 3
+
+    # mapping of Mongoengine field class => handler, per converter class
+    _field_handlers = {}
+
+    # mapping of (converter class, field class) => resolved handler
+    _resolved_handlers = {}
+
+    # mapping of (converter class, embedded document class) => form class
+    _embedded_forms = {}
+
+    # state of the embedded documents being converted, see
+    # ``embedded_form_class``
+    _embedded_stack = ()
+    _embedded_memo = None
+    _embedded_truncated = False
 
     def __init__(self, document_class, fields=None, exclude=None):
         self.document_class = document_class
         self.only_fields = fields
         self.exclude_fields = exclude
 
+    @classmethod
+    def register(cls, field_cls, handler):
+        """
+        Register ``handler`` for converting ``field_cls`` (and subclasses).
+
+        :param field_cls:
+            The Mongoengine field class.
+
+        :param handler:
+            A callable, called as ``handler(converter, document_field,
+            **kwargs)`` and returning the WTForms field (or ``None``).
+            Instead of a callable, the name of a converter method can be
+            given.
+
+        """
+        if '_field_handlers' not in cls.__dict__:
+            cls._field_handlers = {}
+
+        cls._field_handlers[field_cls] = handler
+        DocumentFieldConverter._resolved_handlers.clear()
+        DocumentFieldConverter._embedded_forms.clear()
+
+        if cls.cache is not None:
+            cls.cache.invalidate()
+
+    @classmethod
+    def resolve_handler(cls, field_cls):
+        """
+        Return the handler for ``field_cls``.
+
+        The result is cached per converter and field class.
+
+        :param field_cls:
+            The Mongoengine field class.
+
+        :return:
+            A callable, the name of a converter method or ``None`` when
+            there is no handler for ``field_cls``.
+
+        """
+        key = (cls, field_cls)
+
+        try:
+            return cls._resolved_handlers[key]
+        except KeyError:
+            pass
+
+        handler = None
+
+        for field_base in field_cls.__mro__:
+            for converter_base in cls.__mro__:
+                registry = converter_base.__dict__.get('_field_handlers', {})
+                if field_base in registry:
+                    handler = registry[field_base]
+                    break
+
+            if handler is not None:
+                break
+
+            method_name = 'from_' + field_base.__name__.lower()
+            if hasattr(cls, method_name):
+                handler = method_name
+                break
+
+        cls._resolved_handlers[key] = handler
+        return handler
+
+    @property
+    def cache_key(self):
+        """
+        Return the key under which the converted fields are cached.
+
+        :return:
+            A ``tuple`` of the converter class, the document class and the
+            (normalized) field subset.
+
+        """
+        if self.only_fields:
+            subset = ('fields', frozenset(self.only_fields))
+        elif self.exclude_fields:
+            subset = ('exclude', frozenset(self.exclude_fields))
+        else:
+            subset = None
+
+        return (type(self), self.document_class, subset)
+
     @property
     def fields(self):
         """
         Return a ``dict`` containing the WTForms fields.
 
+        The result is looked up in :py:attr:`cache` first, so the document
+        is only converted once per field subset.
+
         :return:
             A ``dict`` with the following as key / value:
 
@@ -40,18 +214,251 @@ class DocumentFieldConverter(object):
                 An object representing the WTForms field.
 
         """
-        field_dict = {}
+        if self.cache is None:
+            return self.load_fields()
+
+        key = self.cache_key
+        field_dict = self.cache.get(key)
+
+        if field_dict is None:
+            field_dict = self.load_fields()
+            self.cache.set(key, field_dict)
+
+        return dict(field_dict)
+
+    @property
+    def schema_key(self):
+        """
+        Return the key under which the schema is stored in
+        :py:attr:`schema_cache`.
+
+        :return:
+            A ``str`` containing the converter class, the document class and
+            the field subset.
+
+        """
+        subset = self.cache_key[2]
+        if subset is not None:
+            subset = (subset[0], tuple(sorted(subset[1])))
+
+        return '{0}.{1}:{2}.{3}:{4!r}'.format(
+            type(self).__module__,
+            type(self).__name__,
+            self.document_class.__module__,
+            self.document_class.__name__,
+            subset,
+        )
+
+    def schema_fingerprint(self):
+        """
+        Return the fingerprint of the document and the conversion settings.
+
+        :return:
+            A ``str``, which changes when the document fields, the registered
+            handlers or the WTForms version change.
+
+        """
+        handlers = []
+        for converter_base in type(self).__mro__:
+            registry = converter_base.__dict__.get('_field_handlers', {})
+            for field_cls, handler in registry.items():
+                if not isinstance(handler, basestring):
+                    handler = '{0}.{1}'.format(
+                        getattr(handler, '__module__', None),
+                        getattr(handler, '__name__', None),
+                    )
+                handlers.append((
+                    '{0}.{1}'.format(field_cls.__module__, field_cls.__name__),
+                    handler,
+                ))
+
+        return schema_fingerprint(
+            self.document_class,
+            self.schema_key,
+            sorted(handlers),
+            self.max_list_entries,
+            self.max_dict_entries,
+            self.max_dict_key_length,
+            self.max_embedded_depth,
+            self.max_file_size,
+            self.file_checksum,
+            wtforms.__version__,
+        )
+
+    def load_fields(self):
+        """
+        Return the converted fields, using :py:attr:`schema_cache` if set.
+
+        When the cache has a schema for the current fingerprint, the fields
+        are rebuilt from it without converting the document. Else the
+        document is converted and its schema is stored.
+
+        :return:
+            A ``dict`` containing the WTForms fields (see :py:attr:`fields`).
+
+        """
+        if self.schema_cache is None:
+            return self.convert_fields()
+
+        key = self.schema_key
+        fingerprint = self.schema_fingerprint()
+        schema = self.schema_cache.get(key, fingerprint)
+
+        if schema is not None:
+            try:
+                return self.fields_from_schema(schema)
+            except (KeyError, ValueError):
+                pass
+
+        field_dict = self.convert_fields()
+        self.schema_cache.set(key, fingerprint, self.fields_to_schema(
+            field_dict))
+        return field_dict
+
+    def fields_to_schema(self, field_dict):
+        """
+        Serialize the converted ``field_dict``.
+
+        :param field_dict:
+            A ``dict`` containing the WTForms fields, as returned by
+            :py:meth:`convert_fields`.
+
+        :return:
+            A ``list`` of ``(field name, field spec)`` tuples, in the order
+            of the fields. The specs only contain picklable values (given
+            the referenced classes can be imported).
+
+        """
+        items = sorted(
+            field_dict.items(), key=lambda item: item[1].creation_counter)
+
+        return [
+            (name, self.dump_field(
+                unbound_field, self.document_class._fields[name]))
+            for name, unbound_field in items
+        ]
+
+    def fields_from_schema(self, schema):
+        """
+        Rebuild the fields from ``schema`` (see :py:meth:`fields_to_schema`).
+
+        :return:
+            A ``dict`` containing the WTForms fields.
+
+        """
+        return dict(
+            (name, self.load_field(spec, self.document_class._fields[name]))
+            for name, spec in schema
+        )
+
+    def dump_field(self, unbound_field, document_field):
+        """
+        Return the spec of ``unbound_field``, converted from
+        ``document_field``.
+        """
+        kwargs = dict(unbound_field.kwargs)
+
+        # the default might be a callable (e.g. a lambda), so it is
+        # taken from the document field when loading
+        document_default = document_field is not None and \
+            'default' in kwargs and \
+            kwargs['default'] is document_field.default
+        if document_default:
+            del kwargs['default']
+
+        if 'validators' in kwargs:
+            # shared validators are stored by their arguments, so they
+            # are shared again when loaded
+            specs = []
+            for validator in kwargs['validators']:
+                v_spec = validator_spec(validator)
+                specs.append((v_spec, validator if v_spec is None else None))
+            kwargs['validators'] = specs
+
+        args = []
+        for arg in unbound_field.args:
+            if isinstance(arg, UnboundField):
+                args.append(('field', self.dump_field(
+                    arg, getattr(document_field, 'field', None))))
+            elif isinstance(arg, type) and issubclass(arg, DocumentForm):
+                args.append(('form', arg._document_meta[0]))
+            else:
+                args.append(('value', arg))
+
+        return {
+            'class': unbound_field.field_class,
+            'args': args,
+            'kwargs': kwargs,
+            'document_default': document_default,
+        }
+
+    def load_field(self, spec, document_field):
+        """
+        Return the unbound field for ``spec`` (see :py:meth:`dump_field`).
+        """
+        args = []
+        for kind, value in spec['args']:
+            if kind == 'field':
+                value = self.load_field(
+                    value, getattr(document_field, 'field', None))
+            elif kind == 'form':
+                value = self.embedded_form_class(value)
+                if value is None:
+                    raise ValueError('Embedded form could not be created.')
+            args.append(value)
+
+        kwargs = dict(spec['kwargs'])
+
+        if spec['document_default']:
+            kwargs['default'] = document_field.default
+
+        if 'validators' in kwargs:
+            kwargs['validators'] = [
+                validator if v_spec is None else validator_from_spec(v_spec)
+                for v_spec, validator in kwargs['validators']
+            ]
+
+        return spec['class'](*args, **kwargs)
+
+    @property
+    def field_names(self):
+        """
+        Return the names of the document fields to convert.
+
+        :return:
+            A ``list`` of field names, taking the ``fields`` and ``exclude``
+            arguments into account.
+
+        """
         field_names = self.document_class._fields.keys()
 
         if self.only_fields:
-            field_names = (f for f in field_names if f in self.only_fields)
+            return [f for f in field_names if f in self.only_fields]
         elif self.exclude_fields:
-            field_names = (
-                f for f in field_names if f not in self.exclude_fields)
+            return [f for f in field_names if f not in self.exclude_fields]
+        return field_names
 
-        for field_name in field_names:
+    def convert_fields(self):
+        """
+        Convert the fields of the document, without using the cache.
+
+        :return:
+            A ``dict`` containing the WTForms fields (see :py:attr:`fields`).
+
+        """
+        field_dict = {}
+
+        for field_name in self.field_names:
             model_field = self.document_class._fields[field_name]
-            wtf_field = self.convert(model_field)
+
+            if instrumentation.enabled:
+                start = default_timer()
+                wtf_field = self.convert(model_field)
+                instrumentation.record_conversion(
+                    self.document_class, field_name, default_timer() - start)
+            else:
+                wtf_field = self.convert(model_field)
+
             if wtf_field:
                 field_dict[field_name] = wtf_field
 
@@ -76,21 +483,66 @@ class DocumentFieldConverter(object):
         }
 
         if document_field.required:
-            kwargs['validators'].append(validators.Required())
+            kwargs['validators'].append(shared_validator(validators.Required))
 
-        if document_field.choices:
-            kwargs['choices'] = document_field.choices
-            return fields.SelectField(**kwargs)
+        # choices of embedded document classes are not select options
+        if document_field.choices and not isinstance(
+                document_field.choices[0], type):
+            kwargs['index'] = ChoiceIndex(document_field.choices)
+            form_field = IndexedSelectField(**kwargs)
+        else:
+            handler = self.resolve_handler(type(document_field))
+
+            if handler is None:
+                return None
+            elif isinstance(handler, basestring):
+                form_field = getattr(self, handler)(document_field, **kwargs)
+            else:
+                form_field = handler(self, document_field, **kwargs)
+
+        unique = self.unique_validator(document_field)
+        if form_field is not None and unique is not None:
+            # added to the returned field, as a handler might not pass the
+            # validators on, and last, so the query only runs when the value
+            # is valid
+            form_field.kwargs['validators'] = list(
+                form_field.kwargs.get('validators') or ()) + [unique]
+
+        return form_field
+
+    def unique_validator(self, document_field):
+        """
+        Return the uniqueness validator for ``document_field``.
 
-        document_field_type = type(document_field).__name__
+        :param document_field:
+            Instance of Mongoengine field.
 
-        convert_method_name = 'from_{0}'.format(document_field_type.lower())
+        :return:
+            A :py:class:`.Unique` validator when the field is declared
+            ``unique`` or ``unique_with`` (and is not the primary key),
+            else ``None``.
 
-        if hasattr(self, convert_method_name):
-            return getattr(self, convert_method_name)(document_field, **kwargs)
-        else:
+        """
+        # custom fields do not have to be derived from ``BaseField``
+        if not getattr(document_field, 'unique', False) or \
+                document_field.primary_key:
             return None
 
+        # only the fields of a (non embedded) document can be queried
+        document_class = self.document_class
+        if not isinstance(document_class, type) or \
+                not issubclass(document_class, Document) or \
+                document_class._meta.get('abstract') or \
+                document_class._fields.get(
+                    document_field.name) is not document_field:
+            return None
+
+        unique_with = document_field.unique_with or ()
+        if isinstance(unique_with, basestring):
+            unique_with = (unique_with,)
+
+        return Unique(document_class, document_field.name, unique_with)
+
     def set_common_string_kwargs(self, document_field, kwargs):
         """
         Set common string arguments.
@@ -104,7 +556,8 @@ class DocumentFieldConverter(object):
         """
         if document_field.max_length or document_field.min_length:
             kwargs['validators'].append(
-                validators.Length(
+                shared_validator(
+                    validators.Length,
                     max=document_field.max_length or -1,
                     min=document_field.min_length or -1
                 )
@@ -112,7 +565,10 @@ class DocumentFieldConverter(object):
 
         if document_field.regex:
             kwargs['validators'].append(
-                validators.Regexp(regex=document_field.regex)
+                shared_validator(
+                    validators.Regexp,
+                    regex=compile_regex(document_field.regex)
+                )
             )
 
     def set_common_number_kwargs(self, document_field, kwargs):
@@ -128,7 +584,8 @@ class DocumentFieldConverter(object):
         """
         if document_field.max_value or document_field.min_value:
             kwargs['validators'].append(
-                validators.NumberRange(
+                shared_validator(
+                    validators.NumberRange,
                     max=document_field.max_value,
                     min=document_field.min_value
                 )
@@ -159,7 +616,7 @@ class DocumentFieldConverter(object):
             Instance of :py:class:`!wtforms.fields.TextField`.
 
         """
-        kwargs['validators'].append(validators.URL())
+        kwargs['validators'].append(shared_validator(validators.URL))
         # TODO: cleanyp set_common_string_kwargs?
         self.set_common_string_kwargs(document_field, kwargs)
         return fields.TextField(**kwargs)
@@ -175,7 +632,7 @@ class DocumentFieldConverter(object):
             Instance of :py:class:`!wtforms.fields.TextField`.
 
         """
-        kwargs['validators'].append(validators.Email())
+        kwargs['validators'].append(shared_validator(validators.Email))
         self.set_common_string_kwargs(document_field, kwargs)
         return fields.TextField(**kwargs)
 
@@ -237,32 +694,228 @@ class DocumentFieldConverter(object):
         raise NotImplementedError('ComplexDateTimeField not implemented.')
 
     def from_listfield(self, document_field, **kwargs):
-        raise NotImplementedError('ListField not implemented.')
+        """
+        Convert ``document_field`` into a ``BoundedFieldList``.
+
+        The entries are converted from the inner field of the list. At most
+        :py:attr:`max_list_entries` entries are accepted.
+
+        :param document_field:
+            Instance of Mongoengine field.
+
+        :return:
+            Instance of :py:class:`.BoundedFieldList` or ``None`` when the
+            inner field can't be converted.
+
+        """
+        if document_field.field is None:
+            return None
+
+        unbound_field = self.convert(document_field.field)
+        if unbound_field is None:
+            return None
+
+        kwargs['max_entries'] = self.max_list_entries
+        return BoundedFieldList(unbound_field, **kwargs)
 
     def from_sortedlistfield(self, document_field, **kwargs):
-        raise NotImplementedError('SortedListField not implemented.')
+        """
+        Convert ``document_field`` into a ``SortedFieldList``.
+
+        :param document_field:
+            Instance of Mongoengine field.
+
+        :return:
+            Instance of :py:class:`.SortedFieldList` or ``None`` when the
+            inner field can't be converted.
+
+        """
+        if document_field.field is None:
+            return None
+
+        unbound_field = self.convert(document_field.field)
+        if unbound_field is None:
+            return None
+
+        kwargs['max_entries'] = self.max_list_entries
+        kwargs['ordering'] = document_field._ordering
+        kwargs['reverse'] = document_field._order_reverse
+        return SortedFieldList(unbound_field, **kwargs)
 
     def from_dictfield(self, document_field, **kwargs):
-        raise NotImplementedError('DictField not implemented.')
+        """
+        Convert ``document_field`` into a ``MappingField``.
+
+        The values are converted from the inner field of the dict (if any).
+        At most :py:attr:`max_dict_entries` keys of at most
+        :py:attr:`max_dict_key_length` characters are accepted.
+
+        :param document_field:
+            Instance of Mongoengine field.
+
+        :return:
+            Instance of :py:class:`.MappingField` or ``None`` when the inner
+            field can't be converted.
+
+        """
+        unbound_field = None
+
+        if document_field.field is not None:
+            unbound_field = self.convert(document_field.field)
+            if unbound_field is None:
+                return None
+
+        kwargs['max_entries'] = self.max_dict_entries
+        kwargs['max_key_length'] = self.max_dict_key_length
+        return MappingField(unbound_field, **kwargs)
 
     def from_mapfield(self, document_field, **kwargs):
-        raise NotImplementedError('MapField not implemented.')
+        """
+        Convert ``document_field`` into a ``MappingField``.
+
+        :param document_field:
+            Instance of Mongoengine field.
+
+        :return:
+            Instance of :py:class:`.MappingField` (see
+            :py:meth:`from_dictfield`).
+
+        """
+        return self.from_dictfield(document_field, **kwargs)
 
     def from_objectidfield(self, document_field, **kwargs):
         return None
 
     def from_referencefield(self, document_field, **kwargs):
-        raise NotImplementedError('ReferenceField not implemented.')
+        """
+        Convert ``document_field`` into a ``ReferenceSelectField``.
+
+        :param document_field:
+            Instance of Mongoengine field.
+
+        :return:
+            Instance of :py:class:`.ReferenceSelectField`.
+
+        """
+        kwargs['document_class'] = document_field.document_type
+        kwargs['allow_blank'] = not document_field.required
+        return ReferenceSelectField(**kwargs)
 
     def from_genericreferencefield(self, document_field, **kwargs):
         raise NotImplementedError('GenericReferenceField not implemented.')
 
+    def embedded_form_class(self, document_class):
+        """
+        Return the form class for the embedded ``document_class``.
+
+        The form class is created once per embedded document class and shared
+        by all the documents embedding it. Self-referencing and mutually
+        recursive documents are nested up to :py:attr:`max_embedded_depth`
+        times, after which the embedded field is left out. As these form
+        classes depend on their nesting, they are only shared within the
+        conversion of the same document.
+
+        :param document_class:
+            The Mongoengine embedded document class.
+
+        :return:
+            A :py:class:`.DocumentForm` subclass or ``None`` when the maximum
+            depth has been reached.
+
+        """
+        key = (type(self), document_class)
+        form_class = self._embedded_forms.get(key)
+        if form_class is not None:
+            return form_class
+
+        depth = self._embedded_stack.count(document_class)
+        if depth >= self.max_embedded_depth:
+            self._embedded_truncated = True
+            return None
+
+        if self._embedded_memo is None:
+            self._embedded_memo = {}
+
+        stack = self._embedded_stack + (document_class,)
+        form_class = self._embedded_memo.get(stack)
+        if form_class is not None:
+            return form_class
+
+        converter = type(self)(document_class)
+        converter._embedded_stack = stack
+        converter._embedded_memo = self._embedded_memo
+
+        attrs = converter.convert_fields()
+        attrs['_document_meta'] = (document_class, None, None)
+        attrs['_declared_names'] = ()
+        form_class = type(
+            '{0}Form'.format(document_class.__name__), (DocumentForm,), attrs)
+
+        if converter._embedded_truncated:
+            self._embedded_truncated = True
+            self._embedded_memo[stack] = form_class
+        else:
+            self._embedded_forms[key] = form_class
+
+        return form_class
+
     def from_embeddeddocumentfield(self, document_field, **kwargs):
-        raise NotImplementedError('EmbeddedDocumentField not implemented.')
+        """
+        Convert ``document_field`` into an ``EmbeddedFormField``.
+
+        :param document_field:
+            Instance of Mongoengine field.
+
+        :return:
+            Instance of :py:class:`.EmbeddedFormField` or ``None`` when the
+            maximum nesting depth has been reached.
+
+        """
+        return self.embedded_form_field(document_field.document_type, kwargs)
 
     def from_genericembeddeddocumentfield(self, document_field, **kwargs):
-        raise NotImplementedError(
-            'GenericEmbeddedDocumentField not implemented.')
+        """
+        Convert ``document_field`` into an ``EmbeddedFormField``.
+
+        This is only possible when the ``choices`` of the field limit it to a
+        single embedded document class.
+
+        :param document_field:
+            Instance of Mongoengine field.
+
+        :return:
+            Instance of :py:class:`.EmbeddedFormField` or ``None``.
+
+        """
+        choices = document_field.choices or ()
+
+        if len(choices) != 1 or not isinstance(choices[0], type):
+            return None
+
+        return self.embedded_form_field(choices[0], kwargs)
+
+    def embedded_form_field(self, document_class, kwargs):
+        """
+        Return an ``EmbeddedFormField`` for ``document_class``.
+
+        :param document_class:
+            The Mongoengine embedded document class.
+
+        :param kwargs:
+            A ``dict`` with the field arguments.
+
+        :return:
+            Instance of :py:class:`.EmbeddedFormField` or ``None``.
+
+        """
+        form_class = self.embedded_form_class(document_class)
+        if form_class is None:
+            return None
+
+        # the enclosed form validates itself
+        kwargs.pop('validators', None)
+        kwargs['document_class'] = document_class
+        return EmbeddedFormField(form_class, **kwargs)
 
     def from_booleanfield(self, document_field, **kwargs):
         """
@@ -278,38 +931,324 @@ class DocumentFieldConverter(object):
         return fields.BooleanField(**kwargs)
 
     def from_filefield(self, document_field, **kwargs):
-        raise NotImplementedError('FileField not implemented.')
+        """
+        Convert ``document_field`` into a ``GridFSFileField``.
 
-    def from_binaryfield(self, document_field, **kwargs):
-        raise NotImplementedError('BinaryField not implemented.')
+        Uploads are limited to :py:attr:`max_file_size` bytes.
 
-    def from_geopointfield(self, document_field, **kwargs):
-        raise NotImplementedError('GeoPointField not implemented.')
+        :param document_field:
+            Instance of Mongoengine field.
 
-    def from_sequencefield(self, document_field, **kwargs):
-        raise NotImplementedError('SequenceField not implemented.')
+        :return:
+            Instance of :py:class:`.GridFSFileField`.
 
+        """
+        kwargs['proxy_class'] = document_field.proxy_class
+        kwargs['db_alias'] = document_field.db_alias
+        kwargs['collection_name'] = document_field.collection_name
+        kwargs['max_size'] = self.max_file_size
+        kwargs['checksum'] = self.file_checksum
+        return GridFSFileField(**kwargs)
+
+    def from_imagefield(self, document_field, **kwargs):
+        """
+        Leave out ``document_field``.
 
-class DocumentFormMetaClassBase(type):
-    """
-    Meta-class for generating the actual WTForms class.
-    """
-    def __new__(cls, name, bases, attrs):
-        if 'Meta' in attrs:
-            document_class = attrs['Meta'].document_class
-            fields = getattr(attrs['Meta'], 'fields', None)
-            exclude = getattr(attrs['Meta'], 'exclude', None)
+        An ``ImageField`` is not converted like a ``FileField``, as its
+        proxy resizes and validates the image when it is stored, which the
+        streaming upload of :py:class:`.GridFSFileField` bypasses.
 
-            converter = DocumentFieldConverter(document_class, fields, exclude)
-            attrs = converter.fields
+        :return:
+            ``None``.
 
-        return super(
-            DocumentFormMetaClassBase, cls).__new__(cls, name, bases, attrs)
+        """
+        return None
 
+    def from_binaryfield(self, document_field, **kwargs):
+        """
+        Convert ``document_field`` into a ``BytesField``.
 
-class DocumentFormMetaClass(DocumentFormMetaClassBase, FormMeta):
-    # This object, combining the two meta classes, is needed to avoid conflicts
-    pass
+        :param document_field:
+            Instance of Mongoengine field.
+
+        :return:
+            Instance of :py:class:`.BytesField`.
+
+        """
+        kwargs['max_bytes'] = document_field.max_bytes
+        return BytesField(**kwargs)
+
+    def from_geopointfield(self, document_field, **kwargs):
+        """
+        Convert ``document_field`` into a ``GeoPointFormField``.
+
+        :param document_field:
+            Instance of Mongoengine field.
+
+        :return:
+            Instance of :py:class:`.GeoPointFormField`.
+
+        """
+        return GeoPointFormField(**kwargs)
+
+    def from_sequencefield(self, document_field, **kwargs):
+        raise NotImplementedError('SequenceField not implemented.')
+
+
+class _LazyMetaClassMixin(object):
+    """
+    Hooks of the metaclass of form classes of which the conversion is
+    deferred (see :py:func:`_lazy_metaclass`).
+
+    The fields are converted when the class is instantiated or a missing
+    attribute is looked up, after which the class gets its eager metaclass
+    again. Lookups on converted (and eager) classes therefore never pass
+    through these hooks.
+    """
+    def __call__(cls, *args, **kwargs):
+        DocumentFormMetaClassBase._materialize(cls)
+        # the class has its eager metaclass now
+        return type(cls).__call__(cls, *args, **kwargs)
+
+    def __getattr__(cls, name):
+        # only called when the attribute could not be found, which for a
+        # lazy form class might mean that it has not been converted yet
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        DocumentFormMetaClassBase._materialize(cls)
+        # the class has its eager metaclass now, so this does not recurse
+        return getattr(cls, name)
+
+
+def _lazy_metaclass(metaclass):
+    """
+    Return the subclass of ``metaclass`` with the lazy conversion hooks.
+    """
+    with _materialize_lock:
+        lazy_metaclass = _lazy_metaclasses.get(metaclass)
+
+        if lazy_metaclass is None:
+            lazy_metaclass = type(
+                'Lazy{0}'.format(metaclass.__name__),
+                (_LazyMetaClassMixin, metaclass),
+                {'_eager_metaclass': metaclass, '__module__': __name__},
+            )
+            reduce_class = copy_reg.dispatch_table.get(metaclass)
+            if reduce_class is not None:
+                copy_reg.pickle(lazy_metaclass, reduce_class)
+            _lazy_metaclasses[metaclass] = lazy_metaclass
+
+    return lazy_metaclass
+
+
+class DocumentFormMetaClassBase(type):
+    """
+    Meta-class for generating the actual WTForms class.
+
+    The document class, ``fields`` and ``exclude`` of the ``Meta`` class are
+    kept as ``_document_meta`` on the generated class.
+
+    When the ``Meta`` class has ``lazy = True``, the conversion of the
+    document is deferred until the form class is instantiated or one of its
+    fields is accessed. The converted fields are then set on the class.
+    Until then the class has a lazy subclass of its metaclass, so the
+    attribute lookups of converted classes are not hooked.
+
+    When the ``Meta`` class has ``compiled = True``, the form is validated
+    by a generated function (see
+    :py:func:`wtfmongoengine.codegen.generate_validate`).
+
+    The ``reference_labels`` of the ``Meta`` class map the names of
+    reference fields to the field of the referenced document used as choice
+    label (see :py:class:`.ReferenceSelectField`).
+
+    Fields and methods declared on the form class are kept, a declared field
+    replaces the converted field with the same name. A subclass of a
+    converted form for the same document only converts the fields its parent
+    did not convert, and hides the parent fields it excludes.
+    """
+    def __new__(cls, name, bases, attrs):
+        if '_declared_names' not in attrs:
+            # the attributes declared in the class body, which are lost when
+            # the class is rebuilt by ``document_form_class``
+            attrs = dict(attrs, _declared_names=tuple(sorted(
+                name for name in attrs
+                if name != 'Meta' and not name.startswith('__'))))
+
+        if 'Meta' in attrs:
+            document_class = attrs['Meta'].document_class
+            fields = getattr(attrs['Meta'], 'fields', None)
+            exclude = getattr(attrs['Meta'], 'exclude', None)
+            document_meta = (document_class, fields, exclude)
+
+            compiled = getattr(attrs['Meta'], 'compiled', False)
+            reference_labels = getattr(
+                attrs['Meta'], 'reference_labels', None)
+
+            if getattr(attrs['Meta'], 'lazy', False):
+                converted = {'_lazy': True}
+            else:
+                converted = DocumentFormMetaClassBase._convert(
+                    bases, document_meta)
+                DocumentFormMetaClassBase._label_references(
+                    converted, bases, reference_labels)
+
+            # declared attributes take precedence over the converted fields
+            converted.update(attrs)
+            attrs = converted
+
+            attrs['_document_meta'] = document_meta
+            attrs['_compiled'] = compiled
+            attrs['_reference_labels'] = reference_labels
+
+        # only a class which is (or inherits from) a class of which the
+        # conversion is deferred gets the metaclass with the lookup hook
+        pending = attrs.get('_lazy') or any(
+            klass.__dict__.get('_lazy')
+            for base in bases for klass in base.__mro__)
+        if pending and not issubclass(cls, _LazyMetaClassMixin):
+            cls = _lazy_metaclass(cls)
+        elif not pending and issubclass(cls, _LazyMetaClassMixin):
+            cls = cls._eager_metaclass
+
+        return super(
+            DocumentFormMetaClassBase, cls).__new__(cls, name, bases, attrs)
+
+    @staticmethod
+    def _convert(bases, document_meta):
+        """
+        Convert the fields for ``document_meta``, reusing those of the bases.
+
+        :param bases:
+            The bases of the form class.
+
+        :param document_meta:
+            A ``(document_class, fields, exclude)`` tuple.
+
+        :return:
+            A ``dict`` of converted fields. The fields of the parent form
+            which are not part of ``document_meta`` are set to ``None``.
+
+        """
+        parent_meta = None
+        for base in bases:
+            parent_meta = getattr(base, '_document_meta', None)
+            if parent_meta is not None:
+                break
+
+        if parent_meta is None:
+            return DocumentFieldConverter(*document_meta).fields
+
+        document_class = document_meta[0]
+        field_names = set(DocumentFieldConverter(*document_meta).field_names)
+        parent_names = set(DocumentFieldConverter(*parent_meta).field_names)
+
+        # the parent fields which are not part of this form are hidden
+        field_dict = dict.fromkeys(parent_names - field_names)
+
+        if parent_meta[0] is document_class:
+            # the fields of the parent are inherited
+            field_names -= parent_names
+            if field_names:
+                field_dict.update(DocumentFieldConverter(
+                    document_class, sorted(field_names)).fields)
+        else:
+            field_dict.update(DocumentFieldConverter(*document_meta).fields)
+
+        return field_dict
+
+    @staticmethod
+    def _label_references(field_dict, bases, reference_labels):
+        """
+        Set the ``label_field`` of the reference fields in ``field_dict``.
+
+        :param field_dict:
+            A ``dict`` of converted fields (see :py:meth:`_convert`), which
+            is updated with the labelled fields.
+
+        :param bases:
+            The bases of the form class, to take inherited fields from.
+
+        :param reference_labels:
+            A ``dict`` mapping the names of reference fields to the name of
+            the label field of the referenced document (or ``None``).
+
+        :raises ValueError:
+            When a name is not a converted reference field, or the label
+            field does not exist.
+
+        """
+        for name, label_field in (reference_labels or {}).items():
+            if name in field_dict:
+                field = field_dict[name]
+            else:
+                field = None
+                for base in bases:
+                    field = getattr(base, name, None)
+                    if field is not None:
+                        break
+
+            if not isinstance(field, UnboundField) or \
+                    not issubclass(field.field_class, ReferenceSelectField):
+                raise ValueError(
+                    '{0!r} is not a converted reference field.'.format(name))
+
+            if label_field not in field.kwargs['document_class']._fields:
+                raise ValueError('{0!r} is not a field of {1}.'.format(
+                    label_field, field.kwargs['document_class'].__name__))
+
+            labelled = UnboundField(
+                field.field_class, *field.args,
+                **dict(field.kwargs, label_field=label_field))
+            # keep the position of the field within the form
+            labelled.creation_counter = field.creation_counter
+            field_dict[name] = labelled
+
+    def _materialize(cls):
+        """
+        Convert the fields of ``cls`` (and its bases) when deferred.
+
+        :return:
+            ``True`` when one or more classes were converted (by this or
+            another thread).
+
+        """
+        materialized = False
+
+        for klass in reversed(cls.__mro__):
+            if not klass.__dict__.get('_lazy'):
+                continue
+
+            with _materialize_lock:
+                # another thread might have converted the class while this
+                # one was waiting for the lock
+                if klass.__dict__.get('_lazy'):
+                    field_dict = DocumentFormMetaClassBase._convert(
+                        klass.__bases__, klass._document_meta)
+                    DocumentFormMetaClassBase._label_references(
+                        field_dict, klass.__bases__, klass._reference_labels)
+                    for field_name, field in field_dict.items():
+                        # declared attributes take precedence
+                        if field_name not in klass.__dict__:
+                            setattr(klass, field_name, field)
+
+                    klass._lazy = False
+
+                materialized = True
+
+        with _materialize_lock:
+            # the converted classes no longer need the lookup hook
+            for klass in cls.__mro__:
+                if isinstance(klass, _LazyMetaClassMixin):
+                    klass.__class__ = type(klass)._eager_metaclass
+
+        return materialized
+
+
+class DocumentFormMetaClass(DocumentFormMetaClassBase, FormMeta):
+    # This object, combining the two meta classes, is needed to avoid conflicts
+    pass
 
 
 class DocumentForm(Form):
@@ -347,9 +1286,1039 @@ class DocumentForm(Form):
                 # In case you want to exclude ``email`` from the form
                 # exclude = ('email',)
 
+                # In case you want to defer the conversion until the form
+                # is used for the first time
+                # lazy = True
+
+                # In case you want to validate with a generated function,
+                # which inlines the converted validators
+                # compiled = True
+
+                # In case you want to label the choices of a reference
+                # field with a field of the referenced document
+                # reference_labels = {'employer': 'name'}
+
     .. note::
         When using both ``fields`` and ``exclude``, only ``fields`` will
         be used.
 
+    A document can be bound with ``obj``. :py:meth:`save` then writes only
+    the fields that were changed::
+
+        form = UserForm(request.POST, obj=user)
+        if form.validate():
+            form.save()
+
     """
     __metaclass__ = DocumentFormMetaClass
+
+    _document_meta = None
+
+    _compiled = False
+
+    _reference_labels = None
+
+    _declared_names = ()
+
+    #: The default timeout of :py:meth:`async_validate`, in seconds.
+    async_timeout = None
+
+    def __init__(self, formdata=None, obj=None, prefix='', **kwargs):
+        super(DocumentForm, self).__init__(formdata, obj, prefix, **kwargs)
+        self._instance = obj
+
+    @classmethod
+    def only_fields(cls):
+        """
+        Return the names of the document fields which are in the form.
+
+        :return:
+            A ``tuple`` of field names, to pass to ``QuerySet.only``.
+
+        """
+        only = cls.__dict__.get('_only_fields')
+
+        if only is None:
+            DocumentFormMetaClassBase._materialize(cls)
+            document_fields = cls._document_meta[0]._fields
+            only = tuple(sorted(
+                name for name in dir(cls)
+                if name in document_fields and
+                isinstance(getattr(cls, name), UnboundField)
+            ))
+            cls._only_fields = only
+
+        return only
+
+    @classmethod
+    def load(cls, pk, formdata=None, **kwargs):
+        """
+        Load the document with ``pk`` and return a form bound to it.
+
+        Only the fields of the form are fetched (see :py:meth:`only_fields`),
+        so an edit form for a few fields of a large document does not
+        transfer and decode the whole document.
+
+        :param pk:
+            The primary key of the document.
+
+        :param formdata:
+            The form data (optional).
+
+        :return:
+            An instance of the form or ``None`` when the document does not
+            exist.
+
+        """
+        document = cls._document_meta[0].objects(pk=pk).only(
+            *cls.only_fields()).first()
+
+        if document is None:
+            return None
+
+        return cls(formdata, obj=document, **kwargs)
+
+    @classmethod
+    def for_queryset(cls, queryset):
+        """
+        Return a bound form for each document of ``queryset``.
+
+        Like :py:meth:`load`, only the fields of the form are fetched.
+
+        :param queryset:
+            A Mongoengine queryset of the document class of the form.
+
+        :return:
+            A generator of form instances.
+
+        """
+        for document in queryset.only(*cls.only_fields()):
+            yield cls(obj=document)
+
+    @classmethod
+    def from_json(cls, data, obj=None, prefix=''):
+        """
+        Return a form for the parsed JSON ``data``.
+
+        Unlike passing form data, ``data`` is not wrapped: numbers, booleans
+        and datetimes are set directly on the integer, float, decimal,
+        boolean and datetime fields (see :py:meth:`process_json`).
+
+        :param data:
+            A ``dict`` mapping field names to values.
+
+        :param obj:
+            The document to bind (optional).
+
+        :param prefix:
+            The prefix of the form (optional).
+
+        :return:
+            A form instance.
+
+        """
+        return cls(obj=obj, prefix=prefix, _json=data)
+
+    def process(self, formdata=None, obj=None, **kwargs):
+        if '_json' in kwargs:
+            # WTForms ignores names with a leading underscore for fields
+            self.process_json(kwargs['_json'], obj)
+        else:
+            super(DocumentForm, self).process(formdata, obj, **kwargs)
+
+    def process_json(self, data, obj=None):
+        """
+        Process the parsed JSON ``data``.
+
+        A value of the type a field coerces to (e.g. an ``int`` for an
+        integer field or a ``[latitude, longitude]`` list for a geo point
+        field) is set as the field data, without a string round-trip. A
+        value of another JSON type (e.g. a number for a string field or
+        ``3.7`` for an integer field) is a processing error of the field.
+        Strings and nested objects are processed as form data, nested
+        objects and lists being mapped on the form data names (e.g.
+        ``address-city`` and ``tags-0``), which can be used as keys of
+        ``data`` as well (e.g. for CSV rows). Fields which are not in
+        ``data`` (or ``null``) get the value of ``obj`` or their default.
+
+        :param data:
+            A ``dict`` mapping field names to values.
+
+        :param obj:
+            The document to take the values of the other fields from
+            (optional).
+
+        """
+        formdata = None
+        nested_names = None
+
+        for name, field in self._fields.items():
+            if obj is not None and hasattr(obj, name):
+                object_data = getattr(obj, name)
+            else:
+                object_data = _unset_value
+
+            value = data.get(name)
+            if value is None:
+                if nested_names is None:
+                    # the fields with form data names (e.g. ``tags-0``)
+                    nested_names = set(
+                        key.split('-', 1)[0] for key in data
+                        if isinstance(key, basestring) and '-' in key)
+
+                if name in nested_names:
+                    if formdata is None:
+                        formdata = _RowData(_flatten(data, self._prefix))
+                    field.process(formdata, object_data)
+                else:
+                    field.process(None, object_data)
+                continue
+
+            coerce = _json_coercions.get(type(field))
+            try:
+                typed = coerce(field, value) if coerce else _missing
+            except ValueError as e:
+                _process_typed(field, value, None, object_data, e.args[0])
+                continue
+
+            if typed is not _missing:
+                _process_typed(field, value, typed, object_data)
+            else:
+                if formdata is None:
+                    formdata = _RowData(_flatten(data, self._prefix))
+                field.process(formdata, object_data)
+
+    def changed_data(self, obj=None):
+        """
+        Return the values which differ from ``obj``.
+
+        Fields of embedded documents are compared one by one, so only the
+        changed fields within an embedded document are returned. Declared
+        fields which are not a field of the document (e.g. a password
+        confirmation) are left out.
+
+        :param obj:
+            The document to compare with. When not given, the bound document
+            is used.
+
+        :return:
+            A ``dict`` mapping the Mongoengine update path (e.g.
+            ``address__city``) to the new value.
+
+        """
+        if obj is None:
+            obj = self._instance
+
+        changes = {}
+        document_fields = None
+        if self._document_meta is not None:
+            document_fields = self._document_meta[0]._fields
+
+        for name, field in self._fields.items():
+            if document_fields is not None and name not in document_fields:
+                continue
+
+            if isinstance(field, ReferenceSelectField):
+                # compare the primary keys, without dereferencing
+                current = getattr(obj, '_data', {}).get(name)
+                if reference_pk(field.data) != reference_pk(current):
+                    changes[name] = field.data
+                continue
+
+            current = getattr(obj, name, None)
+
+            if current is not None and isinstance(field, fields.FormField) \
+                    and isinstance(field.form, DocumentForm):
+                for path, value in field.form.changed_data(current).items():
+                    changes['{0}__{1}'.format(name, path)] = value
+                continue
+
+            value = _populated_value(field, name)
+
+            # an empty form value equals a value which was never set
+            if current is None and value == '':
+                continue
+
+            if value != current:
+                changes[name] = value
+
+        return changes
+
+    def populate_obj(self, obj):
+        """
+        Populate ``obj`` with the changed values of the form.
+
+        Unlike :py:meth:`!wtforms.form.Form.populate_obj`, only the changed
+        fields are set, so Mongoengine only marks these fields as changed.
+
+        :param obj:
+            The document to populate.
+
+        :return:
+            A ``dict`` with the changes (see :py:meth:`changed_data`).
+
+        """
+        changes = self.changed_data(obj)
+
+        for path, value in changes.items():
+            target = obj
+            names = path.split('__')
+
+            for name in names[:-1]:
+                target = getattr(target, name)
+
+            setattr(target, names[-1], value)
+
+        return changes
+
+    def save(self, obj=None):
+        """
+        Save the form data to ``obj`` (or the bound document).
+
+        For an existing document only the changed fields are written, with a
+        single atomic update. When no document is bound, a new document is
+        created and saved.
+
+        .. note::
+            The update does not call the ``validate`` / ``clean`` methods
+            of the document, make sure the form is validated.
+
+        :param obj:
+            The document to save to (optional).
+
+        :return:
+            The saved document.
+
+        """
+        if obj is None:
+            obj = self._instance
+
+        if obj is None or obj.pk is None:
+            if obj is None:
+                obj = self._document_meta[0]()
+            self.populate_obj(obj)
+            return obj.save()
+
+        changes = self.populate_obj(obj)
+
+        if changes:
+            update = {}
+            for path, value in changes.items():
+                if value is None:
+                    update['unset__' + path] = True
+                else:
+                    update['set__' + path] = value
+
+            type(obj).objects(pk=obj.pk).update_one(**update)
+            obj._clear_changed_fields()
+
+        return obj
+
+    def validate(self):
+        """
+        Validate the form.
+
+        When :py:data:`~wtfmongoengine.instrumentation.instrumentation` is
+        enabled, the time spent in each validator is recorded.
+
+        When the form is invalid, the uploads stored in GridFS while
+        validating are deleted again (see :py:meth:`discard_files`).
+
+        :return:
+            ``True`` when there were no errors.
+
+        """
+        success = self._validate_fields()
+        if not success:
+            self.discard_files()
+        return success
+
+    def discard_files(self):
+        """
+        Delete the uploads stored by the file fields of the form, including
+        those of embedded forms and lists (see
+        :py:meth:`.GridFSFileField.discard`).
+        """
+        pending = list(self._fields.values())
+
+        while pending:
+            field = pending.pop()
+            if isinstance(field, GridFSFileField):
+                field.discard()
+            elif isinstance(field, fields.FormField):
+                pending.extend(field.form)
+            elif isinstance(field, fields.FieldList):
+                pending.extend(field.entries)
+
+    def _validate_fields(self):
+        """
+        Validate the fields, with the generated function or instrumented.
+        """
+        if not instrumentation.enabled:
+            if self._compiled:
+                validate = self._validate_function()
+                # fields might have been added to or deleted from this
+                # instance, these are validated the generic way
+                if validate.field_names == tuple(self._fields):
+                    return validate(self)
+            return super(DocumentForm, self).validate()
+
+        # the validator lists are shared by all bound instances of a field,
+        # so the timed validators are set on the bound field only
+        originals = []
+        for field in self._fields.values():
+            originals.append((field, field.__dict__.get('validators')))
+            field.validators = instrumentation.timed_validators(field)
+
+        try:
+            return super(DocumentForm, self).validate()
+        finally:
+            for field, field_validators in originals:
+                if field_validators is None:
+                    del field.validators
+                else:
+                    field.validators = field_validators
+
+    def async_validate(self, timeout=None, pool=None):
+        """
+        Validate the form, running the database-backed checks concurrently.
+
+        The lookups of the submitted references and the *blocking*
+        validators (validators with a true ``blocking`` attribute, like
+        :py:class:`.Unique`) are started at once on a thread pool. The other
+        validators run inline meanwhile, so the validation takes about as
+        long as the slowest check instead of the sum of all checks.
+
+        The errors of a blocking validator are only added to a field
+        without other errors. A check which did not finish within
+        ``timeout`` is an error.
+
+        .. note::
+            Python 2 has no ``asyncio``, so the concurrency is provided by
+            threads. A check which timed out keeps running in its thread.
+
+        :param timeout:
+            The number of seconds to wait for all the checks of the form.
+            Defaults to :py:attr:`async_timeout`.
+
+        :param pool:
+            The pool to run the checks in, an object with an
+            ``apply_async(func, args)`` method like
+            :py:class:`!multiprocessing.pool.ThreadPool`. By default a
+            shared thread pool is used.
+
+        :return:
+            ``True`` when there were no errors.
+
+        """
+        if timeout is None:
+            timeout = self.async_timeout
+
+        references = []
+        blocking = []
+        originals = []
+
+        for field in self._fields.values():
+            if isinstance(field, ReferenceSelectField) and \
+                    field._formdata is not None:
+                references.append(field)
+
+            field_validators = [
+                v for v in field.validators if getattr(v, 'blocking', False)]
+            if field_validators:
+                blocking.extend((field, v) for v in field_validators)
+                originals.append((field, field.validators))
+
+        if not references and not blocking:
+            return self.validate()
+
+        if pool is None:
+            pool = _validation_pool()
+
+        # the results are collected after the other validators have run
+        reference_results = [
+            (field, pool.apply_async(_lookup_reference, (field,)))
+            for field in references
+        ]
+        blocking_results = [
+            (field, pool.apply_async(
+                _run_blocking_validator, (validator, self, field)))
+            for field, validator in blocking
+        ]
+
+        deadline = None if timeout is None else default_timer() + timeout
+
+        for field, result in reference_results:
+            try:
+                field.data = _wait(result, deadline)
+            except multiprocessing.TimeoutError:
+                field.data = None
+                field.process_errors.append(
+                    field.gettext(u'Validation timed out.'))
+
+        for field, field_validators in originals:
+            field.validators = [
+                v for v in field_validators
+                if not getattr(v, 'blocking', False)
+            ]
+
+        try:
+            success = self.validate()
+        finally:
+            for field, field_validators in originals:
+                field.validators = field_validators
+
+        for field, result in blocking_results:
+            try:
+                message = _wait(result, deadline)
+            except multiprocessing.TimeoutError:
+                message = field.gettext(u'Validation timed out.')
+
+            if message is not None and not field.errors:
+                field.errors.append(message)
+                if success:
+                    self.discard_files()
+                success = False
+
+        # the errors might have been read (and cached) by ``validate``
+        self._errors = None
+        return success
+
+    def _validate_function(self):
+        """
+        Return the generated validation function of the form class.
+        """
+        form_class = type(self)
+        validate = form_class.__dict__.get('_generated_validate')
+
+        if validate is None:
+            validate = generate_validate(self)
+            form_class._generated_validate = staticmethod(validate)
+        else:
+            validate = validate.__func__
+
+        return validate
+
+    @classmethod
+    def bulk_validate(cls, rows, processes=None, chunk_size=1000):
+        """
+        Validate many rows of data, e.g. when importing records.
+
+        A single form instance is used for all the rows. Its bound fields are
+        re-processed for every row, instead of creating (and binding) a new
+        form per row.
+
+        The unique fields are checked for all the rows at once, with a
+        single query per field (see :py:meth:`.Unique.batch_errors`). A
+        value which is repeated within the rows is an error as well.
+
+        :param rows:
+            An iterable of ``dict`` objects, mapping field names to values
+            (e.g. from :py:class:`!csv.DictReader` or parsed JSON), which
+            are processed like :py:meth:`process_json` does.
+
+        :param processes:
+            When given, the rows are validated in chunks of ``chunk_size``
+            rows by a pool of this number of processes. The form class is
+            sent to the processes by reference (see
+            :py:func:`document_form_class`).
+
+        :param chunk_size:
+            The number of rows per chunk, when using ``processes``.
+
+        :return:
+            A ``list`` with for each row a ``dict`` of errors (empty when the
+            row is valid).
+
+        """
+        if processes:
+            rows = list(rows)
+            chunks = [
+                (cls, rows[i:i + chunk_size])
+                for i in range(0, len(rows), chunk_size)
+            ]
+
+            pool = multiprocessing.Pool(processes)
+            try:
+                chunk_results = pool.map(_validate_chunk, chunks)
+            finally:
+                pool.close()
+                pool.join()
+
+            results = []
+            unique_keys = {}
+
+            for chunk_errors, chunk_keys in chunk_results:
+                offset = len(results)
+                results.extend(chunk_errors)
+
+                for name, (validator, keys) in chunk_keys.items():
+                    unique_keys.setdefault(name, (validator, []))[1].extend(
+                        (offset + index, key) for index, key in keys)
+        else:
+            results, unique_keys = cls._validate_rows(rows)
+
+        for name, (validator, keys) in unique_keys.items():
+            for index, message in validator.batch_errors(keys).items():
+                errors = results[index] = dict(results[index])
+                errors[name] = list(errors.get(name, ())) + [message]
+
+        return results
+
+    @classmethod
+    def _validate_rows(cls, rows):
+        """
+        Validate ``rows`` with a single form, deferring the unique checks.
+
+        :return:
+            A ``(results, unique keys)`` tuple. The unique keys map the field
+            name to a ``(validator, [(index, key), ...])`` tuple.
+
+        """
+        form = cls()
+        form._defer_unique = True
+
+        results = []
+        unique_keys = dict(
+            (name, (validator, []))
+            for name, validator in form.unique_validators()
+        )
+
+        for index, row in enumerate(rows):
+            form.process_json(row)
+            if form.validate():
+                results.append({})
+            else:
+                results.append(form.errors)
+
+            if unique_keys:
+                for name, key in form.unique_keys().items():
+                    unique_keys[name][1].append((index, key))
+
+        return results, unique_keys
+
+    def unique_validators(self):
+        """
+        Return the uniqueness validators of the form.
+
+        :return:
+            A ``list`` of ``(field name, validator)`` tuples, for the fields
+            with a :py:class:`.Unique` validator.
+
+        """
+        unique_validators = self.__dict__.get('_unique_validators')
+
+        if unique_validators is None:
+            unique_validators = [
+                (name, validator)
+                for name, field in self._fields.items()
+                for validator in field.validators
+                if isinstance(validator, Unique)
+            ]
+            self._unique_validators = unique_validators
+
+        return unique_validators
+
+    def unique_keys(self):
+        """
+        Return the values of the unique fields, to check them in bulk.
+
+        :return:
+            A ``dict`` mapping the names of the unique fields to their key
+            (see :py:meth:`.Unique.key`). Fields which are empty or have
+            errors are left out.
+
+        """
+        keys = {}
+
+        for name, validator in self.unique_validators():
+            field = self._fields[name]
+            if field.errors:
+                continue
+
+            key = validator.key(self, field)
+            if key is not None:
+                keys[name] = key
+
+        return keys
+
+    def __reduce__(self):
+        """
+        Pickle the form by its class and the state of its fields.
+
+        Only the field attributes which differ from a new instance of the
+        form are pickled, the rest is restored by instantiating the class.
+        """
+        template = type(self)._pickle_template()
+
+        field_states = {}
+        for name, field in self._fields.items():
+            initial = vars(template._fields[name])
+            field_states[name] = dict(
+                (key, value) for key, value in vars(field).items()
+                if initial.get(key, _missing) is not value
+            )
+
+        attrs = dict(
+            (key, value) for key, value in vars(self).items()
+            if key != '_fields' and key not in self._fields
+        )
+
+        return (_restore_form, (type(self), attrs, field_states))
+
+    @classmethod
+    def _pickle_template(cls):
+        """
+        Return the (unbound) instance to compare pickled forms with.
+        """
+        template = cls.__dict__.get('_template')
+
+        if template is None:
+            template = cls()
+            cls._template = template
+
+        return template
+
+
+def document_form_class(
+        document_class, fields=None, exclude=None, compiled=False,
+        reference_labels=None):
+    """
+    Return a generated form class for ``document_class``.
+
+    The class is created once per set of arguments and shared afterwards.
+    It is used to unpickle form classes which can't be imported (e.g.
+    created within a function or the forms of embedded documents): these
+    are pickled by reference to their document class, ``fields`` and
+    ``exclude``, and rebuilt with this function. Such a class can't declare
+    fields or methods (e.g. ``validate_<name>``), as these would be lost.
+
+    :param document_class:
+        The Mongoengine document class.
+
+    :param fields:
+        The fields to include (optional).
+
+    :param exclude:
+        The fields to exclude (optional).
+
+    :param compiled:
+        Validate the form with a generated function.
+
+    :param reference_labels:
+        A ``dict`` mapping reference fields to their label field (optional).
+
+    :return:
+        A :py:class:`.DocumentForm` subclass.
+
+    """
+    key = (
+        document_class,
+        tuple(fields) if fields is not None else None,
+        tuple(exclude) if exclude is not None else None,
+        compiled,
+        tuple(sorted((reference_labels or {}).items())),
+    )
+
+    form_class = _form_classes.get(key)
+    if form_class is not None:
+        return form_class
+
+    with _form_classes_lock:
+        form_class = _form_classes.get(key)
+        if form_class is None:
+            meta = type('Meta', (object,), {
+                'document_class': document_class,
+                'fields': key[1],
+                'exclude': key[2],
+                'compiled': compiled,
+                'reference_labels': dict(key[4]),
+            })
+            form_class = DocumentFormMetaClass(
+                '{0}Form'.format(document_class.__name__),
+                (DocumentForm,),
+                {'Meta': meta, '__module__': __name__}
+            )
+            _form_classes[key] = form_class
+
+    return form_class
+
+
+def _reduce_form_class(form_class):
+    """
+    Pickle ``form_class`` by name when importable, else by its document.
+    """
+    module = sys.modules.get(form_class.__module__)
+    if getattr(module, form_class.__name__, None) is form_class:
+        return form_class.__name__
+
+    if form_class._document_meta is None:
+        raise pickle.PicklingError(
+            "Can't pickle {0!r}: it's not importable and has no "
+            "document class.".format(form_class))
+
+    for klass in form_class.__mro__:
+        if klass in DocumentForm.__mro__:
+            continue
+
+        declared = vars(klass).get('_declared_names')
+        if declared is None:
+            # a mixin class
+            declared = [
+                name for name in vars(klass) if not name.startswith('__')]
+
+        if declared:
+            raise pickle.PicklingError(
+                "Can't pickle {0!r}: it's not importable and {1!r} declares "
+                "{2}, which would be lost.".format(
+                    form_class, klass, ', '.join(sorted(declared))))
+
+    document_class, fields, exclude = form_class._document_meta
+    return (
+        document_form_class,
+        (document_class, fields, exclude, form_class._compiled,
+         form_class._reference_labels)
+    )
+
+
+copy_reg.pickle(DocumentFormMetaClass, _reduce_form_class)
+
+
+def _restore_form(form_class, attrs, field_states):
+    """
+    Return an instance of ``form_class`` with the pickled state.
+    """
+    form = form_class(prefix=attrs.get('_prefix', ''))
+
+    for name, state in field_states.items():
+        vars(form._fields[name]).update(state)
+    vars(form).update(attrs)
+
+    return form
+
+
+_missing = object()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# the number of threads of the pool used by ``async_validate``
+VALIDATION_THREADS = 16
+
+
+def _validation_pool():
+    """
+    Return the shared thread pool of ``async_validate``.
+    """
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPool(VALIDATION_THREADS)
+
+    return _pool
+
+
+# without a timeout, ``AsyncResult.get`` can't be interrupted
+_FOREVER = 60 * 60 * 24 * 365
+
+
+def _wait(result, deadline):
+    """
+    Return the value of the async ``result``, waiting until ``deadline``.
+    """
+    if deadline is None:
+        return result.get(_FOREVER)
+    return result.get(max(0, deadline - default_timer()))
+
+
+def _lookup_reference(field):
+    """
+    Look up the submitted document of a ``ReferenceSelectField``.
+    """
+    return field.lookup(field._formdata)
+
+
+def _run_blocking_validator(validator, form, field):
+    """
+    Run ``validator``, returning its error message (or ``None``).
+    """
+    try:
+        validator(form, field)
+    except validators.StopValidation as e:
+        if e.args and e.args[0]:
+            return e.args[0]
+    except ValueError as e:
+        return e.args[0]
+
+    return None
+
+
+def _is_number(value):
+    return isinstance(value, (int, long, float)) and \
+        not isinstance(value, bool)
+
+
+def _json_integer(field, value):
+    if _is_number(value) and \
+            not (isinstance(value, float) and not value.is_integer()):
+        # an integral float (e.g. ``3.0``) is an integer, ``3.7`` is not
+        return int(value)
+    elif isinstance(value, basestring):
+        return _missing
+    raise ValueError(field.gettext('Not a valid integer value'))
+
+
+def _json_float(field, value):
+    if _is_number(value):
+        return float(value)
+    elif isinstance(value, basestring):
+        return _missing
+    raise ValueError(field.gettext('Not a valid float value'))
+
+
+def _json_decimal(field, value):
+    if isinstance(value, float):
+        # the shortest representation, as the string of the JSON number
+        return decimal.Decimal(repr(value))
+    elif _is_number(value):
+        return decimal.Decimal(value)
+    elif isinstance(value, basestring):
+        return _missing
+    raise ValueError(field.gettext('Not a valid decimal value'))
+
+
+def _json_boolean(field, value):
+    if isinstance(value, bool):
+        return value
+    elif isinstance(value, basestring):
+        return _missing
+    raise ValueError(field.gettext('Not a valid boolean value.'))
+
+
+def _json_datetime(field, value):
+    if isinstance(value, datetime.datetime):
+        return value
+    elif isinstance(value, basestring):
+        return _missing
+    raise ValueError(field.gettext('Not a valid datetime value'))
+
+
+def _json_text(field, value):
+    if isinstance(value, basestring):
+        return value
+    raise ValueError(field.gettext('Not a valid string value.'))
+
+
+def _json_point(field, value):
+    if isinstance(value, (list, tuple)) and len(value) == 2 and \
+            all(_is_number(v) for v in value):
+        return field.point(float(value[0]), float(value[1]))
+    elif isinstance(value, basestring):
+        return _missing
+    raise ValueError(field.gettext('Not a valid coordinate pair.'))
+
+
+# the coercion of JSON values by field class, returning ``_missing`` for a
+# value which has to be processed as form data and raising ``ValueError``
+# for a value of the wrong type
+_json_coercions = {
+    fields.IntegerField: _json_integer,
+    fields.FloatField: _json_float,
+    fields.DecimalField: _json_decimal,
+    fields.BooleanField: _json_boolean,
+    fields.DateTimeField: _json_datetime,
+    fields.TextField: _json_text,
+    GeoPointFormField: _json_point,
+}
+
+
+def _process_typed(field, value, typed, object_data, error=None):
+    """
+    Process ``field`` like ``Field.process`` would for the form data
+    ``value``, coerced into ``typed``. An ``error`` is reported as a
+    processing error, like a ``ValueError`` of ``process_formdata``.
+    """
+    if object_data is _unset_value:
+        object_data = field.default
+        if callable(object_data):
+            object_data = object_data()
+
+    field.process_errors = []
+    field.object_data = object_data
+    field.raw_data = [value]
+    field.data = typed
+
+    if error is not None:
+        field.process_errors.append(error)
+
+    for filter in field.filters:
+        try:
+            field.data = filter(field.data)
+        except ValueError as e:
+            field.process_errors.append(e.args[0])
+
+
+def _flatten(record, prefix=''):
+    """
+    Map the nested objects and lists of ``record`` on form data names.
+
+    Other values are replaced by their text, booleans by ``'true'`` and
+    ``'false'`` (as a form data ``False`` would be a checked checkbox).
+    ``null`` values are left out.
+    """
+    if not prefix and all(
+            isinstance(v, basestring) for v in record.values()):
+        return record
+
+    data = {}
+    for key, value in record.items():
+        name = prefix + unicode(key)
+
+        if isinstance(value, dict):
+            data.update(_flatten(value, name + '-'))
+        elif isinstance(value, list):
+            data.update(_flatten(dict(enumerate(value)), name + '-'))
+        elif isinstance(value, bool):
+            data[name] = u'true' if value else u'false'
+        elif isinstance(value, float):
+            data[name] = unicode(repr(value))
+        elif isinstance(value, basestring):
+            data[name] = value
+        elif value is not None:
+            data[name] = unicode(value)
+
+    return data
+
+
+class _Holder(object):
+    pass
+
+
+class _RowData(dict):
+    """
+    ``dict`` exposing the ``getlist`` method WTForms expects of form data.
+    """
+    def getlist(self, key):
+        value = self[key]
+        if isinstance(value, (list, tuple)):
+            return value
+        return [value]
+
+
+def _validate_chunk(args):
+    """
+    Validate a chunk of rows (the process pool worker of ``bulk_validate``).
+    """
+    form_class, rows = args
+    return form_class._validate_rows(rows)
+
+
+def _populated_value(field, name):
+    """
+    Return the value ``field`` would populate an object with.
+    """
+    holder = _Holder()
+    field.populate_obj(holder, name)
+    return getattr(holder, name)
@@ -0,0 +1,121 @@
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+MIN_LATITUDE = -90.0
+MAX_LATITUDE = 90.0
+MIN_LONGITUDE = -180.0
+MAX_LONGITUDE = 180.0
+
+_NAN = float('nan')
+
+
+def valid_point(latitude, longitude):
+    """
+    Return ``True`` when ``latitude`` and ``longitude`` are within range.
+
+    ``NaN`` and infinite values are not within range.
+    """
+    return (
+        MIN_LATITUDE <= latitude <= MAX_LATITUDE and
+        MIN_LONGITUDE <= longitude <= MAX_LONGITUDE
+    )
+
+
+def validate_points(points, use_numpy=None):
+    """
+    Validate many ``(latitude, longitude)`` points in one pass.
+
+    Instead of processing a form per point, the coordinates are parsed into
+    array-backed storage and range-checked in bulk: with NumPy (when
+    installed) the check is vectorized, else the points are stored in an
+    ``array('d')``.
+
+    :param points:
+        An iterable of ``(latitude, longitude)`` pairs, a flat
+        ``array('d')`` of alternating latitudes and longitudes, or a NumPy
+        array of shape ``(n, 2)``.
+
+    :param use_numpy:
+        Use NumPy. By default it is used when installed.
+
+    :return:
+        A ``(coordinates, invalid)`` tuple. ``coordinates`` is a NumPy array
+        of shape ``(n, 2)`` or a flat ``array('d')``, in which a point which
+        could not be parsed is ``NaN``. ``invalid`` is a ``list`` of the
+        indexes of the invalid points.
+
+    """
+    if use_numpy is None:
+        use_numpy = numpy is not None
+
+    if use_numpy:
+        if numpy is None:
+            raise ImportError('NumPy is not installed.')
+
+        try:
+            return _validate_numpy(points)
+        except (TypeError, ValueError):
+            # not numeric, let the array path sort out which points
+            pass
+
+    return _validate_array(points)
+
+
+def _validate_numpy(points):
+    coordinates = numpy.asarray(points, dtype=float)
+
+    if coordinates.ndim == 1:
+        coordinates = coordinates.reshape(-1, 2)
+    if coordinates.ndim != 2 or coordinates.shape[1] != 2:
+        raise ValueError('Points must be pairs of coordinates.')
+
+    latitudes = coordinates[:, 0]
+    longitudes = coordinates[:, 1]
+
+    # comparisons with NaN are false, so NaN points are invalid
+    valid = (
+        (latitudes >= MIN_LATITUDE) & (latitudes <= MAX_LATITUDE) &
+        (longitudes >= MIN_LONGITUDE) & (longitudes <= MAX_LONGITUDE)
+    )
+
+    return coordinates, numpy.flatnonzero(~valid).tolist()
+
+
+def _validate_array(points):
+    if isinstance(points, array):
+        if len(points) % 2:
+            raise ValueError('Points must be pairs of coordinates.')
+
+        coordinates = points if points.typecode == 'd' \
+            else array('d', points)
+        invalid = [
+            index for index in xrange(len(coordinates) // 2)
+            if not valid_point(
+                coordinates[2 * index], coordinates[2 * index + 1])
+        ]
+        return coordinates, invalid
+
+    coordinates = array('d')
+    append = coordinates.append
+    invalid = []
+
+    for index, point in enumerate(points):
+        try:
+            latitude, longitude = point
+            latitude = float(latitude)
+            longitude = float(longitude)
+        except (TypeError, ValueError):
+            latitude = longitude = _NAN
+
+        append(latitude)
+        append(longitude)
+
+        if not valid_point(latitude, longitude):
+            invalid.append(index)
+
+    return coordinates, invalid
@@ -0,0 +1,308 @@
+import csv
+import json
+
+from mongoengine.errors import OperationError, ValidationError
+
+
+# key of the errors which don't belong to a field
+RECORD_ERRORS = '__record__'
+
+
+class Ingestion(object):
+    """
+    Streaming import of records through a :py:class:`.DocumentForm`.
+
+    The records are parsed, validated and converted into documents one at
+    a time, with a single form instance. The valid documents are inserted
+    in chunks of ``chunk_size`` with a bulk insert, so the memory use does
+    not depend on the number of records.
+
+    Usage example::
+
+        ingestion = Ingestion(UserForm, chunk_size=1000)
+
+        with open('users.ndjson') as f:
+            for line, errors in ingestion.run(f):
+                log.warning('line %d: %r', line, errors)
+
+        log.info('%(inserted)d users inserted', ingestion.counters)
+
+    .. note::
+        The ``validate`` / ``clean`` methods of the documents are only
+        called with ``validate_documents``, make sure the form covers the
+        required fields otherwise.
+
+    :param form_class:
+        The :py:class:`.DocumentForm` class to validate the records with.
+
+    :param chunk_size:
+        The number of documents to insert at once.
+
+    :param write_concern:
+        The write concern of the inserts (optional).
+
+    :param validate_documents:
+        Validate the documents before inserting them.
+
+    """
+    #: The supported formats.
+    formats = ('ndjson', 'csv', 'records')
+
+    def __init__(self, form_class, chunk_size=1000, write_concern=None,
+                 validate_documents=False):
+        self.form_class = form_class
+        self.document_class = form_class._document_meta[0]
+        self.chunk_size = chunk_size
+        self.write_concern = write_concern
+        self.validate_documents = validate_documents
+        self.reset()
+
+    def reset(self):
+        """
+        Reset :py:attr:`counters`.
+
+        The counters are a ``dict`` with the number of records ``read``, the
+        number of ``invalid`` records, the number of documents ``inserted``
+        and ``failed`` to insert, and the number of ``chunks`` inserted.
+        """
+        self.counters = dict.fromkeys(
+            ('read', 'invalid', 'inserted', 'failed', 'chunks'), 0)
+
+    def run(self, source, format='ndjson', encoding='utf-8'):
+        """
+        Import the records of ``source``.
+
+        :param source:
+            A file or an iterable of lines, or for the ``records`` format an
+            iterable of ``dict`` objects.
+
+        :param format:
+            ``'ndjson'`` (a JSON object per line), ``'csv'`` (with a header
+            row) or ``'records'``. Nested objects and lists are mapped on
+            the form data names (e.g. ``address-city`` and ``tags-0``).
+
+        :param encoding:
+            The encoding of the CSV data.
+
+        :return:
+            A generator yielding a ``(number, errors)`` tuple for every
+            record which was not inserted. ``number`` is the line number of
+            the record (its position for ``records``), ``errors`` a ``dict``
+            like :py:attr:`!wtforms.form.Form.errors`. Errors of the record
+            as a whole (e.g. invalid JSON, or an exception raised while
+            validating it) are under :py:data:`RECORD_ERRORS`.
+
+        """
+        if format not in self.formats:
+            raise ValueError('Unknown format: {0!r}.'.format(format))
+
+        records = getattr(self, 'parse_{0}'.format(format))
+        if format == 'csv':
+            records = records(source, encoding)
+        else:
+            records = records(source)
+
+        return self._run(records)
+
+    def _run(self, records):
+        counters = self.counters
+        form = self.form_class()
+        chunk = []
+
+        # the unique fields are checked per chunk, see ``insert``
+        form._defer_unique = True
+        unique = bool(form.unique_validators())
+
+        for number, record, errors in records:
+            counters['read'] += 1
+
+            if errors is None:
+                try:
+                    errors = self.validate(form, record)
+
+                    if errors is None:
+                        document = self.document_class()
+                        form.populate_obj(document)
+                        errors = self.validate_document(document)
+                except Exception as e:
+                    # a single bad record does not stop the import
+                    errors = {RECORD_ERRORS: [
+                        u'{0}: {1}'.format(type(e).__name__, e)]}
+
+            if errors is not None:
+                counters['invalid'] += 1
+                yield number, errors
+                continue
+
+            keys = form.unique_keys() if unique else None
+            chunk.append((number, document, keys))
+            if len(chunk) >= self.chunk_size:
+                for error in self.insert(chunk, form):
+                    yield error
+                chunk = []
+
+        if chunk:
+            for error in self.insert(chunk, form):
+                yield error
+
+    def validate(self, form, record):
+        """
+        Validate ``record`` with ``form`` (see
+        :py:meth:`.DocumentForm.process_json`).
+
+        :return:
+            ``None`` when valid, else the ``dict`` of errors.
+
+        """
+        form.process_json(record)
+        if form.validate():
+            return None
+        return form.errors
+
+    def validate_document(self, document):
+        """
+        Validate ``document``, when :py:attr:`validate_documents` is set.
+
+        :return:
+            ``None`` when valid, else the ``dict`` of errors.
+
+        """
+        if not self.validate_documents:
+            return None
+
+        try:
+            document.validate()
+        except ValidationError as e:
+            return dict(
+                (name, [unicode(error)])
+                for name, error in (e.errors or {}).items()
+            ) or {RECORD_ERRORS: [unicode(e)]}
+
+        return None
+
+    def insert(self, chunk, form):
+        """
+        Insert the documents of ``chunk`` with a single bulk insert.
+
+        The unique fields are checked first, with a query per field for the
+        whole chunk. The documents with a duplicate value are left out.
+
+        :param chunk:
+            A ``list`` of ``(number, document, unique keys)`` tuples.
+
+        :param form:
+            The form instance the documents were validated with.
+
+        :return:
+            A generator yielding a ``(number, errors)`` tuple per document
+            which was not inserted.
+
+        """
+        unique_errors = {}
+
+        for name, validator in form.unique_validators():
+            keys = [
+                (index, entry[2][name]) for index, entry in enumerate(chunk)
+                if entry[2] and name in entry[2]
+            ]
+            for index, message in validator.batch_errors(keys).items():
+                unique_errors.setdefault(index, {})[name] = [message]
+
+        if unique_errors:
+            self.counters['invalid'] += len(unique_errors)
+            for index in sorted(unique_errors):
+                yield chunk[index][0], unique_errors[index]
+
+            chunk = [
+                entry for index, entry in enumerate(chunk)
+                if index not in unique_errors
+            ]
+            if not chunk:
+                return
+
+        documents = [entry[1] for entry in chunk]
+
+        try:
+            self.document_class.objects.insert(
+                documents, load_bulk=False, write_concern=self.write_concern)
+        except OperationError as e:
+            # the whole chunk is reported, as it is unknown which documents
+            # were written before the error
+            self.counters['failed'] += len(chunk)
+            errors = [unicode(e)]
+            for entry in chunk:
+                yield entry[0], {RECORD_ERRORS: errors}
+        else:
+            self.counters['inserted'] += len(chunk)
+            self.counters['chunks'] += 1
+
+    def parse_ndjson(self, lines):
+        """
+        Parse the JSON objects in ``lines``, skipping blank lines.
+
+        :return:
+            A generator yielding ``(number, record, errors)`` tuples.
+
+        """
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, None, {
+                    RECORD_ERRORS: [u'Invalid JSON: {0}'.format(e)]}
+                continue
+
+            if not isinstance(record, dict):
+                yield number, None, {
+                    RECORD_ERRORS: [u'Record is not an object.']}
+                continue
+
+            yield number, record, None
+
+    def parse_csv(self, lines, encoding='utf-8'):
+        """
+        Parse the CSV rows in ``lines``, the first row being the header.
+
+        :return:
+            A generator yielding ``(number, record, errors)`` tuples.
+
+        """
+        reader = csv.reader(lines)
+
+        try:
+            header = [name.decode(encoding) for name in next(reader)]
+        except StopIteration:
+            return
+
+        for row in reader:
+            if not row:
+                continue
+
+            if len(row) != len(header):
+                yield reader.line_num, None, {RECORD_ERRORS: [
+                    u'Expected {0} columns, got {1}.'.format(
+                        len(header), len(row))]}
+                continue
+
+            try:
+                values = [value.decode(encoding) for value in row]
+            except UnicodeDecodeError as e:
+                yield reader.line_num, None, {RECORD_ERRORS: [unicode(e)]}
+                continue
+
+            yield reader.line_num, dict(zip(header, values)), None
+
+    def parse_records(self, records):
+        """
+        Pass on the ``dict`` objects of ``records``.
+
+        :return:
+            A generator yielding ``(number, record, errors)`` tuples.
+
+        """
+        for number, record in enumerate(records, 1):
+            yield number, record, None
+
@@ -0,0 +1,181 @@
+import threading
+from timeit import default_timer
+
+
+class Stats(object):
+    """
+    Collected conversion and validation timings.
+
+    conversions
+        A ``dict`` mapping ``(document name, field name)`` to a
+        ``[count, cumulative seconds]`` list.
+
+    validators
+        A ``dict`` mapping ``(form name, field name, validator name)`` to a
+        ``[calls, cumulative seconds]`` list.
+
+    """
+    def __init__(self):
+        self.conversions = {}
+        self.validators = {}
+        self._lock = threading.Lock()
+
+    def _add(self, stats, key, seconds):
+        with self._lock:
+            entry = stats.get(key)
+            if entry is None:
+                stats[key] = [1, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+
+    def add_conversion(self, document_name, field_name, seconds):
+        self._add(self.conversions, (document_name, field_name), seconds)
+
+    def add_validator(self, form_name, field_name, validator_name, seconds):
+        self._add(
+            self.validators,
+            (form_name, field_name, validator_name),
+            seconds
+        )
+
+    def reset(self):
+        """
+        Clear the collected timings.
+        """
+        with self._lock:
+            self.conversions.clear()
+            self.validators.clear()
+
+    def as_dict(self):
+        """
+        Return the timings as a JSON serializable ``dict``.
+
+        :return:
+            A ``dict`` with ``conversions`` and ``validators`` lists of
+            ``dict`` objects.
+
+        """
+        with self._lock:
+            return {
+                'conversions': [
+                    {
+                        'document': document_name,
+                        'field': field_name,
+                        'count': count,
+                        'seconds': seconds,
+                    }
+                    for (document_name, field_name), (count, seconds)
+                    in sorted(self.conversions.items())
+                ],
+                'validators': [
+                    {
+                        'form': form_name,
+                        'field': field_name,
+                        'validator': validator_name,
+                        'calls': calls,
+                        'seconds': seconds,
+                    }
+                    for (form_name, field_name, validator_name),
+                    (calls, seconds) in sorted(self.validators.items())
+                ],
+            }
+
+
+class Instrumentation(object):
+    """
+    Opt-in timing of field conversion and validation.
+
+    While disabled (the default), the converter and forms only check the
+    :py:attr:`enabled` flag. Once enabled, the timings are added to
+    :py:attr:`stats` and passed to the callbacks.
+
+    A callback is called as ``callback(metric, tags, seconds)``, ``metric``
+    being ``'wtfmongoengine.convert'`` or ``'wtfmongoengine.validator'`` and
+    ``tags`` a ``dict`` (``document`` and ``field``, or ``form``, ``field``
+    and ``validator``). This maps directly on statsd-style timers.
+
+    Documents and forms are named by their module-qualified class name
+    (e.g. ``'myapp.models.Post'``), so same-named classes of different
+    modules are timed separately.
+
+    """
+    def __init__(self):
+        self.enabled = False
+        self.stats = Stats()
+        self.callbacks = []
+
+    def enable(self, callback=None):
+        """
+        Enable the instrumentation.
+
+        :param callback:
+            A callback to add (optional).
+
+        """
+        if callback is not None and callback not in self.callbacks:
+            self.callbacks.append(callback)
+        self.enabled = True
+
+    def disable(self):
+        """
+        Disable the instrumentation and remove the callbacks.
+        """
+        self.enabled = False
+        self.callbacks = []
+
+    def record_conversion(self, document_class, field_name, seconds):
+        document_name = _qualified_name(document_class)
+        self.stats.add_conversion(document_name, field_name, seconds)
+
+        for callback in self.callbacks:
+            callback('wtfmongoengine.convert', {
+                'document': document_name,
+                'field': field_name,
+            }, seconds)
+
+    def record_validator(self, form, field, validator, seconds):
+        form_name = _qualified_name(type(form))
+        validator_name = type(validator).__name__
+        self.stats.add_validator(
+            form_name, field.short_name, validator_name, seconds)
+
+        for callback in self.callbacks:
+            callback('wtfmongoengine.validator', {
+                'form': form_name,
+                'field': field.short_name,
+                'validator': validator_name,
+            }, seconds)
+
+    def timed_validators(self, field):
+        """
+        Return the validators of ``field``, wrapped for timing.
+        """
+        return [_TimedValidator(self, v) for v in field.validators]
+
+
+def _qualified_name(klass):
+    """
+    Return the module-qualified name of ``klass``.
+    """
+    return '{0}.{1}'.format(klass.__module__, klass.__name__)
+
+
+class _TimedValidator(object):
+    """
+    Validator proxy which records the time spent in ``validator``.
+    """
+    def __init__(self, instrumentation, validator):
+        self.instrumentation = instrumentation
+        self.validator = validator
+
+    def __call__(self, form, field):
+        start = default_timer()
+        try:
+            return self.validator(form, field)
+        finally:
+            self.instrumentation.record_validator(
+                form, field, self.validator, default_timer() - start)
+
+
+instrumentation = Instrumentation()
@@ -0,0 +1,366 @@
+"""
+Benchmark suite for the class creation, conversion, instantiation and
+validation hot paths.
+
+Run it with::
+
+    python -m wtfmongoengine.tests.benchmark.suite --output results.json
+
+and compare the results of two commits with::
+
+    python -m wtfmongoengine.tests.benchmark.suite --compare old.json new.json
+
+No database connection is needed.
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+
+import mongoengine
+import wtforms
+from mongoengine.document import Document, EmbeddedDocument
+from mongoengine import fields
+
+from wtfmongoengine.cache import conversion_cache
+from wtfmongoengine.forms import DocumentFieldConverter, DocumentForm, _RowData
+
+
+class BenchmarkEmbedded(EmbeddedDocument):
+    street = fields.StringField(max_length=100)
+    city = fields.StringField(max_length=100)
+
+
+class BenchmarkReferenced(Document):
+    name = fields.StringField()
+
+
+# field factories by name, used for generating documents
+FIELD_FACTORIES = (
+    ('stringfield', lambda: fields.StringField(
+        max_length=50, min_length=1, regex=r'^[\w ]+$', required=True)),
+    ('urlfield', lambda: fields.URLField()),
+    ('emailfield', lambda: fields.EmailField(required=True)),
+    ('intfield', lambda: fields.IntField(min_value=0, max_value=1000)),
+    ('floatfield', lambda: fields.FloatField(min_value=0)),
+    ('decimalfield', lambda: fields.DecimalField()),
+    ('datetimefield', lambda: fields.DateTimeField()),
+    ('booleanfield', lambda: fields.BooleanField()),
+    ('listfield', lambda: fields.ListField(fields.StringField())),
+    ('sortedlistfield', lambda: fields.SortedListField(fields.IntField())),
+    ('embeddeddocumentfield', lambda: fields.EmbeddedDocumentField(
+        BenchmarkEmbedded)),
+    ('referencefield', lambda: fields.ReferenceField(BenchmarkReferenced)),
+)
+
+# sample form values for the fields of ``FIELD_FACTORIES``
+FIELD_VALUES = {
+    'stringfield': 'Some text',
+    'urlfield': 'http://example.com/',
+    'emailfield': 'user@example.com',
+    'intfield': '42',
+    'floatfield': '4.2',
+    'decimalfield': '4.20',
+    'datetimefield': '2012-01-01 12:00:00',
+    'booleanfield': 'y',
+}
+
+
+def make_documents(count, field_count=20):
+    """
+    Return ``count`` document classes with ``field_count`` fields each.
+    """
+    documents = []
+
+    for i in range(count):
+        attrs = dict(
+            ('field_{0}'.format(j), fields.StringField(
+                max_length=50, required=True))
+            for j in range(field_count)
+        )
+        documents.append(
+            type('Document{0}'.format(i), (Document,), attrs))
+
+    return documents
+
+
+def make_forms(documents, lazy=False, compiled=False):
+    """
+    Return a form class for each document in ``documents``.
+    """
+    forms = []
+
+    for document_class in documents:
+        meta = type('Meta', (object,), {
+            'document_class': document_class,
+            'lazy': lazy,
+            'compiled': compiled,
+        })
+        forms.append(type(
+            '{0}Form'.format(document_class.__name__),
+            (DocumentForm,),
+            {'Meta': meta}
+        ))
+
+    return forms
+
+
+def make_mixed_document(field_count, field_types=None):
+    """
+    Return a document class with ``field_count`` fields of mixed types.
+
+    :param field_types:
+        The names of the field factories to cycle through (optional, all by
+        default).
+
+    """
+    factories = [
+        factory for name, factory in FIELD_FACTORIES
+        if field_types is None or name in field_types
+    ]
+    attrs = dict(
+        ('field_{0}'.format(i), factories[i % len(factories)]())
+        for i in range(field_count)
+    )
+    return type('Mixed{0}Document'.format(field_count), (Document,), attrs)
+
+
+# sample JSON values for the fields of ``FIELD_VALUES``
+JSON_VALUES = {
+    'intfield': 42,
+    'floatfield': 4.2,
+    'decimalfield': 4.2,
+    'booleanfield': True,
+}
+
+
+def make_json(document_class):
+    """
+    Return valid JSON data for the simple fields of ``document_class``.
+    """
+    data = {}
+
+    for name, field in document_class._fields.items():
+        field_type = type(field).__name__.lower()
+        value = JSON_VALUES.get(field_type, FIELD_VALUES.get(field_type))
+        if value is not None:
+            data[name] = value
+
+    return data
+
+
+def make_formdata(document_class):
+    """
+    Return valid form data for the simple fields of ``document_class``.
+    """
+    formdata = _RowData()
+
+    for name, field in document_class._fields.items():
+        value = FIELD_VALUES.get(type(field).__name__.lower())
+        if value is not None:
+            formdata[name] = value
+
+    return formdata
+
+
+def best_of(func, number, repeat):
+    """
+    Return the best time per call of ``func`` in seconds.
+    """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def bench_class_creation(field_counts=(10, 100, 1000), repeat=3):
+    """
+    Time the creation of a ``DocumentForm`` class (metaclass conversion).
+    """
+    results = {}
+
+    for field_count in field_counts:
+        document_class = make_mixed_document(field_count)
+        meta = type('Meta', (object,), {'document_class': document_class})
+
+        def create():
+            conversion_cache.invalidate(document_class)
+            type('BenchmarkForm', (DocumentForm,), {'Meta': meta})
+
+        results[str(field_count)] = best_of(create, 1, repeat)
+
+    return results
+
+
+def bench_startup(form_count=100, repeat=3):
+    """
+    Time defining ``form_count`` form classes, eager and with ``lazy``, and
+    the first use of a lazy form class.
+    """
+    documents = make_documents(form_count)
+
+    def create(lazy):
+        for document_class in documents:
+            conversion_cache.invalidate(document_class)
+        return make_forms(documents, lazy=lazy)
+
+    def first_use():
+        conversion_cache.invalidate(documents[0])
+        make_forms(documents[:1], lazy=True)[0]()
+
+    return {
+        'eager': best_of(lambda: create(False), 1, repeat),
+        'lazy': best_of(lambda: create(True), 1, repeat),
+        'lazy_first_use': best_of(first_use, 1, repeat),
+    }
+
+
+def bench_convert(number=1000, repeat=3):
+    """
+    Time ``DocumentFieldConverter.convert`` per field type.
+    """
+    results = {}
+    document_class = make_mixed_document(len(FIELD_FACTORIES))
+    converter = DocumentFieldConverter(document_class)
+
+    for name, field in document_class._fields.items():
+        if name == 'id':
+            continue
+
+        results[type(field).__name__.lower()] = best_of(
+            lambda: converter.convert(field), number, repeat)
+
+    return results
+
+
+def bench_instantiation(field_count=100, number=100, repeat=3):
+    """
+    Time instantiating a form, without data, with form data and with JSON
+    data (wrapped as form data, or passed to ``from_json``).
+    """
+    document_class = make_mixed_document(
+        field_count, field_types=FIELD_VALUES.keys())
+    form_class = make_forms([document_class])[0]
+    formdata = make_formdata(document_class)
+    data = make_json(document_class)
+
+    def json_formdata():
+        return form_class(_RowData(
+            (name, unicode(value)) for name, value in data.items()))
+
+    return {
+        'empty': best_of(lambda: form_class(), number, repeat),
+        'formdata': best_of(lambda: form_class(formdata), number, repeat),
+        'json_formdata': best_of(json_formdata, number, repeat),
+        'from_json': best_of(
+            lambda: form_class.from_json(data), number, repeat),
+    }
+
+
+def bench_validate(field_count=20, rows=1000, repeat=3):
+    """
+    Measure the ``validate()`` throughput in forms per second.
+    """
+    document_class = make_mixed_document(
+        field_count, field_types=FIELD_VALUES.keys())
+    form_class = make_forms([document_class])[0]
+    formdata = make_formdata(document_class)
+    row_list = [dict(formdata) for i in range(rows)]
+    form = form_class(formdata)
+    compiled_form = make_forms([document_class], compiled=True)[0](formdata)
+
+    return {
+        'validate': 1 / best_of(form.validate, rows, repeat),
+        'validate_compiled': 1 / best_of(
+            compiled_form.validate, rows, repeat),
+        'instantiate_validate': 1 / best_of(
+            lambda: form_class(formdata).validate(), rows, repeat),
+        'bulk_validate': rows / best_of(
+            lambda: form_class.bulk_validate(row_list), 1, repeat),
+    }
+
+
+def run(scale=1.0):
+    """
+    Run all benchmarks.
+
+    :param scale:
+        Multiplier for the number of iterations and repetitions, use a small
+        value for a quick (less accurate) run. The measured sizes (e.g. the
+        field counts) are not scaled, so the metrics stay comparable.
+
+    :return:
+        A ``dict`` with the environment and the results per phase. Times are
+        in seconds per call, throughputs in calls per second.
+
+    """
+    def scaled(value):
+        return max(1, int(value * scale))
+
+    repeat = scaled(3)
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'wtforms': wtforms.__version__,
+            'mongoengine': '.'.join(str(v) for v in mongoengine.VERSION),
+        },
+        'class_creation': bench_class_creation(repeat=repeat),
+        'startup': bench_startup(repeat=repeat),
+        'convert': bench_convert(number=scaled(1000), repeat=repeat),
+        'instantiation': bench_instantiation(
+            number=scaled(100), repeat=repeat),
+        'validate': bench_validate(rows=scaled(1000), repeat=repeat),
+    }
+
+
+def compare(old, new):
+    """
+    Compare two benchmark results.
+
+    :return:
+        A ``dict`` mapping ``phase.metric`` to the ratio ``new / old``. For
+        times a ratio above 1 is a regression, for throughputs (phase
+        ``validate``) a ratio below 1 is.
+
+    """
+    ratios = {}
+
+    for phase, metrics in new.items():
+        if phase == 'environment':
+            continue
+
+        for metric, value in metrics.items():
+            old_value = old.get(phase, {}).get(metric)
+            if old_value:
+                ratios['{0}.{1}'.format(phase, metric)] = value / old_value
+
+    return ratios
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument(
+        '--scale', type=float, default=1.0,
+        help='multiplier for the number of iterations')
+    parser.add_argument(
+        '--compare', nargs=2, metavar=('OLD', 'NEW'),
+        help='compare two result files')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as old, open(args.compare[1]) as new:
+            result = compare(json.load(old), json.load(new))
+    else:
+        result = run(args.scale)
+
+    output = json.dumps(result, indent=2, sort_keys=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
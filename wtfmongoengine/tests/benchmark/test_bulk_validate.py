@@ -0,0 +1,83 @@
+import mock
+import unittest2 as unittest
+
+from mongoengine.document import Document
+from mongoengine import fields
+
+from wtfmongoengine.forms import DocumentForm, _RowData
+
+
+class ImportDocument(Document):
+    name = fields.StringField(required=True, max_length=50)
+    email = fields.EmailField(required=True)
+    age = fields.IntField(min_value=0, max_value=150)
+    score = fields.FloatField()
+    active = fields.BooleanField()
+
+
+class ImportForm(DocumentForm):
+    class Meta:
+        document_class = ImportDocument
+
+
+def make_rows(count):
+    """
+    Return ``count`` rows, every tenth row being invalid.
+    """
+    return [
+        {
+            'name': 'Name {0}'.format(i),
+            'email': 'user{0}@example.com'.format(i) if i % 10 else 'invalid',
+            'age': str(i % 100),
+            'score': '1.5',
+            'active': 'y',
+        }
+        for i in range(count)
+    ]
+
+
+class BulkValidateTestCase(unittest.TestCase):
+    """
+    Test :py:meth:`.DocumentForm.bulk_validate`.
+    """
+    def test_bulk_validate(self):
+        """
+        Test that an error ``dict`` is returned per row.
+        """
+        results = ImportForm.bulk_validate(make_rows(20))
+
+        self.assertEqual(20, len(results))
+        self.assertEqual(
+            ['email'], list(results[0].keys()))
+        self.assertEqual(['email'], list(results[10].keys()))
+        self.assertEqual(18, results.count({}))
+
+    def test_bulk_validate_processes(self):
+        """
+        Test validating the rows in chunks by a process pool.
+        """
+        rows = make_rows(50)
+
+        self.assertEqual(
+            ImportForm.bulk_validate(rows),
+            ImportForm.bulk_validate(rows, processes=2, chunk_size=10)
+        )
+
+    def test_single_form(self):
+        """
+        Test that ``bulk_validate`` binds a single form for all the rows.
+        """
+        rows = make_rows(200)
+
+        naive_results = []
+        for row in rows:
+            form = ImportForm(_RowData(row))
+            naive_results.append({} if form.validate() else form.errors)
+
+        with mock.patch.object(
+                ImportForm, '__init__', autospec=True,
+                side_effect=ImportForm.__init__) as mock_init:
+            results = ImportForm.bulk_validate(rows)
+
+        self.assertEqual(naive_results, results)
+        self.assertEqual(1, mock_init.call_count)
@@ -0,0 +1,77 @@
+import mock
+import unittest2 as unittest
+
+from mongoengine.document import Document
+from mongoengine import fields
+
+from wtfmongoengine.forms import DocumentForm, _RowData
+
+
+class JSONBenchmarkDocument(Document):
+    name = fields.StringField(required=True, max_length=50)
+    count = fields.IntField(min_value=0)
+    ratio = fields.FloatField()
+    price = fields.DecimalField()
+    active = fields.BooleanField()
+    score = fields.IntField()
+    weight = fields.FloatField()
+    verified = fields.BooleanField()
+
+
+class JSONBenchmarkForm(DocumentForm):
+    class Meta:
+        document_class = JSONBenchmarkDocument
+
+
+PAYLOAD = {
+    'name': u'john',
+    'count': 42,
+    'ratio': 0.5,
+    'price': 9.95,
+    'active': True,
+    'score': 7,
+    'weight': 70.5,
+    'verified': False,
+}
+
+
+def wrap(data):
+    """
+    Return ``data`` as form data, the way a JSON payload is usually passed.
+    """
+    return _RowData(
+        (name, u'' if value is False else unicode(value))
+        for name, value in data.items()
+    )
+
+
+class FromJSONBenchmarkTestCase(unittest.TestCase):
+    """
+    Compare :py:meth:`.DocumentForm.from_json` with wrapping the JSON data.
+    """
+
+    def test_same_data(self):
+        """
+        Test that both paths result in the same data.
+        """
+        wrapped = JSONBenchmarkForm(wrap(PAYLOAD))
+        form = JSONBenchmarkForm.from_json(PAYLOAD)
+
+        self.assertTrue(form.validate())
+        self.assertEqual(wrapped.data, form.data)
+
+    def test_per_request(self):
+        """
+        Test that ``from_json`` skips the form data of a typed payload.
+        """
+        with mock.patch('wtfmongoengine.forms._flatten') as flatten:
+            form = JSONBenchmarkForm.from_json(PAYLOAD)
+
+        self.assertTrue(form.validate())
+        self.assertFalse(flatten.called)
+
+        with mock.patch(
+                'wtfmongoengine.forms._flatten', return_value={}) as flatten:
+            JSONBenchmarkForm.from_json(dict(PAYLOAD, count=u'42'))
+
+        self.assertEqual(1, flatten.call_count)
@@ -0,0 +1,62 @@
+from bson import BSON
+from mongoengine.document import Document
+from mongoengine import fields
+
+from wtfmongoengine.forms import DocumentForm
+from wtfmongoengine.tests.utils import MongomockTestCase
+
+
+class LoadBenchmarkTestCase(MongomockTestCase):
+    """
+    Compare the data decoded by :py:meth:`.DocumentForm.load` with loading
+    the whole document.
+    """
+    field_count = 50
+
+    def setUp(self):
+        super(LoadBenchmarkTestCase, self).setUp()
+
+        attrs = dict(
+            ('field_{0}'.format(i), fields.StringField())
+            for i in range(self.field_count)
+        )
+        wide_document = type('WideLoadDocument', (Document,), attrs)
+
+        class NarrowForm(DocumentForm):
+            class Meta:
+                document_class = wide_document
+                fields = ('field_0', 'field_1')
+
+        self.document = wide_document(**dict(
+            ('field_{0}'.format(i), 'x' * 1000)
+            for i in range(self.field_count)
+        )).save()
+        self.document_class = wide_document
+        self.form_class = NarrowForm
+        self.bytes_loaded = 0
+
+        from_son = wide_document._from_son.im_func
+
+        def wrapper(cls, son, *args, **kwargs):
+            self.bytes_loaded += len(BSON.encode(son))
+            return from_son(cls, son, *args, **kwargs)
+
+        wide_document._from_son = classmethod(wrapper)
+
+    def tearDown(self):
+        del self.document_class._from_son
+        super(LoadBenchmarkTestCase, self).tearDown()
+
+    def test_bytes_loaded(self):
+        """
+        Test that loading a form decodes a fraction of the document.
+        """
+        self.document_class.objects(pk=self.document.pk).first()
+        full_bytes = self.bytes_loaded
+
+        self.bytes_loaded = 0
+        form = self.form_class.load(self.document.pk)
+        form_bytes = self.bytes_loaded
+
+        self.assertEqual('x' * 1000, form.field_0.data)
+        self.assertLess(form_bytes * 20, full_bytes)
@@ -0,0 +1,57 @@
+import mock
+
+from mongoengine.document import Document
+from mongoengine import fields
+
+from wtfmongoengine.fields import ReferenceSelectField
+from wtfmongoengine.forms import DocumentForm
+from wtfmongoengine.tests.utils import DummyPostData, MongomockTestCase
+
+
+class ReferenceSelectBenchmarkTestCase(MongomockTestCase):
+    """
+    Tests validating a reference among many documents.
+    """
+    author_count = 500
+    submit_count = 10
+
+    def setUp(self):
+        super(ReferenceSelectBenchmarkTestCase, self).setUp()
+
+        class Author(Document):
+            name = fields.StringField()
+            biography = fields.StringField()
+
+        class Article(Document):
+            author = fields.ReferenceField(Author, required=True)
+
+        class ArticleForm(DocumentForm):
+            class Meta:
+                document_class = Article
+
+        Author.objects.insert([
+            Author(name='Author {0}'.format(i), biography='x' * 1000)
+            for i in range(self.author_count)
+        ])
+
+        self.author_class = Author
+        self.form_class = ArticleForm
+        self.pks = [unicode(pk) for pk in Author.objects.scalar('pk')]
+
+    def test_validate(self):
+        """
+        Test that validation does an ``_id`` lookup, without a choices scan.
+        """
+        pks = self.pks[-self.submit_count:]
+
+        with mock.patch.object(
+                ReferenceSelectField, 'iter_query') as iter_query, \
+                mock.patch.object(
+                    ReferenceSelectField, 'lookup', autospec=True,
+                    side_effect=ReferenceSelectField.lookup) as lookup:
+            for pk in pks:
+                form = self.form_class(DummyPostData(author=pk))
+                self.assertTrue(form.validate())
+
+        self.assertEqual(self.submit_count, lookup.call_count)
+        self.assertFalse(iter_query.called)
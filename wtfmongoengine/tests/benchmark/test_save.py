@@ -0,0 +1,94 @@
+from bson import BSON
+from mongoengine.document import Document
+from mongoengine import fields
+from wtforms.form import Form
+
+from wtfmongoengine.forms import DocumentForm
+from wtfmongoengine.tests.utils import DummyPostData, MongomockTestCase
+
+
+class BytesSentBenchmarkTestCase(MongomockTestCase):
+    """
+    Compare the bytes sent by :py:meth:`.DocumentForm.save` with a full save
+    of the document.
+
+    .. note::
+        Mongoengine itself only sends the changed fields of a document which
+        was loaded from the database, the baseline is a full save of a
+        document which was not (e.g. populated from an unbound form).
+    """
+    field_count = 50
+
+    def setUp(self):
+        super(BytesSentBenchmarkTestCase, self).setUp()
+
+        attrs = dict(
+            ('field_{0}'.format(i), fields.StringField())
+            for i in range(self.field_count)
+        )
+        attrs['tags'] = fields.ListField(fields.StringField())
+        wide_document = type('WideDocument', (Document,), attrs)
+
+        class WideForm(DocumentForm):
+            class Meta:
+                document_class = wide_document
+
+        self.document_class = wide_document
+        self.form_class = WideForm
+        self.bytes_sent = 0
+
+        collection = wide_document._get_collection()
+        for method_name in ('update', 'save', 'insert'):
+            self.record_bytes(collection, method_name)
+
+    def record_bytes(self, collection, method_name):
+        method = getattr(collection, method_name)
+
+        def wrapper(*args, **kwargs):
+            for arg in args:
+                if isinstance(arg, dict):
+                    self.bytes_sent += len(BSON.encode(arg))
+            return method(*args, **kwargs)
+
+        setattr(collection, method_name, wrapper)
+
+    def make_document(self):
+        data = dict(
+            ('field_{0}'.format(i), 'x' * 1000)
+            for i in range(self.field_count)
+        )
+        return self.document_class(tags=['a', 'b'], **data).save()
+
+    def make_formdata(self):
+        formdata = DummyPostData(
+            ('field_{0}'.format(i), 'x' * 1000)
+            for i in range(self.field_count)
+        )
+        formdata['field_0'] = 'changed'
+        formdata['tags-0'] = 'a'
+        formdata['tags-1'] = 'b'
+        return formdata
+
+    def test_bytes_sent(self):
+        """
+        Test that saving the changed fields sends a fraction of the bytes.
+        """
+        document = self.make_document()
+        form = self.form_class(self.make_formdata())
+        self.assertTrue(form.validate())
+
+        self.bytes_sent = 0
+        full_document = self.document_class(pk=document.pk)
+        Form.populate_obj(form, full_document)
+        full_document.save()
+        full_bytes = self.bytes_sent
+
+        document = self.make_document()
+        form = self.form_class(self.make_formdata(), obj=document)
+        self.assertTrue(form.validate())
+
+        self.bytes_sent = 0
+        form.save()
+        changed_bytes = self.bytes_sent
+
+        self.assertLess(changed_bytes * 100, full_bytes)
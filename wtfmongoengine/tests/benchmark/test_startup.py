@@ -0,0 +1,48 @@
+import mock
+import unittest2 as unittest
+
+from wtfmongoengine.forms import DocumentFieldConverter
+from wtfmongoengine.tests.benchmark.suite import (
+    bench_startup, make_documents, make_forms)
+
+
+class StartupBenchmarkTestCase(unittest.TestCase):
+    """
+    Compare form class creation with and without ``lazy``.
+    """
+    form_count = 100
+
+    def count_conversions(self, lazy):
+        documents = make_documents(self.form_count)
+        convert_fields = DocumentFieldConverter.convert_fields
+
+        with mock.patch.object(
+                DocumentFieldConverter, 'convert_fields', autospec=True,
+                side_effect=convert_fields) as mock_convert:
+            forms = make_forms(documents, lazy)
+
+        return mock_convert.call_count, forms
+
+    def test_lazy_startup(self):
+        """
+        Test that defining lazy forms does not convert the documents.
+        """
+        eager_count, _ = self.count_conversions(lazy=False)
+        lazy_count, lazy_forms = self.count_conversions(lazy=True)
+
+        self.assertEqual(self.form_count, eager_count)
+        self.assertEqual(0, lazy_count)
+
+        # only the forms that are used pay for the conversion
+        form = lazy_forms[0]()
+        self.assertEqual(20, len(list(form)))
+
+    def test_timed(self):
+        """
+        Test the timed startup metric of the benchmark suite.
+        """
+        results = bench_startup(form_count=10, repeat=1)
+
+        self.assertEqual(
+            ['eager', 'lazy', 'lazy_first_use'], sorted(results.keys()))
+        self.assertTrue(all(value > 0 for value in results.values()))
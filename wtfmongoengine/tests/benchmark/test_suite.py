@@ -0,0 +1,67 @@
+import json
+import os
+import shutil
+import tempfile
+
+import unittest2 as unittest
+
+from wtfmongoengine.tests.benchmark import suite
+
+
+class BenchmarkSuiteTestCase(unittest.TestCase):
+    """
+    Test :py:mod:`wtfmongoengine.tests.benchmark.suite`.
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_run(self):
+        """
+        Test a quick run of all phases, written as JSON.
+        """
+        output = os.path.join(self.tmp_dir, 'results.json')
+        suite.main(['--scale', '0.01', '--output', output])
+
+        with open(output) as f:
+            results = json.load(f)
+
+        self.assertEqual(
+            ['class_creation', 'convert', 'environment', 'instantiation',
+             'startup', 'validate'],
+            sorted(results.keys())
+        )
+        self.assertEqual(
+            ['10', '100', '1000'], sorted(results['class_creation'].keys()))
+        self.assertEqual(
+            ['eager', 'lazy', 'lazy_first_use'],
+            sorted(results['startup'].keys())
+        )
+        self.assertIn('stringfield', results['convert'])
+        self.assertIn('embeddeddocumentfield', results['convert'])
+        self.assertEqual(
+            ['empty', 'formdata', 'from_json', 'json_formdata'],
+            sorted(results['instantiation'].keys())
+        )
+        self.assertTrue(all(
+            value > 0 for value in results['validate'].values()))
+
+    def test_compare(self):
+        """
+        Test :py:func:`.suite.compare`.
+        """
+        old = {
+            'environment': {'python': '2.7'},
+            'convert': {'stringfield': 2.0, 'intfield': 1.0},
+        }
+        new = {
+            'environment': {'python': '2.7'},
+            'convert': {'stringfield': 1.0, 'intfield': 1.0, 'new': 1.0},
+        }
+
+        self.assertEqual(
+            {'convert.stringfield': 0.5, 'convert.intfield': 1.0},
+            suite.compare(old, new)
+        )
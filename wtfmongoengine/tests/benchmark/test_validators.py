@@ -0,0 +1,106 @@
+import gc
+import sys
+import types
+
+import unittest2 as unittest
+from wtforms import validators
+
+from wtfmongoengine.forms import DocumentForm
+from wtfmongoengine.tests.benchmark.suite import make_documents
+from wtfmongoengine.validators import (
+    clear_validator_cache, compile_regex, shared_validator)
+
+
+def fresh_validators(count):
+    """
+    Create the validators of ``count`` fields the unshared way.
+    """
+    return [
+        [
+            validators.Required(),
+            validators.Length(min=-1, max=50),
+            validators.Regexp(regex=r'^[\w\-]+$'),
+        ]
+        for i in range(count)
+    ]
+
+
+def interned_validators(count):
+    """
+    Create the validators of ``count`` fields through the interning cache.
+    """
+    return [
+        [
+            shared_validator(validators.Required),
+            shared_validator(validators.Length, min=-1, max=50),
+            shared_validator(
+                validators.Regexp, regex=compile_regex(r'^[\w\-]+$')),
+        ]
+        for i in range(count)
+    ]
+
+
+def memory_size(validator_lists):
+    """
+    Return the size in bytes of the distinct objects of ``validator_lists``.
+
+    The validators are followed to the objects they refer to (their
+    attribute dictionaries, messages and compiled patterns), every object
+    is counted once. Classes and modules are not followed.
+    """
+    seen = set()
+    size = 0
+    pending = [v for validator_list in validator_lists for v in validator_list]
+
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, (type, types.ModuleType)):
+            continue
+
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        pending.extend(gc.get_referents(obj))
+
+    return size
+
+
+class SharedValidatorBenchmarkTestCase(unittest.TestCase):
+    """
+    Measure the savings of sharing validators between fields.
+    """
+    field_count = 5000
+
+    def tearDown(self):
+        clear_validator_cache()
+
+    def test_distinct_validators(self):
+        """
+        Test that converted forms share their validator objects.
+        """
+        forms = [
+            type('Form', (DocumentForm,), {
+                'Meta': type('Meta', (object,), {
+                    'document_class': document_class})})
+            for document_class in make_documents(20)
+        ]
+
+        validator_ids = set()
+        validator_count = 0
+
+        for form in forms:
+            for i in range(20):
+                field = getattr(form, 'field_{0}'.format(i))
+                validator_ids.update(id(v) for v in field.kwargs['validators'])
+                validator_count += len(field.kwargs['validators'])
+
+        self.assertEqual(800, validator_count)
+        self.assertEqual(2, len(validator_ids))
+
+    def test_memory(self):
+        """
+        Test that interned validators take less memory than fresh ones.
+        """
+        fresh_size = memory_size(fresh_validators(self.field_count))
+        interned_size = memory_size(interned_validators(self.field_count))
+
+        self.assertLess(interned_size, fresh_size / 2)
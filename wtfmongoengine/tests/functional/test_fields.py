@@ -0,0 +1,814 @@
+import hashlib
+import io
+
+import unittest2 as unittest
+
+from bson import ObjectId
+from mongoengine.document import Document, EmbeddedDocument
+from mongoengine import fields
+from wtforms import validators
+from wtforms.fields import FormField, IntegerField, TextField
+from wtforms.form import Form
+
+from wtfmongoengine.fields import (
+    BoundedFieldList, BytesField, ChoiceIndex, EmbeddedFormField,
+    GeoPointFormField, GridFSFileField, IndexedSelectField, MappingField,
+    ReferenceSelectField, SortedFieldList)
+from wtfmongoengine.forms import DocumentForm
+from wtfmongoengine.tests.utils import DummyPostData, MongomockTestCase
+
+
+class ReferenceSelectFieldTestCase(MongomockTestCase):
+    """
+    Test :py:class:`.ReferenceSelectField`.
+    """
+    def setUp(self):
+        super(ReferenceSelectFieldTestCase, self).setUp()
+
+        class Author(Document):
+            name = fields.StringField(db_field='n')
+            biography = fields.StringField()
+
+        class Article(Document):
+            author = fields.ReferenceField(Author, required=True)
+
+        class ArticleForm(DocumentForm):
+            class Meta:
+                document_class = Article
+                reference_labels = {'author': 'name'}
+
+        self.authors = [
+            Author(name='Author {0}'.format(i), biography='x' * 100).save()
+            for i in range(5)
+        ]
+        self.author_class = Author
+        self.article_class = Article
+        self.form_class = ArticleForm
+
+    def test_conversion(self):
+        """
+        Test that a ``ReferenceField`` is converted.
+        """
+        field = self.form_class.author
+
+        self.assertEqual(ReferenceSelectField, field.field_class)
+        self.assertEqual(self.author_class, field.kwargs['document_class'])
+        self.assertFalse(field.kwargs['allow_blank'])
+        self.assertEqual('name', field.kwargs['label_field'])
+
+    def test_reference_labels_invalid(self):
+        """
+        Test that ``reference_labels`` must name a reference and its field.
+        """
+        for reference_labels in ({'author': 'unknown'}, {'title': 'name'}):
+            meta = type('Meta', (object,), {
+                'document_class': self.article_class,
+                'reference_labels': reference_labels,
+            })
+            self.assertRaises(
+                ValueError, type(DocumentForm),
+                'InvalidForm', (DocumentForm,), {'Meta': meta})
+
+    def test_choices(self):
+        """
+        Test that the choices are loaded with a projection and a cap.
+        """
+        form = self.form_class()
+        form.author.max_choices = 3
+
+        choices = form.author.choices
+
+        self.assertEqual(3, len(choices))
+        self.assertTrue(set(choices).issubset(
+            (unicode(author.pk), author.name) for author in self.authors))
+
+    def test_validate(self):
+        """
+        Test validating a submitted primary key.
+        """
+        author = self.authors[2]
+        form = self.form_class(DummyPostData(author=unicode(author.pk)))
+
+        self.assertTrue(form.validate())
+        self.assertEqual(author.pk, form.author.data.pk)
+        self.assertEqual(None, form.author._choices)
+
+    def test_validate_invalid(self):
+        """
+        Test validating an invalid and an unknown primary key.
+        """
+        form = self.form_class(DummyPostData(author='invalid'))
+        self.assertFalse(form.validate())
+        self.assertIn('author', form.errors)
+
+        form = self.form_class(DummyPostData(author=unicode(ObjectId())))
+        self.assertFalse(form.validate())
+
+
+class IndexedSelectFieldTestCase(unittest.TestCase):
+    """
+    Test :py:class:`.IndexedSelectField`.
+    """
+    def test_pairs(self):
+        """
+        Test validating against ``(value, label)`` pairs.
+        """
+        class TestForm(Form):
+            country = IndexedSelectField(index=ChoiceIndex(
+                [('nl', 'Netherlands'), ('be', 'Belgium')]))
+
+        form = TestForm(DummyPostData({'country': 'be'}))
+        self.assertTrue(form.validate())
+        self.assertEqual('be', form.country.data)
+
+        form = TestForm(DummyPostData({'country': 'de'}))
+        self.assertFalse(form.validate())
+        self.assertEqual(['Not a valid choice'], form.errors['country'])
+
+    def test_flat_values(self):
+        """
+        Test validating against a list of (typed) values.
+        """
+        class TestForm(Form):
+            size = IndexedSelectField(index=ChoiceIndex([1, 2, 3]))
+
+        form = TestForm(DummyPostData({'size': '2'}))
+        self.assertTrue(form.validate())
+        self.assertEqual(2, form.size.data)
+        self.assertEqual(
+            [(1, 1, False), (2, 2, True), (3, 3, False)],
+            list(form.size.iter_choices())
+        )
+
+        form = TestForm(DummyPostData({'size': '4'}))
+        self.assertFalse(form.validate())
+
+    def test_object_data(self):
+        """
+        Test the selected choice of object data.
+        """
+        class TestForm(Form):
+            size = IndexedSelectField(index=ChoiceIndex([1, 2, 3]))
+
+        form = TestForm(size=3)
+        self.assertTrue(form.validate())
+        self.assertEqual([False, False, True], [
+            selected for value, label, selected in form.size.iter_choices()])
+
+    def test_conversion(self):
+        """
+        Test that the index is built once per form class.
+        """
+        class ChoiceDocument(Document):
+            code = fields.StringField(
+                required=True, choices=['c{0}'.format(i) for i in range(5000)])
+
+        class ChoiceForm(DocumentForm):
+            class Meta:
+                document_class = ChoiceDocument
+
+        first = ChoiceForm(DummyPostData({'code': 'c4999'}))
+        second = ChoiceForm(DummyPostData({'code': 'x'}))
+
+        self.assertIs(first.code.index, second.code.index)
+        self.assertTrue(first.validate())
+        self.assertFalse(second.validate())
+
+
+class BoundedFieldListTestCase(unittest.TestCase):
+    """
+    Test :py:class:`.BoundedFieldList`.
+    """
+    def setUp(self):
+        class TestForm(Form):
+            tags = BoundedFieldList(TextField(), max_entries=3)
+
+        self.form_class = TestForm
+
+    def test_process(self):
+        """
+        Test processing form data within the limit.
+        """
+        form = self.form_class(DummyPostData({
+            'tags-0': 'a',
+            'tags-1': 'b',
+        }))
+
+        self.assertTrue(form.validate())
+        self.assertEqual(['a', 'b'], form.tags.data)
+
+    def test_process_too_many_entries(self):
+        """
+        Test that too many entries are rejected without creating entries.
+        """
+        formdata = DummyPostData(
+            ('tags-{0}'.format(i), 'tag') for i in range(1000))
+        form = self.form_class(formdata)
+
+        self.assertEqual([], form.tags.entries)
+        self.assertFalse(form.validate())
+        self.assertEqual(
+            ['Too many entries, at most 3 are allowed.'], form.errors['tags'])
+
+
+class SortedFieldListTestCase(unittest.TestCase):
+    """
+    Test :py:class:`.SortedFieldList`.
+    """
+    def test_data(self):
+        """
+        Test that ``data`` is sorted.
+        """
+        class TestForm(Form):
+            numbers = SortedFieldList(IntegerField())
+
+        form = TestForm(DummyPostData({
+            'numbers-0': '5',
+            'numbers-1': '1',
+            'numbers-2': '3',
+        }))
+
+        self.assertEqual([1, 3, 5], form.numbers.data)
+
+        form.numbers.append_entry(2)
+        self.assertEqual([1, 2, 3, 5], form.numbers.data)
+
+        form.numbers.pop_entry()
+        self.assertEqual([1, 3, 5], form.numbers.data)
+
+    def test_data_reverse(self):
+        """
+        Test that ``data`` is sorted in reverse order.
+        """
+        class TestForm(Form):
+            numbers = SortedFieldList(IntegerField(), reverse=True)
+
+        form = TestForm(numbers=[1, 5, 3])
+        self.assertEqual([5, 3, 1], form.numbers.data)
+
+    def test_populate_obj(self):
+        """
+        Test that an object is populated in sorted order.
+        """
+        class TestForm(Form):
+            numbers = SortedFieldList(IntegerField(), reverse=True)
+
+        class Holder(object):
+            numbers = [7, 8, 9]
+
+        form = TestForm(DummyPostData({
+            'numbers-0': '3',
+            'numbers-1': '1',
+            'numbers-2': '9',
+        }))
+        form.populate_obj(Holder)
+
+        self.assertEqual([9, 3, 1], Holder.numbers)
+        self.assertEqual('numbers-0', form.numbers.entries[0].name)
+
+
+class ListFieldConversionTestCase(unittest.TestCase):
+    """
+    Test converting ``ListField`` and ``SortedListField``.
+    """
+    def test_conversion(self):
+        """
+        Test that the list fields are converted.
+        """
+        class TestDocument(Document):
+            tags = fields.ListField(fields.StringField(max_length=10))
+            scores = fields.SortedListField(fields.IntField())
+            untyped = fields.ListField()
+
+        class TestForm(DocumentForm):
+            class Meta:
+                document_class = TestDocument
+
+        self.assertEqual(BoundedFieldList, TestForm.tags.field_class)
+        self.assertEqual(SortedFieldList, TestForm.scores.field_class)
+        self.assertFalse(hasattr(TestForm, 'untyped'))
+
+        form = TestForm(DummyPostData({
+            'tags-0': 'python',
+            'tags-1': 'a-very-long-tag',
+            'scores-0': '10',
+            'scores-1': '2',
+        }))
+
+        self.assertFalse(form.validate())
+        self.assertEqual(
+            [[u'Field cannot be longer than 10 characters.']],
+            form.errors['tags']
+        )
+        self.assertEqual([2, 10], form.scores.data)
+
+
+class EmbeddedDocumentConversionTestCase(unittest.TestCase):
+    """
+    Test converting ``EmbeddedDocumentField``.
+    """
+    def setUp(self):
+        class Address(EmbeddedDocument):
+            street = fields.StringField(required=True)
+            city = fields.StringField()
+
+        class Person(Document):
+            home = fields.EmbeddedDocumentField(Address)
+            work = fields.EmbeddedDocumentField(Address)
+
+        class Company(Document):
+            address = fields.GenericEmbeddedDocumentField(choices=[Address])
+
+        self.address_class = Address
+        self.person_class = Person
+        self.company_class = Company
+
+    def make_form(self, document_class):
+        return type('TestForm', (DocumentForm,), {
+            'Meta': type('Meta', (object,), {
+                'document_class': document_class})})
+
+    def test_conversion(self):
+        """
+        Test that the embedded document form class is shared.
+        """
+        person_form = self.make_form(self.person_class)
+        company_form = self.make_form(self.company_class)
+
+        self.assertEqual(EmbeddedFormField, person_form.home.field_class)
+        self.assertIs(
+            person_form.home.args[0], person_form.work.args[0])
+        self.assertIs(
+            person_form.home.args[0], company_form.address.args[0])
+
+    def test_validate_populate(self):
+        """
+        Test validating and populating an embedded document.
+        """
+        form = self.make_form(self.person_class)(DummyPostData({
+            'home-street': 'Main street',
+            'home-city': 'Amsterdam',
+        }))
+
+        self.assertFalse(form.validate())
+        self.assertEqual(['work'], list(form.errors.keys()))
+
+        person = self.person_class()
+        form.home.populate_obj(person, 'home')
+
+        self.assertIsInstance(person.home, self.address_class)
+        self.assertEqual('Main street', person.home.street)
+
+    def test_recursive(self):
+        """
+        Test that recursive embedded documents are limited in depth.
+        """
+        class Node(EmbeddedDocument):
+            name = fields.StringField()
+            child = fields.EmbeddedDocumentField('self')
+
+        class Tree(Document):
+            root = fields.EmbeddedDocumentField(Node)
+
+        form_class = self.make_form(Tree)
+        node_form = form_class.root.args[0]
+        depth = 0
+
+        while hasattr(node_form, 'child'):
+            node_form = node_form.child.args[0]
+            depth += 1
+
+        self.assertEqual(2, depth)
+        self.assertTrue(form_class(DummyPostData({
+            'root-child-child-name': 'leaf'})).validate())
+
+
+class MemoryGridFSProxy(object):
+    """
+    Stand-in for :py:class:`!mongoengine.fields.GridFSProxy`, storing the
+    files in memory (mongomock has no GridFS).
+    """
+    files = {}
+
+    def __init__(self, grid_id=None, db_alias=None, collection_name='fs'):
+        self.grid_id = grid_id
+        self.collection_name = collection_name
+
+    def __nonzero__(self):
+        return bool(self.grid_id)
+
+    def new_file(self, **kwargs):
+        self.grid_id = ObjectId()
+        self.files[self.grid_id] = {'kwargs': kwargs, 'chunks': []}
+
+    def write(self, chunk):
+        self.files[self.grid_id]['chunks'].append(chunk)
+
+    def close(self):
+        pass
+
+    def delete(self):
+        del self.files[self.grid_id]
+        self.grid_id = None
+
+
+class Upload(io.BytesIO):
+    """
+    Uploaded file, which keeps track of the reads.
+    """
+    filename = 'upload.bin'
+    content_type = 'application/octet-stream'
+
+    def __init__(self, *args, **kwargs):
+        io.BytesIO.__init__(self, *args, **kwargs)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return io.BytesIO.read(self, size)
+
+
+class GridFSFileFieldTestCase(unittest.TestCase):
+    """
+    Test :py:class:`.GridFSFileField`.
+    """
+    def setUp(self):
+        MemoryGridFSProxy.files.clear()
+
+        class TestForm(Form):
+            upload = GridFSFileField(
+                proxy_class=MemoryGridFSProxy,
+                chunk_size=1024,
+                max_size=4096,
+                checksum='sha256',
+            )
+
+        self.form_class = TestForm
+
+    def test_store(self):
+        """
+        Test that the upload is streamed in chunks.
+        """
+        content = b'x' * 3000
+        upload = Upload(content)
+        form = self.form_class(DummyPostData({'upload': upload}))
+
+        self.assertTrue(form.validate())
+
+        stored = MemoryGridFSProxy.files[form.upload.data.grid_id]
+        self.assertEqual([1024, 1024, 952], [len(c) for c in stored['chunks']])
+        self.assertEqual(content, b''.join(stored['chunks']))
+        self.assertEqual({
+            'filename': 'upload.bin',
+            'content_type': 'application/octet-stream',
+        }, stored['kwargs'])
+        self.assertEqual(3000, form.upload.size)
+        self.assertEqual(
+            hashlib.sha256(content).hexdigest(), form.upload.digest)
+
+    def test_too_large(self):
+        """
+        Test that a too large upload is aborted early and deleted.
+        """
+        upload = Upload(b'x' * 1024 * 1024)
+        form = self.form_class(DummyPostData({'upload': upload}))
+
+        self.assertFalse(form.validate())
+        self.assertEqual(
+            ['File is too large, at most 4096 bytes are allowed.'],
+            form.errors['upload']
+        )
+        self.assertEqual({}, MemoryGridFSProxy.files)
+        self.assertEqual(4097, sum(upload.reads))
+
+    def test_no_upload(self):
+        """
+        Test that the current file is kept when nothing is uploaded.
+        """
+        current = MemoryGridFSProxy(grid_id=ObjectId())
+        form = self.form_class(DummyPostData({'upload': ''}), upload=current)
+
+        self.assertTrue(form.validate())
+        self.assertIs(current, form.upload.data)
+
+    def test_discard(self):
+        """
+        Test :py:meth:`.GridFSFileField.discard`.
+        """
+        form = self.form_class(DummyPostData({'upload': Upload(b'abc')}))
+        form.validate()
+        form.upload.discard()
+
+        self.assertEqual({}, MemoryGridFSProxy.files)
+        self.assertEqual(None, form.upload.data)
+
+    def test_discard_invalid_form(self):
+        """
+        Test that the uploads of an invalid ``DocumentForm`` are discarded.
+        """
+        class UploadDocument(Document):
+            name = fields.StringField(required=True)
+
+        class AttachmentForm(Form):
+            upload = GridFSFileField(proxy_class=MemoryGridFSProxy)
+
+        class UploadForm(DocumentForm):
+            class Meta:
+                document_class = UploadDocument
+
+            upload = GridFSFileField(proxy_class=MemoryGridFSProxy)
+            attachment = FormField(AttachmentForm)
+
+        data = {
+            'upload': Upload(b'abc'),
+            'attachment-upload': Upload(b'def'),
+        }
+        form = UploadForm(DummyPostData(data))
+
+        self.assertFalse(form.validate())
+        self.assertEqual({}, MemoryGridFSProxy.files)
+        self.assertEqual(None, form.upload.data)
+        self.assertEqual(None, form.attachment.upload.data)
+
+        data = {
+            'name': 'name',
+            'upload': Upload(b'abc'),
+            'attachment-upload': Upload(b'def'),
+        }
+        form = UploadForm(DummyPostData(data))
+
+        self.assertTrue(form.validate())
+        self.assertEqual(2, len(MemoryGridFSProxy.files))
+
+    def test_conversion(self):
+        """
+        Test converting a ``FileField``.
+        """
+        class FileDocument(Document):
+            attachment = fields.FileField(collection_name='attachments')
+
+        class FileForm(DocumentForm):
+            class Meta:
+                document_class = FileDocument
+
+        form = FileForm()
+        self.assertIsInstance(form.attachment, GridFSFileField)
+        self.assertEqual('attachments', form.attachment.collection_name)
+        self.assertEqual(16 * 1024 * 1024, form.attachment.max_size)
+
+
+class BytesFieldTestCase(unittest.TestCase):
+    """
+    Test :py:class:`.BytesField`.
+    """
+    def setUp(self):
+        class TestForm(Form):
+            blob = BytesField(max_bytes=1024)
+
+        self.form_class = TestForm
+
+    def test_bytes(self):
+        """
+        Test that bytes are passed on without copying.
+        """
+        content = b'x' * 1024
+        form = self.form_class(DummyPostData({'blob': content}))
+
+        self.assertTrue(form.validate())
+        self.assertIs(content, form.blob.data)
+
+    def test_memoryview(self):
+        """
+        Test binary data given as ``memoryview``.
+        """
+        form = self.form_class(DummyPostData({'blob': memoryview(b'abc')}))
+
+        self.assertTrue(form.validate())
+        self.assertEqual(b'abc', form.blob.data)
+
+    def test_empty(self):
+        """
+        Test that an empty value is no data.
+        """
+        for value in (u'', b''):
+            form = self.form_class(DummyPostData({'blob': value}))
+
+            self.assertTrue(form.validate())
+            self.assertEqual(None, form.blob.data)
+
+    def test_file(self):
+        """
+        Test that a file-like object is read in one piece.
+        """
+        upload = Upload(b'x' * 1000)
+        form = self.form_class(DummyPostData({'blob': upload}))
+
+        self.assertTrue(form.validate())
+        self.assertEqual(b'x' * 1000, form.blob.data)
+        self.assertEqual([1025, 25], upload.reads)
+
+    def test_too_large(self):
+        """
+        Test that oversized input is rejected while reading.
+        """
+        upload = Upload(b'x' * 1024 * 1024)
+        form = self.form_class(DummyPostData({'blob': upload}))
+
+        self.assertFalse(form.validate())
+        self.assertEqual(
+            ['Data is too large, at most 1024 bytes are allowed.'],
+            form.errors['blob']
+        )
+        self.assertEqual([1025], upload.reads)
+        self.assertEqual(None, form.blob.data)
+
+        form = self.form_class(DummyPostData({'blob': b'x' * 1025}))
+        self.assertFalse(form.validate())
+
+    def test_not_binary(self):
+        """
+        Test that text is rejected.
+        """
+        form = self.form_class(DummyPostData({'blob': u'text'}))
+
+        self.assertFalse(form.validate())
+        self.assertEqual(['Not valid binary data.'], form.errors['blob'])
+
+    def test_conversion(self):
+        """
+        Test converting a ``BinaryField``.
+        """
+        class BinaryDocument(Document):
+            blob = fields.BinaryField(max_bytes=10)
+
+        class BinaryForm(DocumentForm):
+            class Meta:
+                document_class = BinaryDocument
+
+        form = BinaryForm()
+        self.assertIsInstance(form.blob, BytesField)
+        self.assertEqual(10, form.blob.max_bytes)
+
+
+class MappingFieldTestCase(unittest.TestCase):
+    """
+    Test :py:class:`.MappingField`.
+    """
+    def setUp(self):
+        class TestForm(Form):
+            scores = MappingField(
+                IntegerField(validators=[validators.NumberRange(max=10)]),
+                max_entries=3,
+                max_key_length=5,
+            )
+
+        self.form_class = TestForm
+
+    def test_process(self):
+        """
+        Test processing and validating the entries.
+        """
+        form = self.form_class(DummyPostData({
+            'scores-a': '1',
+            'scores-b': '2',
+            'other': 'x',
+        }))
+
+        self.assertTrue(form.validate())
+        self.assertEqual({'a': 1, 'b': 2}, form.scores.data)
+
+    def test_value_field_reused(self):
+        """
+        Test that a single field is used for all values.
+        """
+        form = self.form_class(DummyPostData({
+            'scores-a': '1',
+            'scores-b': '20',
+            'scores-c': 'x',
+        }))
+        value_field = form.scores.value_field
+
+        self.assertFalse(form.validate())
+        self.assertIs(value_field, form.scores.value_field)
+        self.assertEqual(['b', 'c'], sorted(form.errors['scores'].keys()))
+        self.assertEqual(
+            ['Number must be at most 10.'], form.errors['scores']['b'])
+
+    def test_too_many_keys(self):
+        """
+        Test that too many keys are rejected before processing the values.
+        """
+        formdata = DummyPostData(
+            ('scores-{0}'.format(i), '1') for i in range(1000))
+        form = self.form_class(formdata)
+
+        self.assertFalse(form.validate())
+        self.assertEqual(
+            ['Too many keys, at most 3 are allowed.'], form.errors['scores'])
+        self.assertEqual(None, form.scores._value_field)
+        self.assertEqual({}, form.scores.data)
+
+    def test_invalid_keys(self):
+        """
+        Test that too long and invalid keys are rejected.
+        """
+        form = self.form_class(DummyPostData({'scores-abcdef': '1'}))
+        self.assertFalse(form.validate())
+        self.assertEqual(
+            ['Key is too long, at most 5 characters are allowed.'],
+            form.errors['scores']
+        )
+
+        for key in ('a.b', '$a', ''):
+            form = self.form_class(DummyPostData({'scores-' + key: '1'}))
+            self.assertFalse(form.validate())
+
+    def test_object_data(self):
+        """
+        Test the data without form data.
+        """
+        form = self.form_class(scores={'a': 1})
+        self.assertEqual({'a': 1}, form.scores.data)
+        self.assertEqual({}, self.form_class().scores.data)
+
+    def test_conversion(self):
+        """
+        Test converting a ``MapField`` and a ``DictField``.
+        """
+        class MappingDocument(Document):
+            scores = fields.MapField(fields.IntField(min_value=1))
+            attributes = fields.DictField()
+
+        class MappingForm(DocumentForm):
+            class Meta:
+                document_class = MappingDocument
+
+        form = MappingForm(DummyPostData({
+            'scores-a': '0',
+            'attributes-color': 'red',
+        }))
+
+        self.assertFalse(form.validate())
+        self.assertEqual(['a'], list(form.errors['scores'].keys()))
+        self.assertEqual({'color': 'red'}, form.attributes.data)
+        self.assertEqual(100, form.scores.max_entries)
+
+
+class GeoPointFormFieldTestCase(unittest.TestCase):
+    """
+    Test :py:class:`.GeoPointFormField`.
+    """
+    def setUp(self):
+        class TestForm(Form):
+            location = GeoPointFormField()
+
+        self.form_class = TestForm
+
+    def test_process(self):
+        """
+        Test parsing a coordinate pair.
+        """
+        form = self.form_class(DummyPostData({'location': '52.37, 4.89'}))
+
+        self.assertTrue(form.validate())
+        self.assertEqual([52.37, 4.89], form.location.data)
+
+    def test_invalid(self):
+        """
+        Test invalid and out of range coordinates.
+        """
+        for value, error in (
+                ('52.37', 'Not a valid coordinate pair.'),
+                ('a, b', 'Not a valid coordinate pair.'),
+                ('-91, 0', 'Latitude must be between -90 and 90.'),
+                ('0, 180.5', 'Longitude must be between -180 and 180.'),
+                ('nan, 0', 'Latitude must be between -90 and 90.')):
+            form = self.form_class(DummyPostData({'location': value}))
+            self.assertFalse(form.validate())
+            self.assertEqual([error], form.errors['location'])
+
+    def test_object_data(self):
+        """
+        Test rendering the object data.
+        """
+        form = self.form_class(location=[52.37, 4.89])
+        self.assertEqual(u'52.37, 4.89', form.location._value())
+
+    def test_conversion(self):
+        """
+        Test converting a ``GeoPointField``.
+        """
+        class GeoDocument(Document):
+            location = fields.GeoPointField()
+
+        class GeoForm(DocumentForm):
+            class Meta:
+                document_class = GeoDocument
+
+        form = GeoForm(DummyPostData({'location': '1, 2'}))
+        self.assertTrue(form.validate())
+
+        document = GeoDocument()
+        form.populate_obj(document)
+        document.validate()
+        self.assertEqual([1.0, 2.0], document.location)
@@ -1,10 +1,38 @@
+import cPickle
+import datetime
+import pickle
+import shutil
+import tempfile
+
+import mock
 import unittest2 as unittest
 
-from mongoengine.document import Document
+from bson import ObjectId
+from decimal import Decimal
+from multiprocessing.pool import ThreadPool
+from mongoengine.document import Document, EmbeddedDocument
 from mongoengine import fields
 from wtforms import validators, fields as wtfields
 
-from wtfmongoengine.forms import DocumentForm
+from wtfmongoengine.cache import SchemaCache
+from wtfmongoengine.forms import (
+    DocumentFieldConverter, DocumentForm, document_form_class)
+from wtfmongoengine.instrumentation import instrumentation
+from wtfmongoengine.tests.utils import (
+    DummyPostData, FakeBackend, FakeBackendValidator, MongomockTestCase)
+
+
+# documents of which the schema is cached must be importable
+class SchemaEmbeddedDocument(EmbeddedDocument):
+    city = fields.StringField(max_length=20)
+
+
+class SchemaDocument(Document):
+    name = fields.StringField(required=True, max_length=10, regex=r'^\w+$')
+    age = fields.IntField(min_value=1)
+    tags = fields.ListField(fields.StringField(max_length=5))
+    address = fields.EmbeddedDocumentField(SchemaEmbeddedDocument)
+    parent = fields.ReferenceField('SchemaDocument')
 
 
 class DocumentFormTestCase(unittest.TestCase):
@@ -69,6 +97,7 @@ class DocumentFormTestCase(unittest.TestCase):
             class Meta:
                 document_class = TestDocument
 
+        self.test_document = TestDocument
         self.test_form = TestForm
 
     def test_stringfield(self):
@@ -175,3 +204,1369 @@ class DocumentFormTestCase(unittest.TestCase):
         self.assertEqual(field.field_class, wtfields.BooleanField)
         self.assertEqual('A bool', field.kwargs['label'])
         self.assertEqual('Yes or no?', field.kwargs['description'])
+
+    def test_conversion_cached(self):
+        """
+        Test that a second form for the same document reuses the conversion.
+        """
+        test_document = self.test_document
+
+        class OtherTestForm(DocumentForm):
+            class Meta:
+                document_class = test_document
+
+        self.assertIs(self.test_form.string_field, OtherTestForm.string_field)
+
+    def test_stringfield_subclass(self):
+        """
+        Test that a ``StringField`` subclass is converted as a string field.
+        """
+        class SlugField(fields.StringField):
+            pass
+
+        class SlugDocument(Document):
+            slug = SlugField(max_length=20)
+
+        class SlugForm(DocumentForm):
+            class Meta:
+                document_class = SlugDocument
+
+        self.assertEqual(SlugForm.slug.field_class, wtfields.TextField)
+        self.assertIsInstance(
+            SlugForm.slug.kwargs['validators'][0], validators.Length)
+
+    def test_shared_validators(self):
+        """
+        Test that identical constraints share the same validator.
+        """
+        class OtherDocument(Document):
+            string_field = fields.StringField(
+                regex=r'[\w]+',
+                max_length=100,
+                min_length=10,
+            )
+
+        class OtherForm(DocumentForm):
+            class Meta:
+                document_class = OtherDocument
+
+        self.assertEqual(
+            [id(v) for v in self.test_form.string_field.kwargs['validators']],
+            [id(v) for v in OtherForm.string_field.kwargs['validators']],
+        )
+
+    def test_method_field_names(self):
+        """
+        Test that the form methods are no inline validators of the fields.
+        """
+        class MethodNamesDocument(Document):
+            many = fields.StringField()
+            async = fields.StringField()
+            timeout = fields.StringField()
+
+        class MethodNamesForm(DocumentForm):
+            class Meta:
+                document_class = MethodNamesDocument
+
+        form = MethodNamesForm(DummyPostData({
+            'many': u'value', 'async': u'value', 'timeout': u'value'}))
+
+        self.assertTrue(form.validate())
+        self.assertTrue(form.async_validate())
+        self.assertEqual([{}], MethodNamesForm.bulk_validate([{'many': u'x'}]))
+
+
+class LazyDocumentFormTestCase(unittest.TestCase):
+    """
+    Tests :py:class:`wtfmongoengine.forms.DocumentForm` with ``lazy``.
+    """
+    def setUp(self):
+        class TestDocument(Document):
+            string_field = fields.StringField(max_length=5, required=True)
+            int_field = fields.IntField()
+
+        class TestForm(DocumentForm):
+            class Meta:
+                document_class = TestDocument
+                lazy = True
+
+        self.test_form = TestForm
+
+    def test_deferred(self):
+        """
+        Test that the fields are only set after the first access.
+        """
+        self.assertNotIn('string_field', self.test_form.__dict__)
+        self.assertEqual(
+            self.test_form.string_field.field_class, wtfields.TextField)
+        self.assertIn('int_field', self.test_form.__dict__)
+
+    def test_instantiate(self):
+        """
+        Test instantiating and validating a lazy form.
+        """
+        form = self.test_form(string_field='abcdef', int_field=1)
+
+        self.assertFalse(form.validate())
+        self.assertEqual(['string_field'], list(form.errors.keys()))
+
+
+class InheritedDocumentFormTestCase(unittest.TestCase):
+    """
+    Tests declared attributes and subclasses of
+    :py:class:`wtfmongoengine.forms.DocumentForm`.
+    """
+    def setUp(self):
+        class InheritedDocument(Document):
+            title = fields.StringField(max_length=5)
+            body = fields.StringField()
+            rating = fields.IntField()
+
+        class TestForm(DocumentForm):
+            class Meta:
+                document_class = InheritedDocument
+                fields = ('title', 'body')
+
+            title = wtfields.TextField(validators=[validators.Required()])
+
+            def validate_body(self, field):
+                if field.data == 'spam':
+                    raise validators.ValidationError('No spam.')
+
+        self.document = InheritedDocument
+        self.test_form = TestForm
+
+    def test_declared(self):
+        """
+        Test that declared fields and methods are kept.
+        """
+        form = self.test_form(DummyPostData({'body': 'spam'}))
+
+        self.assertEqual(['body', 'title'], sorted(form._fields.keys()))
+        self.assertFalse(form.validate())
+        self.assertEqual(['This field is required.'], form.errors['title'])
+        self.assertEqual(['No spam.'], form.errors['body'])
+
+    def test_subclass_include(self):
+        """
+        Test that a subclass only converts the added fields.
+        """
+        convert = DocumentFieldConverter.convert
+
+        with mock.patch.object(
+                DocumentFieldConverter, 'convert', autospec=True,
+                side_effect=convert) as mock_convert:
+            class SubForm(self.test_form):
+                class Meta:
+                    document_class = self.document
+                    fields = ('title', 'body', 'rating')
+
+        self.assertEqual(
+            [self.document.rating],
+            [c[0][1] for c in mock_convert.call_args_list]
+        )
+        self.assertIs(self.test_form.title, SubForm.title)
+        self.assertIn('validate_body', dir(SubForm))
+
+        form = SubForm(DummyPostData({'title': 'a', 'rating': '5'}))
+        self.assertEqual(
+            ['body', 'rating', 'title'], sorted(form._fields.keys()))
+        self.assertTrue(form.validate())
+        self.assertEqual(5, form.rating.data)
+
+    def test_subclass_exclude(self):
+        """
+        Test that a subclass hides the excluded fields of its parent.
+        """
+        class SubForm(self.test_form):
+            class Meta:
+                document_class = self.document
+                exclude = ('body',)
+
+        self.assertIsNone(SubForm.body)
+        self.assertEqual(
+            ['rating', 'title'], sorted(SubForm()._fields.keys()))
+        self.assertEqual(('rating', 'title'), SubForm.only_fields())
+
+    def test_lazy(self):
+        """
+        Test that a lazy form keeps its declared fields.
+        """
+        class LazyForm(DocumentForm):
+            class Meta:
+                document_class = self.document
+                lazy = True
+
+            body = wtfields.TextAreaField()
+
+        self.assertIs(wtfields.TextAreaField, LazyForm.body.field_class)
+        self.assertEqual(
+            ['body', 'rating', 'title'], sorted(LazyForm()._fields.keys()))
+
+
+class InstrumentedDocumentFormTestCase(unittest.TestCase):
+    """
+    Tests :py:class:`wtfmongoengine.forms.DocumentForm` with the
+    instrumentation enabled.
+    """
+    def setUp(self):
+        self.calls = []
+        instrumentation.stats.reset()
+        instrumentation.enable(
+            lambda metric, tags, seconds: self.calls.append((metric, tags)))
+
+        class InstrumentedDocument(Document):
+            string_field = fields.StringField(max_length=5, required=True)
+
+        class InstrumentedForm(DocumentForm):
+            class Meta:
+                document_class = InstrumentedDocument
+
+        self.test_form = InstrumentedForm
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.stats.reset()
+
+    def test_conversion(self):
+        """
+        Test that the conversion of each field is timed.
+        """
+        self.assertIn(
+            (__name__ + '.InstrumentedDocument', 'string_field'),
+            instrumentation.stats.conversions
+        )
+        self.assertIn(('wtfmongoengine.convert', {
+            'document': __name__ + '.InstrumentedDocument',
+            'field': 'string_field',
+        }), self.calls)
+
+    def test_validate(self):
+        """
+        Test that each validator is timed, without changing the result.
+        """
+        form = self.test_form(DummyPostData({'string_field': 'abcdef'}))
+        field_validators = form.string_field.validators
+
+        self.assertFalse(form.validate())
+        self.assertEqual(1, len(form.errors['string_field']))
+        self.assertIs(field_validators, form.string_field.validators)
+
+        self.assertEqual(1, instrumentation.stats.validators[
+            (__name__ + '.InstrumentedForm', 'string_field', 'Required')][0])
+        self.assertEqual(1, instrumentation.stats.validators[
+            (__name__ + '.InstrumentedForm', 'string_field', 'Length')][0])
+
+
+class CompiledDocumentFormTestCase(unittest.TestCase):
+    """
+    Tests :py:class:`wtfmongoengine.forms.DocumentForm` with ``compiled``.
+    """
+    def setUp(self):
+        class CompiledDocument(Document):
+            name = fields.StringField(
+                required=True, min_length=2, max_length=5, regex=r'^[a-z]+$')
+            nickname = fields.StringField(max_length=3)
+            title = fields.StringField(min_length=3)
+            email = fields.EmailField()
+            age = fields.IntField(required=True, min_value=1, max_value=99)
+            score = fields.FloatField(min_value=1)
+            ratio = fields.FloatField(max_value=1)
+            tags = fields.ListField(fields.StringField(max_length=2))
+            active = fields.BooleanField()
+
+        def make_form(compiled):
+            meta = type('Meta', (object,), {
+                'document_class': CompiledDocument,
+                'compiled': compiled,
+            })
+
+            class CompiledForm(type('BaseForm', (DocumentForm,), {
+                    'Meta': meta})):
+                def validate_nickname(self, field):
+                    if field.data == 'bad':
+                        raise validators.ValidationError('Bad nickname.')
+
+            return CompiledForm
+
+        self.generic_form = make_form(False)
+        self.compiled_form = make_form(True)
+
+    def assert_same(self, data):
+        generic = self.generic_form(DummyPostData(data))
+        compiled = self.compiled_form(DummyPostData(data))
+
+        self.assertEqual(generic.validate(), compiled.validate())
+        self.assertEqual(generic.errors, compiled.errors)
+        return compiled
+
+    def test_identical(self):
+        """
+        Test that the results and errors equal the generic validation.
+        """
+        valid = {
+            'name': 'abc',
+            'nickname': 'abc',
+            'title': 'abcd',
+            'email': 'user@example.com',
+            'age': '42',
+            'score': '1.5',
+            'ratio': '0.5',
+            'tags-0': 'ab',
+            'active': 'y',
+        }
+        form = self.assert_same(valid)
+        self.assertTrue(form.validate())
+
+        invalid = [
+            {'name': '  '},
+            {'name': 'a', 'age': '0'},
+            {'name': 'abcdefg', 'age': '100'},
+            {'name': 'ab1', 'age': 'x'},
+            {'nickname': 'abcd', 'title': 'ab', 'email': 'x'},
+            {'nickname': 'bad', 'score': '0', 'ratio': '2'},
+            {'tags-0': 'abc', 'tags-1': 'a'},
+        ]
+
+        for data in invalid:
+            row = dict(valid)
+            row.update(data)
+            form = self.assert_same(row)
+            self.assertFalse(form.validate(), data)
+
+        self.assertFalse(self.assert_same({}).validate())
+
+    def test_generated(self):
+        """
+        Test that the validation function is generated once per class.
+        """
+        form = self.compiled_form()
+        validate = form._validate_function()
+
+        self.assertIs(validate, self.compiled_form()._validate_function())
+        self.assertIn("field.gettext('This field is required.')",
+                      validate.source)
+
+    def test_replaced_validators(self):
+        """
+        Test that replaced validators are used.
+        """
+        form = self.compiled_form(DummyPostData({'name': 'abc', 'age': '1'}))
+        form.name.validators = [validators.Length(max=1)]
+
+        self.assertFalse(form.validate())
+        self.assertEqual(
+            ['Field cannot be longer than 1 character.'],
+            form.errors['name']
+        )
+
+    def test_deleted_field(self):
+        """
+        Test that a field deleted from an instance is not validated.
+        """
+        self.compiled_form()._validate_function()
+        data = {
+            'title': 'abcd',
+            'email': 'user@example.com',
+            'age': '42',
+            'score': '1.5',
+            'ratio': '0.5',
+        }
+
+        for form_class in (self.generic_form, self.compiled_form):
+            form = form_class(DummyPostData(data))
+            del form.name
+
+            self.assertTrue(form.validate())
+            self.assertEqual({}, form.errors)
+
+
+class SchemaCacheTestCase(unittest.TestCase):
+    """
+    Tests :py:class:`wtfmongoengine.forms.DocumentFieldConverter` with a
+    :py:class:`wtfmongoengine.cache.SchemaCache`.
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        class SchemaConverter(DocumentFieldConverter):
+            cache = None
+            schema_cache = SchemaCache(self.directory)
+
+        self.converter_class = SchemaConverter
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_rebuild(self):
+        """
+        Test that the fields are rebuilt from the cache without converting.
+        """
+        converted = self.converter_class(SchemaDocument).fields
+
+        with mock.patch.object(
+                self.converter_class, 'convert',
+                side_effect=AssertionError('converted')):
+            rebuilt = self.converter_class(SchemaDocument).fields
+
+        self.assertEqual(sorted(converted.keys()), sorted(rebuilt.keys()))
+
+        for name, field in converted.items():
+            self.assertEqual(field.field_class, rebuilt[name].field_class)
+            # the (shared) validators are the same objects
+            self.assertEqual(
+                field.kwargs.get('validators'),
+                rebuilt[name].kwargs.get('validators')
+            )
+
+        self.assertIs(
+            SchemaDocument._fields['tags'].default,
+            rebuilt['tags'].kwargs['default']
+        )
+        self.assertIs(
+            converted['address'].args[0], rebuilt['address'].args[0])
+
+        # the order of the fields is preserved
+        self.assertEqual(
+            sorted(converted, key=lambda n: converted[n].creation_counter),
+            sorted(rebuilt, key=lambda n: rebuilt[n].creation_counter),
+        )
+
+        form_class = type('SchemaForm', (DocumentForm,), rebuilt)
+        form = form_class(DummyPostData({'name': 'a b', 'age': '0'}))
+        self.assertFalse(form.validate())
+        self.assertEqual(['age', 'name'], sorted(form.errors.keys()))
+
+    def test_regenerate(self):
+        """
+        Test that a stale entry is regenerated.
+        """
+        converter = self.converter_class(SchemaDocument)
+        converter.schema_cache.set(converter.schema_key, 'stale', [])
+
+        fields = self.converter_class(SchemaDocument).fields
+        self.assertIn('name', fields)
+        self.assertEqual(
+            len(converter.schema_cache.get(
+                converter.schema_key, converter.schema_fingerprint())),
+            len(fields)
+        )
+
+
+class FromJSONTestCase(unittest.TestCase):
+    """
+    Tests :py:meth:`wtfmongoengine.forms.DocumentForm.from_json`.
+    """
+    def setUp(self):
+        class JSONEmbeddedDocument(EmbeddedDocument):
+            city = fields.StringField(max_length=20)
+            active = fields.BooleanField()
+
+        class JSONDocument(Document):
+            name = fields.StringField(required=True, max_length=10)
+            count = fields.IntField(min_value=1)
+            ratio = fields.FloatField()
+            price = fields.DecimalField()
+            active = fields.BooleanField()
+            created = fields.DateTimeField()
+            address = fields.EmbeddedDocumentField(JSONEmbeddedDocument)
+            tags = fields.ListField(fields.StringField(max_length=5))
+            location = fields.GeoPointField()
+
+        class JSONForm(DocumentForm):
+            class Meta:
+                document_class = JSONDocument
+
+        self.document = JSONDocument
+        self.test_form = JSONForm
+
+    def test_typed(self):
+        """
+        Test that typed values are set without a string round-trip.
+        """
+        created = datetime.datetime(2013, 1, 2, 3, 4, 5)
+        form = self.test_form.from_json({
+            'name': u'john',
+            'count': 3,
+            'ratio': 1,
+            'price': 0.1,
+            'active': False,
+            'created': created,
+        })
+
+        self.assertTrue(form.validate())
+        self.assertEqual(u'john', form.name.data)
+        self.assertEqual(3, form.count.data)
+        self.assertIsInstance(form.ratio.data, float)
+        self.assertEqual(Decimal('0.1'), form.price.data)
+        self.assertIs(False, form.active.data)
+        self.assertEqual(created, form.created.data)
+        self.assertEqual([3], form.count.raw_data)
+
+    def test_form_data_values(self):
+        """
+        Test that other values are processed as form data.
+        """
+        form = self.test_form.from_json({
+            'name': u'john',
+            'count': u'three',
+            'created': u'2013-01-02 03:04:05',
+            'address': {'city': u'Amsterdam', 'active': False},
+            'tags': [u'a', u'toolong'],
+        })
+
+        self.assertFalse(form.validate())
+        self.assertEqual(
+            ['count', 'tags'], sorted(form.errors.keys()))
+        self.assertEqual(
+            'Not a valid integer value', form.errors['count'][0])
+        self.assertEqual(
+            datetime.datetime(2013, 1, 2, 3, 4, 5), form.created.data)
+        self.assertEqual(u'Amsterdam', form.address.form.city.data)
+        self.assertIs(False, form.address.form.active.data)
+        self.assertEqual([u'a', u'toolong'], form.tags.data)
+
+    def test_type_mismatch(self):
+        """
+        Test that values of the wrong JSON type are field errors.
+        """
+        form = self.test_form.from_json({
+            'name': u'john',
+            'count': 3.7,
+            'ratio': [1],
+            'price': True,
+            'active': 1,
+            'created': 5,
+            'address': {'city': 12345},
+        })
+
+        self.assertFalse(form.validate())
+        self.assertEqual({
+            'count': [
+                'Not a valid integer value', u'Number must be at least 1.'],
+            'ratio': ['Not a valid float value'],
+            'price': ['Not a valid decimal value'],
+            'active': ['Not a valid boolean value.'],
+            'created': ['Not a valid datetime value'],
+        }, form.errors)
+        self.assertIsNone(form.count.data)
+
+        form = self.test_form.from_json({'name': 12345})
+        self.assertFalse(form.validate())
+        self.assertEqual(
+            [u'This field is required.'], form.errors['name'])
+
+        class EmailDocument(Document):
+            email = fields.EmailField(required=True)
+
+        class EmailForm(DocumentForm):
+            class Meta:
+                document_class = EmailDocument
+
+        form = EmailForm.from_json({'email': 42})
+        self.assertFalse(form.validate())
+        self.assertEqual(
+            [u'This field is required.'], form.errors['email'])
+
+    def test_integral_float(self):
+        """
+        Test that an integral float is accepted as integer.
+        """
+        form = self.test_form.from_json({'name': u'john', 'count': 3.0})
+
+        self.assertTrue(form.validate())
+        self.assertEqual(3, form.count.data)
+        self.assertIsInstance(form.count.data, int)
+
+    def test_point(self):
+        """
+        Test that a ``[latitude, longitude]`` list is range-checked.
+        """
+        form = self.test_form.from_json(
+            {'name': u'john', 'count': 1, 'location': [52.3, 4.8]})
+        self.assertTrue(form.validate())
+        self.assertEqual([52.3, 4.8], form.location.data)
+
+        form = self.test_form.from_json(
+            {'name': u'john', 'count': 1, 'location': u'52.3, 4.8'})
+        self.assertTrue(form.validate())
+        self.assertEqual([52.3, 4.8], form.location.data)
+
+        form = self.test_form.from_json(
+            {'name': u'john', 'count': 1, 'location': [95, 4.8]})
+        self.assertFalse(form.validate())
+        self.assertEqual(
+            ['Latitude must be between -90 and 90.'],
+            form.errors['location'])
+
+        form = self.test_form.from_json(
+            {'name': u'john', 'count': 1, 'location': [52.3]})
+        self.assertFalse(form.validate())
+        self.assertEqual(
+            ['Not a valid coordinate pair.'], form.errors['location'])
+
+    def test_nested_numbers(self):
+        """
+        Test that numbers in nested objects are processed as their text.
+        """
+        form = self.test_form.from_json({
+            'name': u'john',
+            'count': 1,
+            'address': {'city': 1234, 'active': None},
+            'tags': [12, 1.5],
+        })
+
+        self.assertTrue(form.validate())
+        self.assertEqual(u'1234', form.address.form.city.data)
+        self.assertEqual([u'12', u'1.5'], form.tags.data)
+
+    def test_form_data_names(self):
+        """
+        Test that form data names can be used as keys, e.g. of CSV rows.
+        """
+        form = self.test_form.from_json({
+            'name': u'john',
+            'count': u'1',
+            'address-city': u'Amsterdam',
+            'address-active': u'y',
+            'tags-0': u'a',
+        })
+
+        self.assertTrue(form.validate())
+        self.assertEqual(u'Amsterdam', form.address.form.city.data)
+        self.assertIs(True, form.address.form.active.data)
+        self.assertEqual([u'a'], form.tags.data)
+
+    def test_bulk_validate(self):
+        """
+        Test that ``bulk_validate`` processes the rows as JSON.
+        """
+        results = self.test_form.bulk_validate([
+            {'name': 12345, 'count': 1},
+            {'name': u'john', 'count': 3.7},
+            {'name': u'john', 'count': 1, 'location': [52.3, 4.8]},
+            {'name': u'john', 'count': 1, 'active': False},
+            {'name': u'john', 'count': u'1', 'address-city': u'x' * 21},
+        ])
+
+        self.assertEqual([
+            {'name': [u'This field is required.']},
+            {'count': [
+                'Not a valid integer value', u'Number must be at least 1.']},
+            {},
+            {},
+            {'address': {'city': [
+                u'Field cannot be longer than 20 characters.']}},
+        ], results)
+
+    def test_same_as_form_data(self):
+        """
+        Test that the result equals processing the same values as strings.
+        """
+        data = {'name': u'john', 'count': 0, 'ratio': 2.5, 'active': True}
+        formdata = DummyPostData({
+            'name': u'john', 'count': u'0', 'ratio': u'2.5', 'active': u'y'})
+
+        json_form = self.test_form.from_json(data)
+        form = self.test_form(formdata)
+
+        self.assertEqual(form.validate(), json_form.validate())
+        self.assertEqual(form.errors, json_form.errors)
+        for name in data:
+            self.assertEqual(form[name].data, json_form[name].data)
+
+    def test_obj(self):
+        """
+        Test that the missing and ``null`` values are taken from ``obj``.
+        """
+        document = self.document(name=u'john', count=5, ratio=1.5)
+        form = self.test_form.from_json(
+            {'count': 6, 'ratio': None}, obj=document)
+
+        self.assertEqual(u'john', form.name.data)
+        self.assertEqual(6, form.count.data)
+        self.assertEqual(1.5, form.ratio.data)
+
+        changes = form.changed_data()
+        self.assertEqual(6, changes['count'])
+        self.assertNotIn('name', changes)
+        self.assertNotIn('ratio', changes)
+
+    def test_prefix(self):
+        """
+        Test the form data path with a prefix.
+        """
+        form = self.test_form.from_json(
+            {'name': u'john', 'count': u'7'}, prefix='user')
+
+        self.assertEqual(7, form.count.data)
+        self.assertEqual('user-count', form.count.name)
+
+
+class UniqueDocumentFormTestCase(MongomockTestCase):
+    """
+    Tests the uniqueness validation of
+    :py:class:`wtfmongoengine.forms.DocumentForm`.
+    """
+    def setUp(self):
+        super(UniqueDocumentFormTestCase, self).setUp()
+
+        class UniqueDocument(Document):
+            email = fields.StringField(unique=True)
+            name = fields.StringField(unique_with='city')
+            city = fields.StringField()
+
+        class UniqueForm(DocumentForm):
+            class Meta:
+                document_class = UniqueDocument
+
+        self.document = UniqueDocument
+        self.test_form = UniqueForm
+        self.existing = UniqueDocument(
+            email=u'john@example.com', name=u'john', city=u'Amsterdam'
+        ).save()
+
+    def test_validate(self):
+        """
+        Test validating a single form.
+        """
+        form = self.test_form(DummyPostData({
+            'email': u'john@example.com',
+            'name': u'john',
+            'city': u'Amsterdam',
+        }))
+
+        self.assertFalse(form.validate())
+        self.assertEqual(['email', 'name'], sorted(form.errors.keys()))
+        self.assertEqual(
+            ['This value is already in use.'], form.errors['email'])
+
+        form = self.test_form(DummyPostData({
+            'email': u'jane@example.com',
+            'name': u'john',
+            'city': u'Rotterdam',
+        }))
+        self.assertTrue(form.validate())
+
+    def test_validate_bound(self):
+        """
+        Test that the bound document does not conflict with itself.
+        """
+        form = self.test_form(obj=self.existing)
+
+        self.assertTrue(form.validate())
+
+    def test_bulk_validate(self):
+        """
+        Test that the rows are checked with a single query per field.
+        """
+        rows = [
+            {'email': u'jane@example.com', 'name': u'jane', 'city': u'A'},
+            {'email': u'john@example.com', 'name': u'john', 'city': u'B'},
+            {'email': u'jane@example.com', 'name': u'jane', 'city': u'B'},
+            {'email': u'joe@example.com', 'name': u'john',
+             'city': u'Amsterdam'},
+        ]
+        queryset_class = type(self.document.objects)
+        scalar = queryset_class.scalar
+
+        with mock.patch.object(
+                queryset_class, 'scalar', autospec=True,
+                side_effect=scalar) as mock_scalar, \
+                mock.patch.object(queryset_class, 'first') as mock_first:
+            results = self.test_form.bulk_validate(rows)
+
+        self.assertEqual(2, mock_scalar.call_count)
+        self.assertEqual(0, mock_first.call_count)
+        self.assertEqual({}, results[0])
+        self.assertEqual(
+            {'email': ['This value is already in use.']}, results[1])
+        self.assertEqual(
+            {'email': ['This value is duplicated in the batch.']},
+            results[2]
+        )
+        self.assertEqual(
+            {'name': ['This value is already in use.']}, results[3])
+
+    def test_bulk_validate_documents_lists(self):
+        """
+        Test the batch check of unique lists and embedded documents.
+        """
+        class UniqueTags(Document):
+            tags = fields.ListField(fields.StringField(), unique=True)
+
+        class UniqueTagsForm(DocumentForm):
+            class Meta:
+                document_class = UniqueTags
+
+        class BatchAddress(EmbeddedDocument):
+            city = fields.StringField()
+
+        class BatchAddressDocument(Document):
+            address = fields.EmbeddedDocumentField(BatchAddress, unique=True)
+
+        class BatchAddressForm(DocumentForm):
+            class Meta:
+                document_class = BatchAddressDocument
+
+        UniqueTags(tags=[u'x']).save()
+
+        self.assertEqual([
+            {'tags': ['This value is already in use.']},
+            {},
+            {},
+            {'tags': ['This value is duplicated in the batch.']},
+        ], UniqueTagsForm.bulk_validate([
+            {'tags-0': u'x'},
+            {'tags-0': u'x', 'tags-1': u'y'},
+            {'tags-0': u'y'},
+            {'tags-0': u'y'},
+        ]))
+        self.assertEqual([
+            {},
+            {'address': ['This value is duplicated in the batch.']},
+            {},
+        ], BatchAddressForm.bulk_validate([
+            {'address-city': u'Amsterdam'},
+            {'address-city': u'Amsterdam'},
+            {'address-city': u'Utrecht'},
+        ]))
+
+    def test_embedded(self):
+        """
+        Test that a unique embedded document is queried as a whole.
+        """
+        class UniqueAddress(EmbeddedDocument):
+            city = fields.StringField(max_length=20)
+
+        class UniqueAddressDocument(Document):
+            address = fields.EmbeddedDocumentField(UniqueAddress, unique=True)
+
+        class UniqueAddressForm(DocumentForm):
+            class Meta:
+                document_class = UniqueAddressDocument
+
+        existing = UniqueAddressDocument(
+            address=UniqueAddress(city=u'Amsterdam')).save()
+
+        # mongomock does not match embedded documents as a whole
+        with mock.patch.object(UniqueAddressDocument, 'objects') as objects:
+            objects.return_value.only.return_value.first.return_value = \
+                existing
+
+            form = UniqueAddressForm(
+                DummyPostData({'address-city': u'Amsterdam'}))
+            self.assertFalse(form.validate())
+            self.assertEqual(
+                {'address': ['This value is already in use.']}, form.errors)
+            objects.assert_called_once_with(
+                address=UniqueAddress(city=u'Amsterdam'))
+
+            form = UniqueAddressForm(
+                DummyPostData({'address-city': u'Amsterdam'}))
+            self.assertFalse(form.async_validate(pool=ThreadPool(2)))
+            self.assertEqual(
+                {'address': ['This value is already in use.']}, form.errors)
+
+            objects.reset_mock()
+            form = UniqueAddressForm(
+                DummyPostData({'address-city': u'x' * 21}))
+            self.assertFalse(form.validate())
+            self.assertEqual(
+                {'address': {'city': [
+                    u'Field cannot be longer than 20 characters.']}},
+                form.errors
+            )
+
+            form = UniqueAddressForm(DummyPostData({}))
+            self.assertTrue(form.validate())
+            self.assertFalse(objects.called)
+
+
+class AsyncValidateTestCase(unittest.TestCase):
+    """
+    Tests :py:meth:`wtfmongoengine.forms.DocumentForm.async_validate`.
+    """
+    def setUp(self):
+        class AsyncDocument(Document):
+            name = fields.StringField(required=True, max_length=10)
+            email = fields.StringField()
+            nickname = fields.StringField()
+
+        self.backend = FakeBackend(
+            values=[u'taken', u'taken@example.com'], latency=0.1)
+        blocking = FakeBackendValidator(self.backend)
+
+        class AsyncForm(DocumentForm):
+            class Meta:
+                document_class = AsyncDocument
+
+            name = wtfields.TextField(validators=[
+                validators.Required(), validators.Length(max=10), blocking])
+            email = wtfields.TextField(validators=[blocking])
+            nickname = wtfields.TextField(validators=[blocking])
+
+        self.test_form = AsyncForm
+
+    def test_concurrent(self):
+        """
+        Test that the blocking validators run concurrently.
+        """
+        form = self.test_form(DummyPostData({
+            'name': u'taken',
+            'email': u'taken@example.com',
+            'nickname': u'free',
+        }))
+
+        # every check blocks until all three are running
+        self.backend.latency = None
+        self.backend.release_at = 3
+
+        self.assertFalse(form.async_validate())
+
+        self.assertEqual(3, self.backend.calls)
+        self.assertEqual(3, self.backend.max_active)
+        self.assertEqual({
+            'name': [u'Already exists.'],
+            'email': [u'Already exists.'],
+        }, form.errors)
+
+    def test_valid(self):
+        """
+        Test a valid form, with the same result as ``validate``.
+        """
+        formdata = DummyPostData({
+            'name': u'john', 'email': u'john@example.com'})
+
+        form = self.test_form(formdata)
+        self.assertTrue(form.async_validate())
+        self.assertEqual({}, form.errors)
+
+        form = self.test_form(formdata)
+        self.assertTrue(form.validate())
+        self.assertIsInstance(form.name.validators[-1], FakeBackendValidator)
+
+    def test_other_errors(self):
+        """
+        Test that only fields without other errors get blocking errors.
+        """
+        form = self.test_form(DummyPostData({'name': u'a name too long'}))
+
+        self.assertFalse(form.async_validate())
+        self.assertEqual(
+            ['Field cannot be longer than 10 characters.'],
+            form.errors['name']
+        )
+
+    def test_timeout(self):
+        """
+        Test that checks which don't finish in time are errors.
+        """
+        # the checks block until released, after the form is validated
+        self.backend.latency = None
+        self.addCleanup(self.backend.released.set)
+        self.test_form.async_timeout = 0.05
+        form = self.test_form(DummyPostData({'name': u'john'}))
+
+        self.assertFalse(form.async_validate())
+
+        self.assertFalse(self.backend.released.is_set())
+        self.assertEqual(['Validation timed out.'], form.errors['name'])
+
+    def test_pool(self):
+        """
+        Test passing the pool to run the checks in.
+        """
+        pool = ThreadPool(1)
+        self.addCleanup(pool.terminate)
+        form = self.test_form(DummyPostData({
+            'name': u'john', 'email': u'taken@example.com'}))
+
+        self.assertFalse(form.async_validate(pool=pool))
+        self.assertEqual(1, self.backend.max_active)
+        self.assertEqual(['email'], list(form.errors.keys()))
+
+
+class AsyncValidateDatabaseTestCase(MongomockTestCase):
+    """
+    Tests :py:meth:`wtfmongoengine.forms.DocumentForm.async_validate` with
+    the database-backed checks.
+    """
+    def setUp(self):
+        super(AsyncValidateDatabaseTestCase, self).setUp()
+
+        class AsyncAuthor(Document):
+            name = fields.StringField()
+
+        class AsyncPost(Document):
+            slug = fields.StringField(unique=True)
+            author = fields.ReferenceField(AsyncAuthor)
+
+        class AsyncPostForm(DocumentForm):
+            class Meta:
+                document_class = AsyncPost
+
+        self.author = AsyncAuthor(name=u'john').save()
+        AsyncPost(slug=u'taken', author=self.author).save()
+        self.test_form = AsyncPostForm
+
+    def test_async_validate(self):
+        """
+        Test the reference lookup and the uniqueness check.
+        """
+        form = self.test_form(DummyPostData({
+            'slug': u'taken', 'author': unicode(self.author.pk)}))
+
+        self.assertFalse(form.async_validate(timeout=5))
+        self.assertEqual(
+            {'slug': ['This value is already in use.']}, form.errors)
+        self.assertEqual(self.author.pk, form.author.data.pk)
+
+        form = self.test_form(DummyPostData({
+            'slug': u'free', 'author': unicode(ObjectId())}))
+
+        self.assertFalse(form.async_validate(timeout=5))
+        self.assertEqual(['author'], list(form.errors.keys()))
+
+
+class PickleDocumentFormTestCase(unittest.TestCase):
+    """
+    Tests pickling generated :py:class:`wtfmongoengine.forms.DocumentForm`
+    classes and instances.
+    """
+    def setUp(self):
+        class PickledForm(DocumentForm):
+            class Meta:
+                document_class = SchemaDocument
+                exclude = ('parent',)
+
+        self.test_form = PickledForm
+
+    def test_class(self):
+        """
+        Test that a non importable class is pickled by reference.
+        """
+        data = pickle.dumps(self.test_form, pickle.HIGHEST_PROTOCOL)
+        form_class = pickle.loads(data)
+
+        self.assertLess(len(data), 200)
+        self.assertIs(
+            document_form_class(SchemaDocument, None, ('parent',)),
+            form_class
+        )
+        self.assertIs(form_class, pickle.loads(data))
+        self.assertEqual(
+            ['address', 'age', 'name', 'tags'],
+            sorted(form_class()._fields.keys())
+        )
+
+    def test_class_lazy(self):
+        """
+        Test that a lazy class is pickled before it is converted.
+        """
+        class LazyForm(DocumentForm):
+            class Meta:
+                document_class = SchemaDocument
+                lazy = True
+
+        for module in (pickle, cPickle):
+            form_class = module.loads(module.dumps(LazyForm))
+            self.assertIs(document_form_class(SchemaDocument), form_class)
+
+    def test_class_reference_labels(self):
+        """
+        Test that the ``reference_labels`` of a class are pickled.
+        """
+        class LabelledForm(DocumentForm):
+            class Meta:
+                document_class = SchemaDocument
+                reference_labels = {'parent': 'name'}
+
+        form_class = pickle.loads(pickle.dumps(LabelledForm))
+
+        self.assertEqual('name', form_class.parent.kwargs['label_field'])
+
+    def test_class_declared(self):
+        """
+        Test that a non importable class with declarations can't be pickled.
+        """
+        class ValidatedForm(self.test_form):
+            def validate_name(self, field):
+                if field.data == 'bad':
+                    raise validators.ValidationError('no bad')
+
+        class Mixin(object):
+            label = 'Mixin'
+
+        class MixedForm(self.test_form, Mixin):
+            pass
+
+        for form_class in (ValidatedForm, MixedForm):
+            self.assertRaises(
+                pickle.PicklingError, pickle.dumps, form_class)
+
+        rows = [{'name': 'bad', 'age': '1'}, {'name': 'good', 'age': '1'}]
+        self.assertRaises(
+            pickle.PicklingError,
+            ValidatedForm.bulk_validate, rows, processes=2)
+
+    def test_importable_class(self):
+        """
+        Test that an importable class is pickled by name.
+        """
+        self.assertIs(DocumentForm, pickle.loads(pickle.dumps(DocumentForm)))
+
+    def test_class_without_document(self):
+        """
+        Test that a non importable class without document can't be pickled.
+        """
+        class PlainForm(DocumentForm):
+            pass
+
+        self.assertRaises(pickle.PicklingError, pickle.dumps, PlainForm)
+
+    def test_instance(self):
+        """
+        Test that a bound form is restored with its data and errors.
+        """
+        form = self.test_form(DummyPostData({
+            'name': 'a name',
+            'age': '3',
+            'address-city': 'Amsterdam',
+            'tags-0': 'toolong',
+        }))
+        self.assertFalse(form.validate())
+
+        for dumps in (pickle.dumps, cPickle.dumps):
+            restored = pickle.loads(dumps(form, pickle.HIGHEST_PROTOCOL))
+
+            self.assertEqual(form.data, restored.data)
+            self.assertEqual(form.errors, restored.errors)
+            self.assertEqual('a name', restored.name.raw_data[0])
+            self.assertEqual(
+                'Amsterdam', restored.address.form.city.data)
+
+            restored.process(DummyPostData({'name': 'name', 'age': '3'}))
+            self.assertTrue(restored.validate())
+
+    def test_bulk_validate_processes(self):
+        """
+        Test validating rows in a process pool with a non importable class.
+        """
+        rows = [{'name': 'name{0}'.format(i), 'age': str(i)}
+                for i in range(10)]
+
+        self.assertEqual(
+            self.test_form.bulk_validate(rows),
+            self.test_form.bulk_validate(rows, processes=2, chunk_size=3)
+        )
+
+
+class DocumentFormSaveTestCase(MongomockTestCase):
+    """
+    Test binding and saving documents with
+    :py:class:`wtfmongoengine.forms.DocumentForm`.
+    """
+    def setUp(self):
+        super(DocumentFormSaveTestCase, self).setUp()
+
+        class Address(EmbeddedDocument):
+            street = fields.StringField()
+            city = fields.StringField()
+
+        class Person(Document):
+            name = fields.StringField(required=True)
+            email = fields.EmailField()
+            age = fields.IntField()
+            address = fields.EmbeddedDocumentField(Address)
+
+        class PersonForm(DocumentForm):
+            class Meta:
+                document_class = Person
+
+        self.person = Person(
+            name='John',
+            email='john@example.com',
+            age=30,
+            address=Address(street='Main street', city='Amsterdam'),
+        ).save()
+        self.person_class = Person
+        self.form_class = PersonForm
+
+    def test_changed_data(self):
+        """
+        Test that only the changed (embedded) fields are returned.
+        """
+        form = self.form_class(DummyPostData({
+            'name': 'John',
+            'email': 'john@example.com',
+            'age': '31',
+            'address-street': 'Main street',
+            'address-city': 'Utrecht',
+        }), obj=self.person)
+
+        self.assertTrue(form.validate())
+        self.assertEqual(
+            {'age': 31, 'address__city': 'Utrecht'}, form.changed_data())
+
+    def test_save(self):
+        """
+        Test that only the changed fields are updated.
+        """
+        form = self.form_class(DummyPostData({
+            'name': 'Johnny',
+            'email': 'john@example.com',
+            'age': '30',
+            'address-street': 'Main street',
+            'address-city': 'Amsterdam',
+        }), obj=self.person)
+
+        self.assertTrue(form.validate())
+        self.assertEqual({'name': 'Johnny'}, form.changed_data())
+        self.assertIs(self.person, form.save())
+        self.assertEqual('Johnny', self.person.name)
+
+        person = self.person_class.objects.get(pk=self.person.pk)
+        self.assertEqual('Johnny', person.name)
+        self.assertEqual(30, person.age)
+        self.assertEqual('Amsterdam', person.address.city)
+
+    def test_save_sorted_list(self):
+        """
+        Test that a sorted list is compared and saved in sorted order.
+        """
+        class Ranking(Document):
+            scores = fields.SortedListField(fields.IntField())
+
+        class RankingForm(DocumentForm):
+            class Meta:
+                document_class = Ranking
+
+        ranking = Ranking(scores=[1, 3, 9]).save()
+        data = {'scores-0': '9', 'scores-1': '1', 'scores-2': '3'}
+
+        form = RankingForm(DummyPostData(data), obj=ranking)
+        self.assertTrue(form.validate())
+        self.assertEqual({}, form.changed_data())
+
+        data['scores-2'] = '2'
+        form = RankingForm(DummyPostData(data), obj=ranking)
+        self.assertTrue(form.validate())
+        self.assertEqual({'scores': [1, 2, 9]}, form.changed_data())
+
+        form.save()
+        son = Ranking._get_collection().find_one({'_id': ranking.pk})
+        self.assertEqual([1, 2, 9], son['scores'])
+
+    def test_save_declared(self):
+        """
+        Test that declared fields which are not on the document are ignored.
+        """
+        class ConfirmForm(self.form_class):
+            confirm = wtfields.TextField()
+
+        form = ConfirmForm(DummyPostData({
+            'name': 'Johnny',
+            'email': 'john@example.com',
+            'age': '30',
+            'address-street': 'Main street',
+            'address-city': 'Amsterdam',
+            'confirm': 'yes',
+        }), obj=self.person)
+
+        self.assertTrue(form.validate())
+        self.assertEqual({'name': 'Johnny'}, form.changed_data())
+
+        form.save()
+        son = self.person_class._get_collection().find_one(
+            {'_id': self.person.pk})
+        self.assertEqual('Johnny', son['name'])
+        self.assertNotIn('confirm', son)
+
+    def test_save_new(self):
+        """
+        Test saving a new document.
+        """
+        form = self.form_class(DummyPostData({
+            'name': 'Jane',
+            'email': 'jane@example.com',
+            'age': '25',
+            'address-city': 'Rotterdam',
+        }))
+
+        self.assertTrue(form.validate())
+        person = form.save()
+
+        self.assertIsNot(None, person.pk)
+        person = self.person_class.objects.get(pk=person.pk)
+        self.assertEqual('Jane', person.name)
+        self.assertEqual('Rotterdam', person.address.city)
+
+
+class DocumentFormLoadTestCase(MongomockTestCase):
+    """
+    Test loading documents with only the fields of
+    :py:class:`wtfmongoengine.forms.DocumentForm`.
+    """
+    def setUp(self):
+        super(DocumentFormLoadTestCase, self).setUp()
+
+        class Article(Document):
+            title = fields.StringField(required=True)
+            summary = fields.StringField()
+            body = fields.StringField()
+
+        class TitleForm(DocumentForm):
+            class Meta:
+                document_class = Article
+                fields = ('title', 'summary')
+
+        self.article = Article(
+            title='Title', summary='Summary', body='x' * 1000).save()
+        self.article_class = Article
+        self.form_class = TitleForm
+
+    def test_only_fields(self):
+        """
+        Test :py:meth:`.DocumentForm.only_fields`.
+        """
+        self.assertEqual(('summary', 'title'), self.form_class.only_fields())
+
+    def test_load(self):
+        """
+        Test :py:meth:`.DocumentForm.load`.
+        """
+        form = self.form_class.load(self.article.pk)
+
+        self.assertEqual('Title', form.title.data)
+        self.assertEqual(self.article.pk, form._instance.pk)
+        self.assertEqual(None, form._instance.body)
+
+        self.assertEqual(None, self.form_class.load(ObjectId()))
+
+    def test_load_save(self):
+        """
+        Test saving a form of a partially loaded document.
+        """
+        form = self.form_class.load(
+            self.article.pk, DummyPostData({'title': 'New', 'summary': ''}))
+        self.assertTrue(form.validate())
+        form.save()
+
+        article = self.article_class.objects.get(pk=self.article.pk)
+        self.assertEqual('New', article.title)
+        self.assertEqual('x' * 1000, article.body)
+
+    def test_for_queryset(self):
+        """
+        Test :py:meth:`.DocumentForm.for_queryset`.
+        """
+        self.article_class(title='Other', body='y').save()
+
+        forms = list(self.form_class.for_queryset(
+            self.article_class.objects))
+
+        self.assertEqual(2, len(forms))
+        self.assertEqual(
+            ['Other', 'Title'], sorted(form.title.data for form in forms))
+        self.assertTrue(all(form._instance.body is None for form in forms))
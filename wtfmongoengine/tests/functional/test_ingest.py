@@ -0,0 +1,256 @@
+from StringIO import StringIO
+
+import mock
+
+from mongoengine.document import Document, EmbeddedDocument
+from mongoengine.errors import NotUniqueError
+from mongoengine import fields
+
+from wtfmongoengine.forms import DocumentForm
+from wtfmongoengine.ingest import RECORD_ERRORS, Ingestion
+from wtfmongoengine.tests.utils import MongomockTestCase
+
+
+class IngestionTestCase(MongomockTestCase):
+    """
+    Tests :py:class:`wtfmongoengine.ingest.Ingestion`.
+    """
+    def setUp(self):
+        super(IngestionTestCase, self).setUp()
+
+        class IngestAddress(EmbeddedDocument):
+            city = fields.StringField(max_length=20)
+            verified = fields.BooleanField()
+
+        class IngestDocument(Document):
+            name = fields.StringField(required=True, max_length=10)
+            age = fields.IntField(min_value=1)
+            address = fields.EmbeddedDocumentField(IngestAddress)
+            tags = fields.ListField(fields.StringField(max_length=5))
+            code = fields.StringField(required=True)
+            active = fields.BooleanField()
+
+        class IngestForm(DocumentForm):
+            class Meta:
+                document_class = IngestDocument
+                exclude = ('code',)
+
+        self.document = IngestDocument
+        self.test_form = IngestForm
+
+    def test_ndjson(self):
+        """
+        Test importing NDJSON, with invalid lines.
+        """
+        source = StringIO('\n'.join([
+            '{"name": "john", "age": 30, "address": {"city": "Amsterdam"},'
+            ' "tags": ["a", "b"]}',
+            '',
+            '{"name": "a name which is too long", "age": 3}',
+            '{"name": ',
+            '[1, 2]',
+            '{"name": "jane", "age": "31"}',
+        ]))
+        ingestion = Ingestion(self.test_form, chunk_size=1)
+
+        errors = list(ingestion.run(source))
+
+        self.assertEqual([3, 4, 5], [number for number, e in errors])
+        self.assertEqual(['name'], list(errors[0][1].keys()))
+        self.assertEqual([RECORD_ERRORS], list(errors[1][1].keys()))
+        self.assertEqual(
+            ['Record is not an object.'], errors[2][1][RECORD_ERRORS])
+        self.assertEqual({
+            'read': 5,
+            'invalid': 3,
+            'inserted': 2,
+            'failed': 0,
+            'chunks': 2,
+        }, ingestion.counters)
+
+        john = self.document.objects.get(name='john')
+        self.assertEqual(30, john.age)
+        self.assertEqual('Amsterdam', john.address.city)
+        self.assertEqual(['a', 'b'], john.tags)
+        self.assertEqual(31, self.document.objects.get(name='jane').age)
+
+    def test_csv(self):
+        """
+        Test importing CSV.
+        """
+        source = StringIO(
+            'name,age\r\n'
+            'john,30\r\n'
+            'jane,0\r\n'
+            'joe\r\n'
+            'jim,32\r\n'
+        )
+        ingestion = Ingestion(self.test_form)
+
+        errors = list(ingestion.run(source, 'csv'))
+
+        self.assertEqual([3, 4], [number for number, e in errors])
+        self.assertEqual(['age'], list(errors[0][1].keys()))
+        self.assertEqual(
+            ['Expected 2 columns, got 1.'], errors[1][1][RECORD_ERRORS])
+        self.assertEqual(2, ingestion.counters['inserted'])
+        self.assertEqual(1, ingestion.counters['chunks'])
+        self.assertEqual(
+            ['jim', 'john'],
+            sorted(self.document.objects.scalar('name'))
+        )
+
+    def test_booleans(self):
+        """
+        Test that a JSON or CSV ``false`` is not a checked checkbox.
+        """
+        source = StringIO('\n'.join([
+            '{"name": "john", "age": 30, "active": false,'
+            ' "address": {"city": "Amsterdam", "verified": false}}',
+            '{"name": "jane", "age": 31, "active": true,'
+            ' "address": {"city": "Utrecht", "verified": true}}',
+        ]))
+        ingestion = Ingestion(self.test_form)
+
+        self.assertEqual([], list(ingestion.run(source)))
+        self.assertEqual(
+            [], list(ingestion.run(
+                StringIO('name,age,active\r\njim,32,false\r\n'), 'csv')))
+
+        john = self.document.objects.get(name='john')
+        self.assertIs(False, john.active)
+        self.assertIs(False, john.address.verified)
+        jane = self.document.objects.get(name='jane')
+        self.assertIs(True, jane.active)
+        self.assertIs(True, jane.address.verified)
+        self.assertIs(False, self.document.objects.get(name='jim').active)
+
+    def test_exception(self):
+        """
+        Test that an exception is reported as the error of its record.
+        """
+        class BrokenForm(self.test_form):
+            def validate_age(self, field):
+                if field.data == 13:
+                    raise TypeError('Unlucky number.')
+
+        records = [
+            {'name': 'john', 'age': 30},
+            {'name': 'jane', 'age': 13},
+            {'name': 'joe', 'age': 31},
+        ]
+        ingestion = Ingestion(BrokenForm)
+
+        errors = list(ingestion.run(records, 'records'))
+
+        self.assertEqual(
+            [(2, {RECORD_ERRORS: ['TypeError: Unlucky number.']})], errors)
+        self.assertEqual(3, ingestion.counters['read'])
+        self.assertEqual(1, ingestion.counters['invalid'])
+        self.assertEqual(2, ingestion.counters['inserted'])
+
+    def test_chunks(self):
+        """
+        Test that the documents are inserted in chunks.
+        """
+        records = ({'name': 'name{0}'.format(i), 'age': i + 1}
+                   for i in range(5))
+        ingestion = Ingestion(self.test_form, chunk_size=2)
+
+        with mock.patch.object(
+                type(self.document.objects), 'insert',
+                autospec=True) as insert:
+            self.assertEqual([], list(ingestion.run(records, 'records')))
+
+        self.assertEqual(
+            [2, 2, 1], [len(c[0][1]) for c in insert.call_args_list])
+        self.assertEqual(5, ingestion.counters['inserted'])
+        self.assertEqual(3, ingestion.counters['chunks'])
+
+    def test_insert_failed(self):
+        """
+        Test that every record of a failed chunk is reported.
+        """
+        records = [{'name': 'john', 'age': 30}, {'name': 'jane', 'age': 31}]
+        ingestion = Ingestion(self.test_form)
+
+        with mock.patch.object(
+                type(self.document.objects), 'insert',
+                side_effect=NotUniqueError('Duplicate.')):
+            errors = list(ingestion.run(records, 'records'))
+
+        self.assertEqual([
+            (1, {RECORD_ERRORS: ['Duplicate.']}),
+            (2, {RECORD_ERRORS: ['Duplicate.']}),
+        ], errors)
+        self.assertEqual(2, ingestion.counters['failed'])
+        self.assertEqual(0, ingestion.counters['inserted'])
+
+    def test_validate_documents(self):
+        """
+        Test validating the documents before inserting them.
+        """
+        ingestion = Ingestion(self.test_form, validate_documents=True)
+
+        errors = list(ingestion.run([{'name': 'john', 'age': 30}], 'records'))
+
+        self.assertEqual([1], [number for number, e in errors])
+        self.assertEqual(['code'], list(errors[0][1].keys()))
+        self.assertEqual(0, self.document.objects.count())
+
+    def test_unknown_format(self):
+        """
+        Test that an unknown format is refused.
+        """
+        ingestion = Ingestion(self.test_form)
+
+        self.assertRaises(ValueError, ingestion.run, [], 'xml')
+
+
+class UniqueIngestionTestCase(MongomockTestCase):
+    """
+    Tests the uniqueness checks of :py:class:`wtfmongoengine.ingest.Ingestion`.
+    """
+    def setUp(self):
+        super(UniqueIngestionTestCase, self).setUp()
+
+        class UniqueIngestDocument(Document):
+            email = fields.StringField(unique=True)
+
+        class UniqueIngestForm(DocumentForm):
+            class Meta:
+                document_class = UniqueIngestDocument
+
+        self.document = UniqueIngestDocument
+        self.test_form = UniqueIngestForm
+        UniqueIngestDocument(email=u'john@example.com').save()
+
+    def test_unique(self):
+        """
+        Test that duplicates are left out, checked once per chunk.
+        """
+        records = [
+            {'email': u'jane@example.com'},
+            {'email': u'john@example.com'},
+            {'email': u'jane@example.com'},
+            {'email': u'joe@example.com'},
+            {'email': u'jane@example.com'},
+        ]
+        ingestion = Ingestion(self.test_form, chunk_size=3)
+        queryset_class = type(self.document.objects)
+        scalar = queryset_class.scalar
+
+        with mock.patch.object(
+                queryset_class, 'scalar', autospec=True,
+                side_effect=scalar) as mock_scalar:
+            errors = list(ingestion.run(records, 'records'))
+
+        self.assertEqual(2, mock_scalar.call_count)
+        self.assertEqual([
+            (2, {'email': ['This value is already in use.']}),
+            (3, {'email': ['This value is duplicated in the batch.']}),
+            (5, {'email': ['This value is already in use.']}),
+        ], errors)
+        self.assertEqual(3, ingestion.counters['invalid'])
+        self.assertEqual(2, ingestion.counters['inserted'])
+        self.assertEqual(3, self.document.objects.count())
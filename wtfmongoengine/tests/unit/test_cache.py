@@ -0,0 +1,174 @@
+import os
+import shutil
+import tempfile
+
+from mongoengine import fields
+from mongoengine.document import Document
+from unittest2 import TestCase
+
+from wtfmongoengine.cache import (
+    ConversionCache, SchemaCache, schema_fingerprint)
+
+
+class ConversionCacheTestCase(TestCase):
+    """
+    Test :py:class:`.ConversionCache`.
+    """
+    def test_get_set(self):
+        """
+        Test :py:meth:`.ConversionCache.get` and ``set``.
+        """
+        cache = ConversionCache()
+        self.assertEqual(None, cache.get('key'))
+
+        cache.set('key', 'value')
+        self.assertEqual('value', cache.get('key'))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_lru_eviction(self):
+        """
+        Test that the least recently used entry is evicted.
+        """
+        cache = ConversionCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(2, len(cache))
+
+    def test_invalidate_document_class(self):
+        """
+        Test :py:meth:`.ConversionCache.invalidate` for one document class.
+        """
+        # the document classes are compared by identity
+        document_a = object()
+        document_b = object()
+
+        cache = ConversionCache()
+        cache.set(('converter', document_a, None), 1)
+        cache.set(('converter', document_b, None), 2)
+        cache.invalidate(document_a)
+
+        self.assertNotIn(('converter', document_a, None), cache)
+        self.assertIn(('converter', document_b, None), cache)
+
+    def test_clear(self):
+        """
+        Test :py:meth:`.ConversionCache.clear`.
+        """
+        cache = ConversionCache(maxsize=10)
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('b')
+        cache.clear()
+
+        self.assertEqual({
+            'hits': 0,
+            'misses': 0,
+            'maxsize': 10,
+            'currsize': 0,
+        }, cache.info)
+
+
+class SchemaCacheTestCase(TestCase):
+    """
+    Test :py:class:`.SchemaCache`.
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = SchemaCache(os.path.join(self.directory, 'schemas'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_set(self):
+        """
+        Test :py:meth:`.SchemaCache.get` and ``set``.
+        """
+        self.assertEqual(None, self.cache.get('key', 'fp'))
+        self.assertTrue(self.cache.set('key', 'fp', ['schema']))
+        self.assertEqual(['schema'], self.cache.get('key', 'fp'))
+
+    def test_stale_fingerprint(self):
+        """
+        Test that an entry with another fingerprint is ignored.
+        """
+        self.cache.set('key', 'fp', ['schema'])
+        self.assertEqual(None, self.cache.get('key', 'other-fp'))
+
+    def test_unpicklable(self):
+        """
+        Test that a schema which can't be pickled is not stored.
+        """
+        self.assertFalse(self.cache.set('key', 'fp', [lambda: None]))
+        self.assertEqual(None, self.cache.get('key', 'fp'))
+
+    def test_corrupt_entry(self):
+        """
+        Test that an entry which can't be read is ignored.
+        """
+        self.cache.set('key', 'fp', ['schema'])
+        with open(self.cache.path('key'), 'wb') as f:
+            f.write('garbage')
+
+        self.assertEqual(None, self.cache.get('key', 'fp'))
+
+    def test_clear(self):
+        """
+        Test :py:meth:`.SchemaCache.clear`.
+        """
+        self.cache.set('key', 'fp', ['schema'])
+        self.cache.clear()
+        self.assertEqual([], os.listdir(self.cache.directory))
+
+
+class SchemaFingerprintTestCase(TestCase):
+    """
+    Test :py:func:`.schema_fingerprint`.
+    """
+    def make_document(self, **attrs):
+        return type('FingerprintDocument', (Document,), attrs)
+
+    def test_stable(self):
+        """
+        Test that equal definitions have an equal fingerprint.
+        """
+        def make():
+            return self.make_document(
+                name=fields.StringField(max_length=10, regex='a+'),
+                tags=fields.ListField(fields.StringField()),
+            )
+
+        first = make()
+        # shift the creation counters of the fields of the second class
+        fields.StringField()
+        self.assertEqual(
+            schema_fingerprint(first), schema_fingerprint(make()))
+
+    def test_changed(self):
+        """
+        Test that changing a field changes the fingerprint.
+        """
+        first = self.make_document(name=fields.StringField(max_length=10))
+        second = self.make_document(name=fields.StringField(max_length=20))
+        third = self.make_document(
+            name=fields.StringField(max_length=10), age=fields.IntField())
+
+        self.assertEqual(3, len(set([
+            schema_fingerprint(first),
+            schema_fingerprint(second),
+            schema_fingerprint(third),
+        ])))
+
+    def test_extra(self):
+        """
+        Test that the extra values are part of the fingerprint.
+        """
+        document = self.make_document(name=fields.StringField())
+        self.assertNotEqual(
+            schema_fingerprint(document, 1), schema_fingerprint(document, 2))
@@ -1,9 +1,15 @@
+import threading
+
 from unittest2 import TestCase
 
 from mock import Mock, patch
+from mongoengine.fields import EmailField, ImageField, StringField
+from wtforms.fields import TextField
 
+from wtfmongoengine.cache import ConversionCache
 from wtfmongoengine.forms import (
-    DocumentFormMetaClassBase, DocumentFieldConverter)
+    DocumentFormMetaClassBase, DocumentFieldConverter, _LazyMetaClassMixin)
+from wtfmongoengine.validators import compile_regex
 
 
 class DocumentFormMetaClassBaseTestCase(TestCase):
@@ -37,6 +43,131 @@ class DocumentFormMetaClassBaseTestCase(TestCase):
         )
         self.assertEqual('a-value', TestClass.field_a)
         self.assertEqual('b-value', TestClass.field_b)
+        # an eager class has no lookup hook
+        self.assertIs(DocumentFormMetaClassBase, type(TestClass))
+
+    @patch('wtfmongoengine.forms.DocumentFieldConverter')
+    def test___new__declared(self, DocumentFieldConverter):
+        """
+        Test that declared attributes are kept and take precedence.
+        """
+        converter = Mock()
+        converter.fields = {
+            'field_a': 'a-value',
+            'field_b': 'b-value'
+        }
+        DocumentFieldConverter.return_value = converter
+
+        class TestClass(object):
+            __metaclass__ = DocumentFormMetaClassBase
+
+            class Meta:
+                document_class = 'a-document'
+
+            field_b = 'declared-b'
+
+            def method(self):
+                return 'method'
+
+        self.assertEqual('a-value', TestClass.field_a)
+        self.assertEqual('declared-b', TestClass.field_b)
+        self.assertEqual('method', TestClass().method())
+        self.assertEqual(
+            ('a-document', None, None), TestClass._document_meta)
+
+    @patch('wtfmongoengine.forms.DocumentFieldConverter')
+    def test___new__lazy(self, DocumentFieldConverter):
+        """
+        Test that with ``lazy``, the conversion is done on first access.
+        """
+        converter = Mock()
+        converter.fields = {'field_a': 'a-value'}
+        DocumentFieldConverter.return_value = converter
+
+        class TestClass(object):
+            __metaclass__ = DocumentFormMetaClassBase
+
+            class Meta:
+                document_class = 'a-document'
+                lazy = True
+
+        self.assertEqual(0, DocumentFieldConverter.call_count)
+        self.assertIsInstance(TestClass, _LazyMetaClassMixin)
+        self.assertEqual('a-value', TestClass.field_a)
+        self.assertEqual('a-value', TestClass.field_a)
+        self.assertRaises(AttributeError, getattr, TestClass, 'field_b')
+        self.assertIs(DocumentFormMetaClassBase, type(TestClass))
+
+        DocumentFieldConverter.assert_called_once_with(
+            'a-document', None, None)
+
+    @patch('wtfmongoengine.forms.DocumentFieldConverter')
+    def test___call__lazy(self, DocumentFieldConverter):
+        """
+        Test that with ``lazy``, the conversion is done on instantiation.
+        """
+        converter = Mock()
+        converter.fields = {'field_a': 'a-value'}
+        DocumentFieldConverter.return_value = converter
+
+        class TestClass(object):
+            __metaclass__ = DocumentFormMetaClassBase
+
+            class Meta:
+                document_class = 'a-document'
+                lazy = True
+
+        class SubTestClass(TestClass):
+            pass
+
+        self.assertIsInstance(SubTestClass, _LazyMetaClassMixin)
+
+        SubTestClass()
+        TestClass()
+
+        self.assertIs(DocumentFormMetaClassBase, type(SubTestClass))
+        self.assertIs(DocumentFormMetaClassBase, type(TestClass))
+
+        DocumentFieldConverter.assert_called_once_with(
+            'a-document', None, None)
+        self.assertEqual('a-value', TestClass.__dict__['field_a'])
+
+    @patch('wtfmongoengine.forms.DocumentFieldConverter')
+    def test___getattr__lazy_concurrent(self, DocumentFieldConverter):
+        """
+        Test accessing a field while another thread converts the class.
+        """
+        converter = Mock()
+        converter.fields = {'field_a': 'a-value'}
+        DocumentFieldConverter.return_value = converter
+
+        class TestClass(object):
+            __metaclass__ = DocumentFormMetaClassBase
+
+            class Meta:
+                document_class = 'a-document'
+                lazy = True
+
+        class RacingLock(object):
+            # lets another thread convert the class while "waiting"
+            raced = False
+
+            def __enter__(self):
+                if not self.raced:
+                    self.raced = True
+                    thread = threading.Thread(
+                        target=getattr, args=(TestClass, 'field_a'))
+                    thread.start()
+                    thread.join()
+
+            def __exit__(self, *exc_info):
+                pass
+
+        with patch('wtfmongoengine.forms._materialize_lock', RacingLock()):
+            self.assertEqual('a-value', TestClass.field_a)
+
+        DocumentFieldConverter.assert_called_once_with(
+            'a-document', None, None)
 
 
 class DocumentFieldConverterTestCase(TestCase):
@@ -122,6 +253,66 @@ class DocumentFieldConverterTestCase(TestCase):
             'timestamp': 'timestamp-value',
         }, converter.fields)
 
+    def test_fields_cached(self):
+        """
+        Test that :py:meth:`.DocumentFieldConverter.fields` uses the cache.
+        """
+        converter = DocumentFieldConverter(self.document_class)
+        converter.cache = ConversionCache()
+        converter.convert = self.convert
+
+        first = converter.fields
+        second = converter.fields
+
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        self.assertEqual(4, self.convert.call_count)
+        self.assertEqual(1, converter.cache.hits)
+        self.assertEqual(1, converter.cache.misses)
+
+    def test_fields_cache_disabled(self):
+        """
+        Test :py:meth:`.DocumentFieldConverter.fields` without cache.
+        """
+        converter = DocumentFieldConverter(self.document_class)
+        converter.cache = None
+        converter.convert = self.convert
+
+        converter.fields
+        converter.fields
+
+        self.assertEqual(8, self.convert.call_count)
+
+    def test_cache_key(self):
+        """
+        Test :py:meth:`.DocumentFieldConverter.cache_key`.
+        """
+        self.assertEqual(
+            (DocumentFieldConverter, self.document_class, None),
+            DocumentFieldConverter(self.document_class).cache_key
+        )
+        self.assertEqual(
+            (
+                DocumentFieldConverter,
+                self.document_class,
+                ('fields', frozenset(['title', 'body'])),
+            ),
+            DocumentFieldConverter(
+                self.document_class,
+                fields=('body', 'title'),
+                exclude=('author',),
+            ).cache_key
+        )
+        self.assertEqual(
+            (
+                DocumentFieldConverter,
+                self.document_class,
+                ('exclude', frozenset(['author'])),
+            ),
+            DocumentFieldConverter(
+                self.document_class, exclude=['author']).cache_key
+        )
+
     @patch('wtfmongoengine.forms.validators')
     def test_convert(self, validators):
         """
@@ -140,12 +331,14 @@ class DocumentFieldConverterTestCase(TestCase):
 
         document_field = DocumentFieldMock()
 
-        converter = DocumentFieldConverter(Mock())
-        converter.from_documentfieldmock = Mock(return_value='wtfield')
+        class TestConverter(DocumentFieldConverter):
+            from_documentfieldmock = Mock(return_value='wtfield')
+
+        converter = TestConverter(Mock())
 
         result = converter.convert(document_field)
 
-        converter.from_documentfieldmock.assert_called_once_with(
+        TestConverter.from_documentfieldmock.assert_called_once_with(
             document_field,
             label='test field',
             validators=['required'],
@@ -155,14 +348,16 @@ class DocumentFieldConverterTestCase(TestCase):
 
         self.assertEqual('wtfield', result)
 
-    @patch('wtfmongoengine.forms.fields')
-    def test_convert_choices(self, fields):
+    @patch('wtfmongoengine.forms.ChoiceIndex')
+    @patch('wtfmongoengine.forms.IndexedSelectField')
+    def test_convert_choices(self, IndexedSelectField, ChoiceIndex):
         """
         Test ``convert`` with choices.
 
         Tests :py:meth:`.DocumentFieldConverter.convert`.
         """
-        fields.SelectField.return_value = 'select-field'
+        IndexedSelectField.return_value = 'select-field'
+        ChoiceIndex.return_value = 'index'
 
         class DocumentFieldMock(object):
             verbose_name = 'test field'
@@ -175,11 +370,13 @@ class DocumentFieldConverterTestCase(TestCase):
 
         result = converter.convert(DocumentFieldMock())
 
-        fields.SelectField.assert_called_once_with(
+        ChoiceIndex.assert_called_once_with(
+            [('a', 'Choice A'), ('b', 'Choice B')])
+        IndexedSelectField.assert_called_once_with(
             label='test field',
             validators=[],
             default='empty',
-            choices=[('a', 'Choice A'), ('b', 'Choice B')],
+            index='index',
             description='Make your choice'
         )
 
@@ -204,6 +401,110 @@ class DocumentFieldConverterTestCase(TestCase):
         result = converter.convert(DocumentFieldMock())
         self.assertEqual(None, result)
 
+    def test_convert_field_subclass(self):
+        """
+        Test that subclassed fields are converted by the parent handler.
+
+        Tests :py:meth:`.DocumentFieldConverter.convert`.
+        """
+        class DocumentFieldMock(object):
+            verbose_name = 'test field'
+            required = False
+            default = ''
+            choices = []
+            help_text = ''
+
+        class SubDocumentFieldMock(DocumentFieldMock):
+            pass
+
+        class TestConverter(DocumentFieldConverter):
+            from_documentfieldmock = Mock(return_value='wtfield')
+
+        converter = TestConverter(Mock())
+        self.assertEqual('wtfield', converter.convert(SubDocumentFieldMock()))
+
+    def test_register(self):
+        """
+        Test :py:meth:`.DocumentFieldConverter.register`.
+        """
+        class DocumentFieldMock(object):
+            verbose_name = 'test field'
+            required = False
+            default = ''
+            choices = []
+            help_text = ''
+
+        class SubDocumentFieldMock(DocumentFieldMock):
+            pass
+
+        class TestConverter(DocumentFieldConverter):
+            cache = None
+
+        handler = Mock(return_value='wtfield')
+        converter = TestConverter(Mock())
+
+        self.assertEqual(None, converter.convert(SubDocumentFieldMock()))
+
+        TestConverter.register(DocumentFieldMock, handler)
+        document_field = SubDocumentFieldMock()
+
+        self.assertEqual('wtfield', converter.convert(document_field))
+        handler.assert_called_once_with(
+            converter,
+            document_field,
+            label='test field',
+            validators=[],
+            default='',
+            description='',
+        )
+        self.assertEqual(
+            None,
+            DocumentFieldConverter.resolve_handler(SubDocumentFieldMock)
+        )
+
+    def test_register_unique(self):
+        """
+        Test that a registered handler gets the uniqueness validator.
+
+        Tests :py:meth:`.DocumentFieldConverter.convert`.
+        """
+        class DocumentFieldMock(object):
+            verbose_name = 'test field'
+            required = False
+            default = ''
+            choices = []
+            help_text = ''
+
+        class TestConverter(DocumentFieldConverter):
+            cache = None
+            unique_validator = Mock(return_value='unique')
+
+        def handler(converter, document_field, **kwargs):
+            # the validators are not passed on
+            kwargs.pop('validators')
+            return TextField(**kwargs)
+
+        TestConverter.register(DocumentFieldMock, handler)
+        result = TestConverter(Mock()).convert(DocumentFieldMock())
+
+        self.assertEqual(['unique'], result.kwargs['validators'])
+
+    def test_resolve_handler(self):
+        """
+        Test :py:meth:`.DocumentFieldConverter.resolve_handler`.
+        """
+        class StringFieldSubclass(StringField):
+            pass
+
+        self.assertEqual(
+            'from_stringfield',
+            DocumentFieldConverter.resolve_handler(StringFieldSubclass)
+        )
+        self.assertEqual(
+            'from_emailfield',
+            DocumentFieldConverter.resolve_handler(EmailField)
+        )
+
     @patch('wtfmongoengine.forms.validators')
     def test_common_string_kwargs(self, validators):
         """
@@ -229,7 +530,8 @@ class DocumentFieldConverterTestCase(TestCase):
             'validators': ['test', 'length-validator', 'regexp-validator'],
         }, kwargs)
         validators.Length.assert_called_once_with(max=10, min=5)
-        validators.Regexp.assert_called_once_with(regex='my-regex')
+        validators.Regexp.assert_called_once_with(
+            regex=compile_regex('my-regex'))
 
     @patch('wtfmongoengine.forms.validators')
     def test_common_string_kwargs_max_length_min_one(self, validators):
@@ -431,37 +733,113 @@ class DocumentFieldConverterTestCase(TestCase):
         self.assertRaises(
             NotImplementedError, converter.from_complexdatetimefield, Mock())
 
-    def test_from_listfield(self):
+    @patch('wtfmongoengine.forms.BoundedFieldList')
+    def test_from_listfield(self, BoundedFieldList):
         """
         Test :py:meth:`.DocumentFieldConverter.from_listfield`.
         """
+        BoundedFieldList.return_value = 'list-field'
+        document_field = Mock()
+
         converter = DocumentFieldConverter(Mock())
-        self.assertRaises(
-            NotImplementedError, converter.from_listfield, Mock())
+        converter.convert = Mock(return_value='inner-field')
+        converter.max_list_entries = 10
+        result = converter.from_listfield(document_field, validators=[])
 
-    def test_from_sortedlistfield(self):
+        converter.convert.assert_called_once_with(document_field.field)
+        BoundedFieldList.assert_called_once_with(
+            'inner-field', validators=[], max_entries=10)
+        self.assertEqual('list-field', result)
+
+    def test_from_listfield_no_inner_field(self):
+        """
+        Test :py:meth:`.DocumentFieldConverter.from_listfield` without a
+        convertable inner field.
+        """
+        document_field = Mock()
+        document_field.field = None
+
+        converter = DocumentFieldConverter(Mock())
+        self.assertEqual(None, converter.from_listfield(document_field))
+
+        document_field.field = Mock()
+        converter.convert = Mock(return_value=None)
+        self.assertEqual(None, converter.from_listfield(document_field))
+
+    @patch('wtfmongoengine.forms.SortedFieldList')
+    def test_from_sortedlistfield(self, SortedFieldList):
         """
         Test :py:meth:`.DocumentFieldConverter.from_sortedlistfield`.
         """
+        SortedFieldList.return_value = 'sorted-list-field'
+        document_field = Mock()
+        document_field._ordering = 'name'
+        document_field._order_reverse = True
+
         converter = DocumentFieldConverter(Mock())
-        self.assertRaises(
-            NotImplementedError, converter.from_sortedlistfield, Mock())
+        converter.convert = Mock(return_value='inner-field')
+        converter.max_list_entries = 10
+        result = converter.from_sortedlistfield(document_field, validators=[])
+
+        SortedFieldList.assert_called_once_with(
+            'inner-field',
+            validators=[],
+            max_entries=10,
+            ordering='name',
+            reverse=True,
+        )
+        self.assertEqual('sorted-list-field', result)
 
-    def test_from_dictfield(self):
+    @patch('wtfmongoengine.forms.MappingField')
+    def test_from_dictfield(self, MappingField):
         """
         Test :py:meth:`.DocumentFieldConverter.from_dictfield`.
         """
+        MappingField.return_value = 'mapping-field'
+        document_field = Mock()
+
         converter = DocumentFieldConverter(Mock())
-        self.assertRaises(
-            NotImplementedError, converter.from_dictfield, Mock())
+        converter.convert = Mock(return_value='inner-field')
+        converter.max_dict_entries = 10
+        converter.max_dict_key_length = 20
+        result = converter.from_dictfield(document_field, validators=[])
+
+        converter.convert.assert_called_once_with(document_field.field)
+        MappingField.assert_called_once_with(
+            'inner-field', validators=[], max_entries=10, max_key_length=20)
+        self.assertEqual('mapping-field', result)
+
+    @patch('wtfmongoengine.forms.MappingField')
+    def test_from_dictfield_untyped(self, MappingField):
+        """
+        Test :py:meth:`.DocumentFieldConverter.from_dictfield` without an
+        inner field.
+        """
+        document_field = Mock()
+        document_field.field = None
+
+        converter = DocumentFieldConverter(Mock())
+        converter.from_dictfield(document_field)
+
+        MappingField.assert_called_once_with(
+            None, max_entries=100, max_key_length=100)
+
+        document_field.field = Mock()
+        converter.convert = Mock(return_value=None)
+        self.assertEqual(None, converter.from_dictfield(document_field))
 
     def test_from_mapfield(self):
         """
         Test :py:meth:`.DocumentFieldConverter.from_mapfield`.
         """
         converter = DocumentFieldConverter(Mock())
-        self.assertRaises(
-            NotImplementedError, converter.from_mapfield, Mock())
+        converter.from_dictfield = Mock(return_value='mapping-field')
+
+        result = converter.from_mapfield('document-field', label='Label')
+
+        converter.from_dictfield.assert_called_once_with(
+            'document-field', label='Label')
+        self.assertEqual('mapping-field', result)
 
     def test_from_objectidfield(self):
         """
@@ -473,13 +851,22 @@ class DocumentFieldConverterTestCase(TestCase):
         converter = DocumentFieldConverter(Mock())
         self.assertEqual(None, converter.from_objectidfield(Mock()))
 
-    def test_from_referencefield(self):
+    @patch('wtfmongoengine.forms.ReferenceSelectField')
+    def test_from_referencefield(self, ReferenceSelectField):
         """
         Test :py:meth:`.DocumentFieldConverter.from_referencefield`.
         """
+        ReferenceSelectField.return_value = 'reference-field'
+        document_field = Mock()
+        document_field.document_type = 'a-document'
+        document_field.required = False
+
         converter = DocumentFieldConverter(Mock())
-        self.assertRaises(
-            NotImplementedError, converter.from_referencefield, Mock())
+        result = converter.from_referencefield(document_field, validators=[])
+
+        ReferenceSelectField.assert_called_once_with(
+            validators=[], document_class='a-document', allow_blank=True)
+        self.assertEqual('reference-field', result)
 
     def test_from_genericreferencefield(self):
         """
@@ -493,44 +880,136 @@ class DocumentFieldConverterTestCase(TestCase):
         """
         Test :py:meth:`.DocumentFieldConverter.from_embeddeddocumentfield`.
         """
+        document_field = Mock()
+        document_field.document_type = 'a-document'
+
         converter = DocumentFieldConverter(Mock())
-        self.assertRaises(
-            NotImplementedError, converter.from_embeddeddocumentfield, Mock())
+        converter.embedded_form_field = Mock(return_value='form-field')
+        result = converter.from_embeddeddocumentfield(
+            document_field, validators=[])
+
+        converter.embedded_form_field.assert_called_once_with(
+            'a-document', {'validators': []})
+        self.assertEqual('form-field', result)
 
     def test_from_genericembeddeddocumentfield(self):
         """
         Test :meth:`.DocumentFieldConverter.from_genericembeddeddocumentfield`.
         """
+        class EmbeddedDocumentMock(object):
+            pass
+
+        document_field = Mock()
+        document_field.choices = [EmbeddedDocumentMock]
+
         converter = DocumentFieldConverter(Mock())
-        self.assertRaises(
-            NotImplementedError,
-            converter.from_genericembeddeddocumentfield,
-            Mock()
-        )
+        converter.embedded_form_field = Mock(return_value='form-field')
+        result = converter.from_genericembeddeddocumentfield(
+            document_field, validators=[])
 
-    def test_from_filefield(self):
+        converter.embedded_form_field.assert_called_once_with(
+            EmbeddedDocumentMock, {'validators': []})
+        self.assertEqual('form-field', result)
+
+    def test_from_genericembeddeddocumentfield_no_choices(self):
+        """
+        Test :meth:`.DocumentFieldConverter.from_genericembeddeddocumentfield`
+        without a single document class to choose from.
+        """
+        document_field = Mock()
+        document_field.choices = None
+
+        converter = DocumentFieldConverter(Mock())
+        self.assertEqual(
+            None, converter.from_genericembeddeddocumentfield(document_field))
+
+        document_field.choices = [Mock, object]
+        self.assertEqual(
+            None, converter.from_genericembeddeddocumentfield(document_field))
+
+    @patch('wtfmongoengine.forms.EmbeddedFormField')
+    def test_embedded_form_field(self, EmbeddedFormField):
+        """
+        Test :py:meth:`.DocumentFieldConverter.embedded_form_field`.
+        """
+        EmbeddedFormField.return_value = 'form-field'
+
+        converter = DocumentFieldConverter(Mock())
+        converter.embedded_form_class = Mock(return_value='form-class')
+        result = converter.embedded_form_field(
+            'a-document', {'label': 'Label', 'validators': ['required']})
+
+        converter.embedded_form_class.assert_called_once_with('a-document')
+        EmbeddedFormField.assert_called_once_with(
+            'form-class', label='Label', document_class='a-document')
+        self.assertEqual('form-field', result)
+
+    @patch('wtfmongoengine.forms.GridFSFileField')
+    def test_from_filefield(self, GridFSFileField):
         """
         Test :py:meth:`.DocumentFieldConverter.from_filefield`.
         """
+        GridFSFileField.return_value = 'file-field'
+        document_field = Mock()
+        document_field.proxy_class = 'proxy-class'
+        document_field.db_alias = 'default'
+        document_field.collection_name = 'files'
+
+        class TestConverter(DocumentFieldConverter):
+            max_file_size = 1024
+            file_checksum = 'md5'
+
+        converter = TestConverter(Mock())
+        result = converter.from_filefield(document_field, label='Label')
+
+        GridFSFileField.assert_called_once_with(
+            label='Label',
+            proxy_class='proxy-class',
+            db_alias='default',
+            collection_name='files',
+            max_size=1024,
+            checksum='md5',
+        )
+        self.assertEqual('file-field', result)
+
+    def test_from_imagefield(self):
+        """
+        Test :py:meth:`.DocumentFieldConverter.from_imagefield`.
+        """
         converter = DocumentFieldConverter(Mock())
-        self.assertRaises(
-            NotImplementedError, converter.from_filefield, Mock())
 
-    def test_from_binaryfield(self):
+        self.assertEqual(None, converter.from_imagefield(Mock()))
+        self.assertEqual(
+            'from_imagefield', DocumentFieldConverter.resolve_handler(
+                ImageField))
+
+    @patch('wtfmongoengine.forms.BytesField')
+    def test_from_binaryfield(self, BytesField):
         """
         Test :py:meth:`.DocumentFieldConverter.from_binaryfield`.
         """
+        BytesField.return_value = 'bytes-field'
+        document_field = Mock()
+        document_field.max_bytes = 1024
+
         converter = DocumentFieldConverter(Mock())
-        self.assertRaises(
-            NotImplementedError, converter.from_binaryfield, Mock())
+        result = converter.from_binaryfield(document_field, label='Label')
+
+        BytesField.assert_called_once_with(label='Label', max_bytes=1024)
+        self.assertEqual('bytes-field', result)
 
-    def test_from_geopointfield(self):
+    @patch('wtfmongoengine.forms.GeoPointFormField')
+    def test_from_geopointfield(self, GeoPointFormField):
         """
         Test :py:meth:`.DocumentFieldConverter.from_geopointfield`.
         """
+        GeoPointFormField.return_value = 'geo-field'
+
         converter = DocumentFieldConverter(Mock())
-        self.assertRaises(
-            NotImplementedError, converter.from_geopointfield, Mock())
+        result = converter.from_geopointfield(Mock(), label='Label')
+
+        GeoPointFormField.assert_called_once_with(label='Label')
+        self.assertEqual('geo-field', result)
 
     def test_from_sequencefield(self):
         """
@@ -0,0 +1,67 @@
+from array import array
+
+import unittest2 as unittest
+
+from wtfmongoengine import geo
+
+
+class ValidatePointsTestCase(unittest.TestCase):
+    """
+    Test :py:func:`wtfmongoengine.geo.validate_points`.
+    """
+    def test_pairs(self):
+        """
+        Test validating a list of pairs into an ``array('d')``.
+        """
+        coordinates, invalid = geo.validate_points([
+            (52.37, 4.89),
+            ('-33.86', '151.21'),
+            (91, 0),
+            (0, -181),
+            ('x', 0),
+            (1, 2, 3),
+        ], use_numpy=False)
+
+        self.assertIsInstance(coordinates, array)
+        self.assertEqual('d', coordinates.typecode)
+        self.assertEqual(12, len(coordinates))
+        self.assertEqual(
+            [52.37, 4.89, -33.86, 151.21], coordinates[:4].tolist())
+        self.assertEqual([2, 3, 4, 5], invalid)
+
+    def test_flat_array(self):
+        """
+        Test validating a flat ``array('d')`` without copying it.
+        """
+        points = array('d', [10, 20, 100, 20, float('nan'), 0])
+        coordinates, invalid = geo.validate_points(points, use_numpy=False)
+
+        self.assertIs(points, coordinates)
+        self.assertEqual([1, 2], invalid)
+
+        self.assertRaises(
+            ValueError, geo.validate_points, array('d', [1]), False)
+
+    @unittest.skipIf(geo.numpy is None, 'NumPy is not installed')
+    def test_numpy(self):
+        """
+        Test the vectorized validation.
+        """
+        coordinates, invalid = geo.validate_points(
+            [(52.37, 4.89), (91, 0), (0, 180)], use_numpy=True)
+
+        self.assertEqual((3, 2), coordinates.shape)
+        self.assertEqual([1], invalid)
+
+        # points which are not numeric fall back to the array path
+        coordinates, invalid = geo.validate_points(
+            [(1, 2), ('x', 0)], use_numpy=True)
+        self.assertEqual([1], invalid)
+
+    @unittest.skipIf(geo.numpy is not None, 'NumPy is installed')
+    def test_numpy_missing(self):
+        """
+        Test requesting NumPy when it is not installed.
+        """
+        self.assertRaises(
+            ImportError, geo.validate_points, [(1, 2)], use_numpy=True)
@@ -0,0 +1,141 @@
+from mock import Mock
+from unittest2 import TestCase
+
+from wtfmongoengine.instrumentation import Instrumentation, Stats
+
+
+class StatsTestCase(TestCase):
+    """
+    Test :py:class:`.Stats`.
+    """
+    def test_add(self):
+        """
+        Test adding conversion and validator timings.
+        """
+        stats = Stats()
+        stats.add_conversion('Doc', 'name', 0.5)
+        stats.add_conversion('Doc', 'name', 0.25)
+        stats.add_validator('DocForm', 'name', 'Length', 0.1)
+
+        self.assertEqual([2, 0.75], stats.conversions[('Doc', 'name')])
+        self.assertEqual(
+            [1, 0.1], stats.validators[('DocForm', 'name', 'Length')])
+
+    def test_as_dict_and_reset(self):
+        """
+        Test :py:meth:`.Stats.as_dict` and :py:meth:`.Stats.reset`.
+        """
+        stats = Stats()
+        stats.add_validator('DocForm', 'name', 'Length', 0.1)
+
+        self.assertEqual({
+            'conversions': [],
+            'validators': [{
+                'form': 'DocForm',
+                'field': 'name',
+                'validator': 'Length',
+                'calls': 1,
+                'seconds': 0.1,
+            }],
+        }, stats.as_dict())
+
+        stats.reset()
+        self.assertEqual({}, stats.validators)
+
+
+class InstrumentationTestCase(TestCase):
+    """
+    Test :py:class:`.Instrumentation`.
+    """
+    def test_enable_disable(self):
+        """
+        Test enabling with a callback and disabling.
+        """
+        callback = Mock()
+        instrumentation = Instrumentation()
+        self.assertFalse(instrumentation.enabled)
+
+        instrumentation.enable(callback)
+        self.assertTrue(instrumentation.enabled)
+        self.assertEqual([callback], instrumentation.callbacks)
+
+        instrumentation.disable()
+        self.assertFalse(instrumentation.enabled)
+        self.assertEqual([], instrumentation.callbacks)
+
+    def test_record_conversion(self):
+        """
+        Test :py:meth:`.Instrumentation.record_conversion`.
+        """
+        callback = Mock()
+        instrumentation = Instrumentation()
+        instrumentation.enable(callback)
+
+        document_class = type('Doc', (object,), {'__module__': 'app'})
+        instrumentation.record_conversion(document_class, 'name', 0.5)
+
+        callback.assert_called_once_with(
+            'wtfmongoengine.convert',
+            {'document': 'app.Doc', 'field': 'name'},
+            0.5
+        )
+        self.assertEqual(
+            [1, 0.5], instrumentation.stats.conversions[('app.Doc', 'name')])
+
+    def test_record_conversion_modules(self):
+        """
+        Test that same-named documents of different modules are separate.
+        """
+        instrumentation = Instrumentation()
+        instrumentation.enable()
+
+        for module in ('blog', 'shop'):
+            document_class = type('Doc', (object,), {'__module__': module})
+            instrumentation.record_conversion(document_class, 'name', 0.5)
+
+        self.assertEqual({
+            ('blog.Doc', 'name'): [1, 0.5],
+            ('shop.Doc', 'name'): [1, 0.5],
+        }, instrumentation.stats.conversions)
+
+    def test_record_validator_modules(self):
+        """
+        Test that same-named forms of different modules are separate.
+        """
+        instrumentation = Instrumentation()
+        instrumentation.enable()
+
+        field = Mock(short_name='name')
+        validator = Mock()
+        for module in ('blog', 'shop'):
+            form_class = type('DocForm', (object,), {'__module__': module})
+            instrumentation.record_validator(
+                form_class(), field, validator, 0.5)
+
+        self.assertEqual({
+            ('blog.DocForm', 'name', 'Mock'): [1, 0.5],
+            ('shop.DocForm', 'name', 'Mock'): [1, 0.5],
+        }, instrumentation.stats.validators)
+
+    def test_timed_validators(self):
+        """
+        Test :py:meth:`.Instrumentation.timed_validators`.
+        """
+        callback = Mock()
+        instrumentation = Instrumentation()
+        instrumentation.enable(callback)
+
+        validator = Mock(return_value='result')
+        field = Mock(validators=[validator], short_name='name')
+        form = Mock()
+
+        timed = instrumentation.timed_validators(field)
+        self.assertEqual('result', timed[0](form, field))
+
+        validator.assert_called_once_with(form, field)
+        metric, tags, seconds = callback.call_args[0]
+        self.assertEqual('wtfmongoengine.validator', metric)
+        self.assertEqual('mock.Mock', tags['form'])
+        self.assertEqual('name', tags['field'])
+        self.assertEqual('Mock', tags['validator'])
+        self.assertTrue(seconds >= 0)
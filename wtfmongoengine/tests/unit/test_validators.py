@@ -0,0 +1,151 @@
+import re
+
+from unittest2 import TestCase
+
+from mock import Mock
+from wtforms.validators import ValidationError
+
+from wtfmongoengine.validators import (
+    Unique, clear_validator_cache, compile_regex, shared_validator)
+
+
+class CompileRegexTestCase(TestCase):
+    """
+    Test :py:func:`.compile_regex`.
+    """
+    def tearDown(self):
+        clear_validator_cache()
+
+    def test_compile_regex(self):
+        """
+        Test that a pattern is compiled once per pattern and flags.
+        """
+        regex = compile_regex('[a-z]+')
+
+        self.assertEqual('[a-z]+', regex.pattern)
+        self.assertIs(regex, compile_regex('[a-z]+'))
+        self.assertIsNot(regex, compile_regex('[a-z]+', re.IGNORECASE))
+
+    def test_compile_regex_compiled(self):
+        """
+        Test that compiled patterns are normalized to the cached pattern.
+        """
+        regex = compile_regex('[0-9]+')
+        self.assertIs(regex, compile_regex(re.compile('[0-9]+')))
+
+
+class SharedValidatorTestCase(TestCase):
+    """
+    Test :py:func:`.shared_validator`.
+    """
+    def tearDown(self):
+        clear_validator_cache()
+
+    def test_shared_validator(self):
+        """
+        Test that validators with the same arguments are shared.
+        """
+        validator_class = Mock(side_effect=lambda **kwargs: object())
+
+        first = shared_validator(validator_class, min=1, max=2)
+        second = shared_validator(validator_class, max=2, min=1)
+        third = shared_validator(validator_class, min=1, max=3)
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, third)
+        self.assertEqual(2, validator_class.call_count)
+
+    def test_shared_validator_unhashable(self):
+        """
+        Test that validators with unhashable arguments are not shared.
+        """
+        validator_class = Mock(side_effect=lambda *args: object())
+
+        first = shared_validator(validator_class, ['a', 'b'])
+        second = shared_validator(validator_class, ['a', 'b'])
+
+        self.assertIsNot(first, second)
+
+
+class UniqueTestCase(TestCase):
+    """
+    Test :py:class:`.Unique`.
+    """
+    def setUp(self):
+        self.document_class = Mock()
+        self.queryset = self.document_class.objects.return_value
+        self.form = Mock(_fields={}, _instance=None, _defer_unique=False)
+        self.field = Mock(data='value')
+
+    def test_call(self):
+        """
+        Test that an existing value raises a ``ValidationError``.
+        """
+        validator = Unique(self.document_class, 'name')
+        self.queryset.only.return_value.first.return_value = None
+
+        validator(self.form, self.field)
+        self.document_class.objects.assert_called_once_with(name='value')
+
+        self.queryset.only.return_value.first.return_value = object()
+        self.assertRaises(
+            ValidationError, validator, self.form, self.field)
+
+    def test_call_deferred(self):
+        """
+        Test that no query is done when the check is deferred.
+        """
+        self.form._defer_unique = True
+
+        Unique(self.document_class, 'name')(self.form, self.field)
+
+        self.assertEqual(0, self.document_class.objects.call_count)
+
+    def test_key(self):
+        """
+        Test the key, with the ``unique_with`` values.
+        """
+        self.form._fields = {'city': Mock(data='Amsterdam')}
+        self.form._instance = Mock(country='NL')
+        validator = Unique(
+            self.document_class, 'name', ('city', 'country'))
+
+        self.assertEqual(
+            ('value', 'Amsterdam', 'NL'),
+            validator.key(self.form, self.field)
+        )
+        self.assertIsNone(validator.key(self.form, Mock(data='')))
+
+    def test_batch_errors(self):
+        """
+        Test the duplicates within the batch and in the database.
+        """
+        validator = Unique(self.document_class, 'name')
+        self.queryset.scalar.return_value = ['b']
+
+        errors = validator.batch_errors([
+            (0, ('a',)), (1, ('b',)), (2, ('a',)), (3, ('c',))])
+
+        self.assertEqual([1, 2], sorted(errors.keys()))
+        self.assertEqual('This value is already in use.', errors[1])
+        self.assertEqual('This value is duplicated in the batch.', errors[2])
+        self.assertEqual(
+            ['a', 'b', 'c'],
+            sorted(self.document_class.objects.call_args[1]['name__in'])
+        )
+
+    def test_batch_errors_unhashable(self):
+        """
+        Test that a key which can't be made hashable gets its own query.
+        """
+        validator = Unique(self.document_class, 'name', ('tags',))
+        self.queryset.scalar.return_value = []
+        self.queryset.only.return_value.first.return_value = object()
+
+        errors = validator.batch_errors([
+            (0, ('a', set(['x']))), (1, ('b', None))])
+
+        self.assertEqual({0: 'This value is already in use.'}, errors)
+        self.document_class.objects.assert_any_call(
+            name='a', tags=set(['x']))
+        self.document_class.objects.assert_any_call(name__in=['b'])
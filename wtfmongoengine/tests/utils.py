@@ -0,0 +1,103 @@
+import threading
+import time
+
+import unittest2 as unittest
+
+from mongoengine import connection
+from wtforms.validators import ValidationError
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+
+@unittest.skipIf(mongomock is None, 'mongomock is not installed')
+class MongomockTestCase(unittest.TestCase):
+    """
+    Base test-case which connects Mongoengine to an in-memory mongomock
+    database.
+
+    .. note::
+        Documents cache their collection, so define them in ``setUp``.
+    """
+    def setUp(self):
+        connection._connection_settings['default'] = {
+            'name': 'wtfmongoengine-test',
+            'username': None,
+            'password': None,
+        }
+        connection._connections['default'] = mongomock.MongoClient()
+
+    def tearDown(self):
+        connection._connections.pop('default', None)
+        connection._connection_settings.pop('default', None)
+        connection._dbs.pop('default', None)
+
+
+class DummyPostData(dict):
+    """
+    Minimal multi-dict, as passed by web frameworks as ``formdata``.
+    """
+    def getlist(self, key):
+        value = self[key]
+        if not isinstance(value, (list, tuple)):
+            value = [value]
+        return value
+
+
+class FakeBackend(object):
+    """
+    In-process stand-in for a database, answering after ``latency`` seconds.
+
+    When ``latency`` is ``None``, a call blocks until ``released`` is set,
+    which happens as soon as ``release_at`` calls are active at once (or
+    after ``max_wait`` seconds).
+
+    It records the number of calls and the maximum number of concurrent
+    calls.
+    """
+    max_wait = 5
+
+    def __init__(self, values=(), latency=0.05, release_at=None):
+        self.values = set(values)
+        self.latency = latency
+        self.release_at = release_at
+        self.released = threading.Event()
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def exists(self, value):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            if self.active == self.release_at:
+                self.released.set()
+
+        try:
+            if self.latency is None:
+                self.released.wait(self.max_wait)
+            else:
+                time.sleep(self.latency)
+            return value in self.values
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class FakeBackendValidator(object):
+    """
+    Blocking validator failing for the values in ``backend``.
+    """
+    blocking = True
+
+    def __init__(self, backend, message=u'Already exists.'):
+        self.backend = backend
+        self.message = message
+
+    def __call__(self, form, field):
+        if self.backend.exists(field.data):
+            raise ValidationError(self.message)
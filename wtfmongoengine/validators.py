@@ -0,0 +1,334 @@
+import re
+import threading
+
+from bson import BSON
+from bson.errors import BSONError
+from mongoengine.base import BaseDocument
+from wtforms.validators import ValidationError
+
+from wtfmongoengine.fields import EmbeddedFormField
+
+
+_validator_cache = {}
+_validator_specs = {}
+_regex_cache = {}
+_lock = threading.Lock()
+
+
+def compile_regex(pattern, flags=0):
+    """
+    Return the compiled regular expression for ``pattern`` and ``flags``.
+
+    Unlike :py:func:`re.compile`, the cache is not bounded, so every pattern
+    is compiled exactly once per process.
+
+    :param pattern:
+        The regular expression string or an already compiled pattern (as
+        Mongoengine compiles the ``regex`` of a ``StringField``).
+
+    :param flags:
+        The regular expression flags, ignored when ``pattern`` is compiled.
+
+    :return:
+        A compiled regular expression pattern.
+
+    """
+    if isinstance(pattern, basestring):
+        key = (pattern, flags)
+    else:
+        key = (pattern.pattern, pattern.flags)
+
+    try:
+        return _regex_cache[key]
+    except KeyError:
+        pass
+
+    with _lock:
+        if key not in _regex_cache:
+            if isinstance(pattern, basestring):
+                pattern = re.compile(pattern, flags)
+            _regex_cache[key] = pattern
+        return _regex_cache[key]
+
+
+def shared_validator(validator_class, *args, **kwargs):
+    """
+    Return a shared instance of ``validator_class``.
+
+    Validators created with the same class and arguments are interned, so
+    identical constraints of different fields (and forms) use the same
+    object.
+
+    .. note::
+        The returned validators are shared and must be treated as
+        immutable.
+
+    :param validator_class:
+        The WTForms validator class.
+
+    :return:
+        Instance of ``validator_class``.
+
+    """
+    key = (validator_class, args, tuple(sorted(kwargs.items())))
+
+    try:
+        return _validator_cache[key]
+    except KeyError:
+        pass
+    except TypeError:
+        # one of the arguments is not hashable, this can't be shared
+        return validator_class(*args, **kwargs)
+
+    with _lock:
+        if key not in _validator_cache:
+            validator = validator_class(*args, **kwargs)
+            _validator_cache[key] = validator
+            _validator_specs[id(validator)] = key
+        return _validator_cache[key]
+
+
+def validator_spec(validator):
+    """
+    Return the arguments ``validator`` was created with.
+
+    :param validator:
+        A validator instance.
+
+    :return:
+        A ``(validator_class, args, kwargs items)`` tuple when ``validator``
+        was returned by :py:func:`shared_validator`, else ``None``.
+
+    """
+    return _validator_specs.get(id(validator))
+
+
+def validator_from_spec(spec):
+    """
+    Return the shared validator for ``spec`` (see :py:func:`validator_spec`).
+    """
+    validator_class, args, items = spec
+    kwargs = {}
+
+    for name, value in items:
+        if hasattr(value, 'pattern') and hasattr(value, 'flags'):
+            # an unpickled pattern is not the interned one
+            value = compile_regex(value)
+        kwargs[name] = value
+
+    return shared_validator(validator_class, *args, **kwargs)
+
+
+def clear_validator_cache():
+    """
+    Clear the shared validator and compiled regular expression caches.
+    """
+    with _lock:
+        _validator_cache.clear()
+        _validator_specs.clear()
+        _regex_cache.clear()
+
+
+class Unique(object):
+    """
+    Validate that no other document has the value of the field.
+
+    The value is combined with the values of the ``unique_with`` fields,
+    taken from the form or else from the bound document. The bound document
+    itself is excluded.
+
+    When the form has ``_defer_unique`` set, the validator does not query
+    the database: the values are checked in bulk with
+    :py:meth:`batch_errors` (see :py:meth:`.DocumentForm.unique_keys`).
+
+    :param document_class:
+        The Mongoengine document class.
+
+    :param field_name:
+        The name of the unique field.
+
+    :param unique_with:
+        The names of the fields the value must be unique with (optional).
+
+    :param message:
+        The error message (optional).
+
+    """
+    #: The validator queries the database (see
+    #: :py:meth:`.DocumentForm.async_validate`).
+    blocking = True
+
+    def __init__(self, document_class, field_name, unique_with=(),
+                 message=None):
+        self.document_class = document_class
+        self.field_name = field_name
+        self.unique_with = tuple(unique_with)
+        self.message = message
+
+        # Mongoengine query names, e.g. ``address__city``
+        self.query_names = tuple(
+            name.replace('.', '__')
+            for name in (field_name,) + self.unique_with
+        )
+
+    def __call__(self, form, field):
+        if getattr(form, '_defer_unique', False):
+            return
+
+        key = self.key(form, field)
+        if key is None:
+            return
+
+        if self.exists(key, getattr(form, '_instance', None)):
+            message = self.message
+            if message is None:
+                message = field.gettext(u'This value is already in use.')
+            raise ValidationError(message)
+
+    def exists(self, key, instance=None):
+        """
+        Return whether another document has the values of ``key``.
+
+        :param key:
+            The key as returned by :py:meth:`key`.
+
+        :param instance:
+            The bound document, which is excluded (optional).
+
+        """
+        queryset = self.document_class.objects(
+            **dict(zip(self.query_names, key)))
+
+        if instance is not None and instance.pk is not None:
+            queryset = queryset.filter(pk__ne=instance.pk)
+
+        return queryset.only('pk').first() is not None
+
+    def key(self, form, field):
+        """
+        Return the values which must be unique for ``field``.
+
+        :return:
+            A ``tuple`` of the field value and the ``unique_with`` values,
+            or ``None`` when the field is empty.
+
+        """
+        # an embedded document is compared as a whole
+        if isinstance(field, EmbeddedFormField):
+            value = field.to_document()
+        else:
+            value = field.data
+
+        if value is None or value == '':
+            return None
+
+        form_fields = getattr(form, '_fields', {})
+        instance = getattr(form, '_instance', None)
+        values = [value]
+
+        for name in self.unique_with:
+            if name in form_fields:
+                values.append(form_fields[name].data)
+            else:
+                values.append(getattr(instance, name, None))
+
+        return tuple(values)
+
+    def hashable_key(self, key):
+        """
+        Return ``key`` in a hashable form, which compares like the stored
+        values.
+
+        Embedded documents, lists and dicts are replaced by the BSON
+        encoding of their stored representation. Documents would otherwise
+        be hashed by identity and lists can't be hashed at all.
+
+        :raises TypeError:
+            When the key can't be converted.
+
+        """
+        values = []
+
+        for name, value in zip(self.query_names, key):
+            if isinstance(value, (BaseDocument, dict, list, tuple)):
+                field = self.document_class._lookup_field(
+                    name.split('__'))[-1]
+                try:
+                    value = BSON.encode({'value': field.to_mongo(value)})
+                except BSONError as e:
+                    raise TypeError(e)
+            values.append(value)
+
+        values = tuple(values)
+        hash(values)
+        return values
+
+    def batch_errors(self, keys):
+        """
+        Check the keys of a batch of records at once.
+
+        Duplicates within the batch are found in memory (see
+        :py:meth:`hashable_key`), the existing values are fetched with a
+        single ``$in`` query. A key which can't be made hashable is checked
+        with a query of its own.
+
+        :param keys:
+            An iterable of ``(index, key)`` tuples, ``key`` as returned by
+            :py:meth:`key`.
+
+        :return:
+            A ``dict`` mapping the index of each invalid key to its error
+            message. The first occurrence of a duplicated key is valid.
+
+        """
+        errors = {}
+        seen = set()
+        candidates = []
+        message = self.message or u'This value is already in use.'
+
+        for index, key in keys:
+            try:
+                hashable = self.hashable_key(key)
+            except TypeError:
+                if self.exists(key):
+                    errors[index] = message
+                continue
+
+            if hashable in seen:
+                errors[index] = u'This value is duplicated in the batch.'
+            else:
+                seen.add(hashable)
+                candidates.append((index, key, hashable))
+
+        if not candidates:
+            return errors
+
+        values = {}
+        for index, key, hashable in candidates:
+            values[hashable[0]] = key[0]
+            if isinstance(key[0], (list, tuple)):
+                # the elements find the arrays containing them, the stored
+                # arrays are compared as a whole below
+                for value in key[0]:
+                    try:
+                        values.setdefault(value, value)
+                    except TypeError:
+                        pass
+
+        queryset = self.document_class.objects(
+            **{self.query_names[0] + '__in': values.values()})
+
+        existing = set()
+        for stored in queryset.scalar(*self.query_names):
+            if len(self.query_names) == 1:
+                stored = (stored,)
+            try:
+                existing.add(self.hashable_key(stored))
+            except TypeError:
+                pass
+
+        for index, key, hashable in candidates:
+            if hashable in existing:
+                errors[index] = message
+
+        return errors